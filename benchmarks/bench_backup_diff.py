@@ -0,0 +1,80 @@
+"""Benchmark finding the files to delete in `clifs backup --delete`.
+
+Compares the previous check of each destination file against the list of source
+files with the merge-join of the sorted tree listings now used by the backup
+plugin. Paths are generated in memory, so no files are created. The list based
+check is quadratic and therefore run on a sample of the paths only.
+
+Usage:
+    python benchmarks/bench_backup_diff.py [--files N] [--sample N]
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from clifs.plugins.backup import TreeEntry, diff_trees
+
+ROOT_SOURCE = Path(os.sep, "data", "source")
+ROOT_DEST = Path(os.sep, "backup", "dest")
+
+
+def create_paths(num_files: int) -> Tuple[List[Path], List[Path]]:
+    """Create source and destination paths, 1% of the destination being obsolete."""
+    paths_relative = [
+        os.path.join(f"dir_{idx // 1000}", f"sub_{idx // 100 % 10}", f"file_{idx}.txt")
+        for idx in range(num_files)
+    ]
+    paths_source = [
+        ROOT_SOURCE / path for idx, path in enumerate(paths_relative) if idx % 100
+    ]
+    paths_dest = [ROOT_DEST / path for path in paths_relative]
+    return paths_source, paths_dest
+
+
+def get_obsolete_list(paths_source: List[Path], paths_dest: List[Path]) -> int:
+    return sum(
+        Path(str(path).replace(str(ROOT_DEST), str(ROOT_SOURCE))) not in paths_source
+        for path in paths_dest
+    )
+
+
+def get_obsolete_merge_join(paths_source: List[Path], paths_dest: List[Path]) -> int:
+    tree_source = sorted(
+        TreeEntry(str(path.relative_to(ROOT_SOURCE)), False, 0, 0.0)
+        for path in paths_source
+    )
+    tree_dest = sorted(
+        TreeEntry(str(path.relative_to(ROOT_DEST)), False, 0, 0.0)
+        for path in paths_dest
+    )
+    return len(diff_trees(tree_source, tree_dest).obsolete)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=2_000_000, help="Files in dest.")
+    parser.add_argument(
+        "--sample", type=int, default=5_000, help="Files for the list based check."
+    )
+    args = parser.parse_args()
+
+    for label, get_obsolete, num_files in [
+        ("list lookups", get_obsolete_list, args.sample),
+        ("merge-join", get_obsolete_merge_join, args.sample),
+        ("merge-join", get_obsolete_merge_join, args.files),
+    ]:
+        paths_source, paths_dest = create_paths(num_files)
+        time_start = time.perf_counter()
+        num_obsolete = get_obsolete(paths_source, paths_dest)
+        duration = time.perf_counter() - time_start
+        print(
+            f"{label:15} {num_files:>10} files  {num_obsolete:>8} obsolete  "
+            f"{duration * 1000:10.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark copying files by the copy engines.
+
+Compares `shutil.copy2` against `clifs.utils_copy.fast_copy` picking the fastest
+engine and against each engine on its own, on a few large and many small files.
+Engines not supported for the files, e.g. reflinks on ext4, are reported as such.
+Copy to a directory on another file system via `--dir_dest` to compare the
+engines across devices. The page cache is not dropped between runs.
+
+Usage:
+    python benchmarks/bench_copy.py [--large N] [--size_large MiB] [--small N]
+        [--size_small KiB] [--dir_dest DIR]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from clifs.utils_copy import fast_copy, get_engines
+
+
+def create_files(dir_files: Path, num_files: int, size: int) -> List[Path]:
+    dir_files.mkdir(parents=True)
+    paths = []
+    for idx in range(num_files):
+        path = dir_files / f"file_{idx}.bin"
+        path.write_bytes(os.urandom(size))
+        paths.append(path)
+    return paths
+
+
+def measure(
+    label: str, paths: List[Path], dir_dest: Path, copy: Callable[[Path, Path], object]
+) -> None:
+    if dir_dest.exists():
+        shutil.rmtree(dir_dest)
+    dir_dest.mkdir(parents=True)
+    size_total = sum(path.stat().st_size for path in paths)
+    time_start = time.perf_counter()
+    try:
+        for path in paths:
+            copy(path, dir_dest / path.name)
+    except OSError as err:
+        print(f"  {label:20} not supported: {err.strerror}")
+        return
+    duration = time.perf_counter() - time_start
+    print(
+        f"  {label:20} {duration * 1000:10.1f} ms  "
+        f"{size_total / 2**20 / duration:10.1f} MiB/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--large", type=int, default=4, help="Number of large files.")
+    parser.add_argument(
+        "--size_large", type=int, default=256, help="Size of large files in MiB."
+    )
+    parser.add_argument(
+        "--small", type=int, default=5000, help="Number of small files."
+    )
+    parser.add_argument(
+        "--size_small", type=int, default=4, help="Size of small files in KiB."
+    )
+    parser.add_argument(
+        "--dir_dest",
+        type=Path,
+        default=None,
+        help="Directory to copy to, defaults to a temporary directory next to the "
+        "source files.",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir_tmp:
+        dir_dest = (args.dir_dest or Path(dir_tmp)) / "bench_copy_dest"
+        for label, num_files, size in [
+            ("large files", args.large, args.size_large * 2**20),
+            ("small files", args.small, args.size_small * 2**10),
+        ]:
+            paths = create_files(Path(dir_tmp) / label, num_files, size)
+            print(f"{num_files} {label} of {size / 2**10:.0f} KiB")
+            measure("shutil.copy2", paths, dir_dest, shutil.copy2)
+            measure("fast_copy", paths, dir_dest, fast_copy)
+            for engine in get_engines():
+                measure(
+                    engine.name,
+                    paths,
+                    dir_dest,
+                    lambda src, dst, engine=engine: fast_copy(src, dst, [engine]),
+                )
+        shutil.rmtree(dir_dest)
+
+
+if __name__ == "__main__":
+    main()
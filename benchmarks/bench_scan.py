@@ -0,0 +1,141 @@
+"""Benchmark the selection of files by substring filter.
+
+Compares the `os.scandir` based walker used by `PathGetterMixin` against the
+previous implementation based on `pathlib.Path.glob` calling `is_dir()` and
+`resolve()` on every match, and against the walker listing directories with
+several threads. The latency of a network share can be simulated by delaying
+each directory listing.
+
+Usage:
+    python benchmarks/bench_scan.py [--runs N] [--dirs N] [--files N]
+        [--workers N] [--latency_ms MS]
+"""
+
+import argparse
+import functools
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+from unittest.mock import patch
+
+from clifs.utils_fs import scan_tree
+
+
+def get_paths_glob(
+    dir_source: Path, filterstring: Optional[str] = None, recursive: bool = False
+) -> Tuple[List[Path], List[Path]]:
+    pattern_search = f"*{filterstring}*" if filterstring else "*"
+    if recursive:
+        pattern_search = "**/" + pattern_search
+    files = []
+    dirs = []
+    for path in dir_source.glob(pattern_search):
+        if path.is_dir():
+            dirs.append(path.resolve())
+        else:
+            files.append(path.resolve())
+    return files, dirs
+
+
+def get_paths_workers(
+    dir_source: Path,
+    filterstring: Optional[str] = None,
+    recursive: bool = False,
+    workers: int = 1,
+) -> Tuple[List[Path], List[Path]]:
+    files = []
+    dirs = []
+    for entry in scan_tree(str(dir_source.resolve()), recursive, workers=workers):
+        if not filterstring or filterstring in entry.name:
+            if entry.is_dir():
+                dirs.append(Path(entry.path))
+            else:
+                files.append(Path(entry.path))
+    return files, dirs
+
+
+def scandir_delayed(path: Any, latency: float, scandir: Callable[..., Any]) -> Any:
+    time.sleep(latency)
+    return scandir(path)
+
+
+def create_tree(root: Path, num_dirs: int, num_files: int) -> None:
+    for idx_dir in range(num_dirs):
+        # nest directories a few levels deep
+        path_dir = root / f"level_{idx_dir % 5}" / f"dir_{idx_dir}"
+        path_dir.mkdir(parents=True)
+        for idx_file in range(num_files):
+            suffix = ".txt" if idx_file % 2 else ".log"
+            (path_dir / f"file_{idx_file}{suffix}").touch()
+
+
+def time_run(
+    get_paths: Callable[..., Tuple[List[Path], List[Path]]],
+    root: Path,
+    filterstring: Optional[str],
+    runs: int,
+) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        time_start = time.perf_counter()
+        get_paths(root, filterstring=filterstring, recursive=True)
+        timings.append(time.perf_counter() - time_start)
+    return timings
+
+
+def report(label: str, timings: List[float]) -> None:
+    print(
+        f"{label:45} mean: {statistics.mean(timings) * 1000:7.1f} ms    "
+        f"min: {min(timings) * 1000:7.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5, help="Runs per scenario.")
+    parser.add_argument("--dirs", type=int, default=500, help="Number of dirs.")
+    parser.add_argument("--files", type=int, default=100, help="Files per dir.")
+    parser.add_argument("--workers", type=int, default=8, help="Scan workers.")
+    parser.add_argument(
+        "--latency_ms", type=float, default=0, help="Delay per directory listing."
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir_tmp, patch(
+        "os.scandir",
+        functools.partial(
+            scandir_delayed, latency=args.latency_ms / 1000, scandir=os.scandir
+        ),
+    ):
+        root = Path(dir_tmp)
+        create_tree(root, args.dirs, args.files)
+        for filterstring in [None, ".txt"]:
+            if get_paths_glob(root, filterstring, recursive=True) != (
+                get_paths_workers(root, filterstring, recursive=True)
+            ):
+                raise RuntimeError("Walkers do not find the same paths.")
+            label = f"filterstring={filterstring!r}"
+            report(
+                f"glob ({label})",
+                time_run(get_paths_glob, root, filterstring, args.runs),
+            )
+            report(
+                f"scandir ({label})",
+                time_run(get_paths_workers, root, filterstring, args.runs),
+            )
+            report(
+                f"scandir {args.workers} workers ({label})",
+                time_run(
+                    functools.partial(get_paths_workers, workers=args.workers),
+                    root,
+                    filterstring,
+                    args.runs,
+                ),
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark the start-up time of the clifs command line interface.
+
+Compares running a single plugin with lazy plugin loading against loading all
+installed plugins up front as clifs used to do.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+CODE_LAZY = "from clifs.__main__ import main; main()"
+CODE_EAGER = (
+    "from clifs.__main__ import main\n"
+    "from clifs.utils_plugins import get_plugin_entry_points\n"
+    "for entry_point in get_plugin_entry_points().values():\n"
+    "    entry_point.load()\n"
+    "main()"
+)
+
+
+def time_run(code: str, argv: List[str], runs: int) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        time_start = time.perf_counter()
+        subprocess.run(  # noqa: S603
+            [sys.executable, "-c", code, *argv],
+            check=False,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - time_start)
+    return timings
+
+
+def report(label: str, timings: List[float]) -> None:
+    print(
+        f"{label:35} mean: {statistics.mean(timings) * 1000:7.1f} ms    "
+        f"min: {min(timings) * 1000:7.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20, help="Runs per scenario.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir_tmp:
+        scenarios = {
+            "du (lazy)": (CODE_LAZY, ["du", dir_tmp]),
+            "du (all plugins loaded)": (CODE_EAGER, ["du", dir_tmp]),
+            "del -sp (lazy)": (CODE_LAZY, ["del", dir_tmp, "-sp"]),
+            "del -sp (all plugins loaded)": (CODE_EAGER, ["del", dir_tmp, "-sp"]),
+            "--help": (CODE_LAZY, ["--help"]),
+        }
+        for label, (code, argv) in scenarios.items():
+            report(label, time_run(code, argv, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark the memory taken by selected paths.
+
+Compares lists of `pathlib.Path` objects as returned by `get_paths()` against the
+column-oriented `PathTable`. Entries are generated in memory, so no files are
+created.
+
+Usage:
+    python benchmarks/bench_table.py [--dirs N] [--files N]
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Iterator, List
+
+from clifs.utils_table import PathTable
+
+ROOT = os.path.join(os.sep, "data", "projects")
+
+
+class FakeEntry:
+    __slots__ = ("name", "path")
+
+    def __init__(self, dir_parent: str, name: str) -> None:
+        self.name = name
+        self.path = os.path.join(dir_parent, name)
+
+    def is_dir(self) -> bool:
+        return False
+
+
+def iter_entries(num_dirs: int, num_files: int) -> Iterator[FakeEntry]:
+    for idx_dir in range(num_dirs):
+        dir_parent = os.path.join(ROOT, f"level_{idx_dir % 5}", f"dir_{idx_dir}")
+        for idx_file in range(num_files):
+            yield FakeEntry(dir_parent, f"file_{idx_file}.txt")
+
+
+def measure(label: str, build: Callable[[], Any]) -> None:
+    tracemalloc.start()
+    time_start = time.perf_counter()
+    result = build()
+    duration = time.perf_counter() - time_start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:30} {size / 2**20:8.1f} MiB    {duration * 1000:8.1f} ms")
+    del result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dirs", type=int, default=1000, help="Number of dirs.")
+    parser.add_argument("--files", type=int, default=1000, help="Files per dir.")
+    args = parser.parse_args()
+
+    def build_paths() -> List[Path]:
+        return [Path(entry.path) for entry in iter_entries(args.dirs, args.files)]
+
+    def build_table() -> PathTable:
+        table = PathTable()
+        table.extend(iter_entries(args.dirs, args.files))
+        return table
+
+    print(f"{args.dirs * args.files} paths")
+    measure("list of paths", build_paths)
+    measure("table", build_table)
+
+
+if __name__ == "__main__":
+    main()
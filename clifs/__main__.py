@@ -1,18 +1,66 @@
 """Main entry point calling plugins"""
 
 import argparse
+import os
 import sys
-from importlib.metadata import entry_points
-from typing import Dict, Type
+from pathlib import Path
+from typing import List, Optional, Type
 
 import clifs
 from clifs import ClifsPlugin
-from clifs.utils_cli import CONSOLE, ClifsHelpFormatter
+from clifs.utils_cli import ClifsHelpFormatter, get_console
+from clifs.utils_plugins import PluginInfo, get_plugin_manifest, load_plugin
+from clifs.utils_serve import ENV_SOCKET, forward_to_server
 
 
-def main() -> None:
-    """Main entry point calling plugins installed as 'clifs.plugins'"""
+def get_selected_plugin(argv: List[str]) -> Optional[str]:
+    """Get the name of the plugin selected in the command line arguments.
+
+    The main parser has flags only, so the first positional argument is the plugin.
+
+    :param argv: Command line arguments without the program name
+    :return: Name of the selected plugin or None if no plugin is selected
+    """
+    for arg in argv:
+        if not arg.startswith("-"):
+            return arg
+    return None
+
+
+def add_plugin_parser(
+    commands: "argparse._SubParsersAction[argparse.ArgumentParser]",
+    name: str,
+    info: PluginInfo,
+    plugin: Optional[Type[ClifsPlugin]] = None,
+) -> None:
+    """Add a sub-parser for a plugin.
+
+    :param commands: Sub-parsers of the main parser
+    :param name: Name of the plugin
+    :param info: Plugin info providing the help texts
+    :param plugin: Plugin class. If given, the plugin arguments are added to the
+        sub-parser. Defaults to None
+    """
+    subparser = commands.add_parser(
+        name,
+        help=info.summary,
+        description=info.description,
+        formatter_class=ClifsHelpFormatter,
+    )
+    if plugin is not None:
+        plugin.init_parser(parser=subparser)
+
+
+def run_command(argv: List[str]) -> None:
+    """Run a clifs command in this process.
+
+    Only the plugin selected in the command line is loaded. The plugin overview is
+    built from the cached plugin manifest without loading any plugin.
+
+    :param argv: Command line arguments without the program name
+    """
     parser = argparse.ArgumentParser(
+        prog="clifs",
         formatter_class=ClifsHelpFormatter,
         description="Multi-platform command line interface for file system operations.",
     )
@@ -26,39 +74,50 @@ def main() -> None:
 
     commands = parser.add_subparsers(title="Available plugins", dest="plugin")
 
-    plugins: Dict[str, Type[ClifsPlugin]] = {}
+    manifest = get_plugin_manifest()
+    plugin_selected = get_selected_plugin(argv)
 
-    # depending on Python version 'entry_points' returns a dict or 'EntryPoints' object
-    if sys.version_info < (3, 10):
-        plugin_entry_points = entry_points()["clifs.plugins"]
+    plugin: Optional[Type[ClifsPlugin]] = None
+    if plugin_selected is not None and plugin_selected in manifest:
+        plugin = load_plugin(plugin_selected, manifest[plugin_selected])
+        add_plugin_parser(commands, plugin_selected, manifest[plugin_selected], plugin)
     else:
-        plugin_entry_points = entry_points().select(group="clifs.plugins")
-
-    for entry_point in plugin_entry_points:
-        plugins[entry_point.name] = entry_point.load()
-        subparser = commands.add_parser(
-            entry_point.name,
-            help=getattr(plugins[entry_point.name], "plugin_summary", None)
-            or plugins[entry_point.name].__doc__,
-            description=getattr(plugins[entry_point.name], "plugin_description", None)
-            or getattr(plugins[entry_point.name], "plugin_summary", None)
-            or plugins[entry_point.name].__doc__,
-            formatter_class=ClifsHelpFormatter,
-        )
-        plugins[entry_point.name].init_parser(parser=subparser)
-
-    if len(sys.argv) == 1:
+        # no or unknown plugin selected, add all plugins for the overview
+        for name, info in manifest.items():
+            add_plugin_parser(commands, name, info)
+
+    if not argv:
         print("No function specified. Have a look at the awesome options:")
         parser.print_help()
         sys.exit(1)
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     if args.version:
-        CONSOLE.print(f"clifs {clifs.__version__}")
+        get_console().print(f"clifs {clifs.__version__}")
         if args.plugin is None:
             sys.exit(0)
-    plugin = plugins[args.plugin](args)
-    plugin.run()
+    if plugin is not None:
+        plugin(args).run()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Main entry point calling plugins installed as 'clifs.plugins'
+
+    If the environment variable 'CLIFS_SOCKET' points to the socket of a running
+    `clifs serve` process, the command is forwarded to it.
+
+    :param argv: Command line arguments without the program name,
+        defaults to `sys.argv[1:]`
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if os.environ.get(ENV_SOCKET) and get_selected_plugin(argv) not in (None, "serve"):
+        exit_code = forward_to_server(Path(os.environ[ENV_SOCKET]), argv)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    run_command(argv)
 
 
 if __name__ == "__main__":
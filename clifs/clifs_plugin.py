@@ -4,7 +4,7 @@ from abc import ABC, abstractmethod
 from argparse import ArgumentParser, Namespace
 from typing import Optional
 
-from clifs.utils_cli import CONSOLE
+from clifs.utils_cli import ConsoleType, get_console
 
 
 class ClifsPlugin(ABC):
@@ -22,6 +22,8 @@ class ClifsPlugin(ABC):
     # which, if not set, defaults to 'plugin_summary'
     plugin_description: Optional[str] = None
 
+    console: ConsoleType
+
     @staticmethod
     @abstractmethod
     def init_parser(parser: ArgumentParser) -> None:
@@ -36,7 +38,7 @@ class ClifsPlugin(ABC):
         """
         for arg in vars(args):
             setattr(self, arg, getattr(args, arg))
-        self.console = CONSOLE
+        self.console = get_console()
 
     @abstractmethod
     def run(self) -> None:
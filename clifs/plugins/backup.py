@@ -1,26 +1,71 @@
 """Clifs plugin to create data backups"""
 
+# pylint: disable=too-many-lines
+
 import csv
+import functools
+import gzip
+import hashlib
+import heapq
+import json
+import os
+import re
 import shutil
 import sys
 import time
 from argparse import ArgumentParser, Namespace
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from itertools import chain
 from pathlib import Path
-from typing import Dict, List, NamedTuple, Optional, Tuple
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
+from rich.console import Console
 from rich.live import Live
 from rich.panel import Panel
-from rich.progress import Progress, TaskID
+from rich.progress import BarColumn, Progress, TaskID, TaskProgressColumn
 from rich.table import Table
 
 from clifs import ClifsPlugin
+from clifs.utils_cache import get_cache_dir
 from clifs.utils_cli import (
-    CONSOLE,
     get_count_progress,
     get_last_action_progress,
+    get_rich_console,
     print_line,
     set_style,
 )
+from clifs.utils_copy import fast_copy
+from clifs.utils_fs import INDEX_HELPTEXT, ScanEntry, scan_tree
+from clifs.utils_index import IndexEntry, ScanIndex
+
+T = TypeVar("T")
+
+MANIFEST_VERSION = 2  # listings sorted by tree_key
+SNAPSHOT_FORMAT = "%Y-%m-%d_%H-%M-%S"
+SNAPSHOT_REGEX = re.compile(r"\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}(_\d+)?")
+# counts advanced by the results of the copy actions
+TASKS_ACTIONS = {
+    "adding": "count_files_added",
+    "updating": "count_files_updated",
+    "moving": "count_files_moved",
+    "linking": "count_files_untouched",
+}
 
 
 class DirPair(NamedTuple):
@@ -30,32 +75,113 @@ class DirPair(NamedTuple):
     dest: Path
 
 
-def conditional_copy(
-    path_source: Path, path_dest: Path, dry_run: bool = False
-) -> Optional[str]:
-    """
-    Copy only if dest file does not exist or is older than the source file.
+class TreeEntry(NamedTuple):
+    """File or folder listed for a backup"""
+
+    path: str  # relative to the directory listed
+    is_dir: bool
+    size: int
+    mtime: float
+
+
+class TreeDiff(NamedTuple):
+    """Differences between the listings of a source and a destination directory"""
+
+    added: List[TreeEntry]  # source files missing in the destination
+    updated: List[TreeEntry]  # source files newer than in the destination
+    untouched: List[TreeEntry]  # source files up to date in the destination
+    obsolete: List[TreeEntry]  # destination files and folders missing in the source
+
+
+class CopyResult(NamedTuple):
+    """Outcome of copying a file to the destination"""
+
+    action: str
+    entry: TreeEntry
+    error: Optional[OSError]
+
+
+class Move(NamedTuple):
+    """File moved or renamed in the source, found obsolete in the destination"""
+
+    entry: TreeEntry  # entry in the source
+    path_old: str  # obsolete path in the destination
+
+
+class DeleteItem(NamedTuple):
+    """Top-most obsolete item in the destination"""
+
+    entry: TreeEntry
+    # number of files and folders deleted along with the item, including itself
+    num_files: int
+    num_dirs: int
+
+
+class BackupPlan(NamedTuple):
+    """Work needed to back up a directory pair"""
+
+    dir_source: Path
+    dir_dest: Path  # directory to write to, a new folder for snapshots
+    dir_link: Optional[Path]  # directory to hard-link untouched files from
+    tree_source: List[TreeEntry]
+    tree_dest: List[TreeEntry]
+    diff: TreeDiff
+    moves: List[Move]
+
+
+class PairSummary(NamedTuple):
+    """Outcome of backing up a directory pair"""
+
+    dir_pair: DirPair
+    counts: Dict[str, int]  # number of files per action
+    duration: float
+    status: str = "ok"
+    error: Optional[str] = None  # set if the backup failed
+
+
+def copy_file(
+    path_source: Path,
+    path_dest: Path,
+    dirs_created: Set[Path],
+    path_link: Optional[Path] = None,
+    path_move: Optional[Path] = None,
+) -> None:
     """
-    process = None
-    if not path_dest.exists():
-        process = "adding"
-    elif (path_source.stat().st_mtime - path_dest.stat().st_mtime) > 1:
-        process = "updating"
+    Copy a file including its metadata, creating missing parent directories.
 
-    if process is not None and not dry_run:
+    :param path_source: File to copy
+    :param path_dest: Destination path. Is not expected to be a directory.
+    :param dirs_created: Directories known to exist, updated with created ones
+    :param path_link: Identical file to hard-link instead of copying, e.g. from a
+        previous snapshot. The file is copied if linking fails. Defaults to None.
+    :param path_move: Identical file to move instead of copying, e.g. an obsolete
+        file in the destination. The file is copied if moving fails. Defaults to None.
+    """
+    if path_dest.parent not in dirs_created:
         path_dest.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(path_source, path_dest)
-    return process
+        dirs_created.add(path_dest.parent)
+    if path_link is not None:
+        try:
+            os.link(path_link, path_dest)
+            return
+        except OSError:  # e.g. too many links or no hard links on the file system
+            pass
+    if path_move is not None:
+        try:
+            os.replace(path_move, path_dest)
+            return
+        except OSError:  # e.g. removed in the meantime
+            pass
+    fast_copy(path_source, path_dest)
 
 
-def conditional_delete(
-    path_source: Path, path_dest: Path, list_source: List[Path], dry_run: bool = False
-) -> int:
+def conditional_delete(path_dest: Path, dry_run: bool = False) -> int:
     """
-    Delete only if `path_source` is not in `list_source`.
+    Delete a file or a folder along with everything below it, if it still exists.
+    Symbolic links are deleted, not their targets.
     """
-    if path_source not in list_source and path_dest.exists():
-        if path_dest.is_dir():
+    if os.path.lexists(path_dest):
+        if path_dest.is_dir() and not path_dest.is_symlink():
             if not dry_run:
                 shutil.rmtree(str(path_dest))
         else:
@@ -65,21 +191,412 @@ def conditional_delete(
     return 0
 
 
-def list_filedirs(dir_source: Path) -> Tuple[List[Path], List[Path]]:
+def hash_file(path: Path) -> bytes:
+    """Get a hash of the content of a file.
+
+    :param path: File to hash
+    :return: Digest of the content
+    """
+    hasher = hashlib.blake2b()
+    with path.open("rb") as file:
+        for chunk in iter(functools.partial(file.read, 2**20), b""):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
+def detect_moves(
+    diff: TreeDiff, dir_source: Path, dir_dest: Path, compare_hash: bool = False
+) -> Tuple[TreeDiff, List[Move]]:
     """
-    List files and directories in a source dir.
+    Find added files which were probably moved or renamed in the source, as files of
+    the same size and modification time are obsolete in the destination.
+
+    Obsolete files of the same name are preferred among several candidates. Unless
+    contents are compared, files sharing size and modification time by chance are
+    taken for moved.
+
+    :param diff: Differences of source and destination directory
+    :param dir_source: Source directory
+    :param dir_dest: Destination directory
+    :param compare_hash: Compare the contents of candidates by their hashes,
+        defaults to False
+    :return: Differences without the moved files and the moves found
+    """
+    # obsolete files by size and modification time in whole seconds
+    candidates: Dict[Tuple[int, int], List[TreeEntry]] = {}
+    for entry in diff.obsolete:
+        if not entry.is_dir and entry.size:
+            candidates.setdefault((entry.size, int(entry.mtime)), []).append(entry)
+    if not candidates:
+        return diff, []
+
+    added, moves = [], []
+    for entry in diff.added:
+        matches = [
+            candidate
+            for seconds in (
+                int(entry.mtime) - 1,
+                int(entry.mtime),
+                int(entry.mtime) + 1,
+            )
+            for candidate in candidates.get((entry.size, seconds), [])
+            if abs(candidate.mtime - entry.mtime) <= 1
+        ]
+        # prefer candidates of the same name
+        name = os.path.basename(entry.path)
+        matches = [
+            candidate
+            for same_name in (True, False)
+            for candidate in matches
+            if (os.path.basename(candidate.path) == name) == same_name
+        ]
+        if compare_hash and matches:
+            try:
+                digest = hash_file(dir_source / entry.path)
+                # hash candidates only until one matches
+                matches = [
+                    next(
+                        candidate
+                        for candidate in matches
+                        if hash_file(dir_dest / candidate.path) == digest
+                    )
+                ]
+            except (OSError, StopIteration):
+                matches = []
+        if not matches:
+            added.append(entry)
+            continue
+        candidates[(matches[0].size, int(matches[0].mtime))].remove(matches[0])
+        moves.append(Move(entry, matches[0].path))
+
+    paths_moved = {move.path_old for move in moves}
+    return (
+        TreeDiff(
+            added,
+            diff.updated,
+            diff.untouched,
+            [entry for entry in diff.obsolete if entry.path not in paths_moved],
+        ),
+        moves,
+    )
+
+
+def plan_deletion(obsolete: List[TreeEntry]) -> List[DeleteItem]:
+    """
+    Collapse obsolete items to the top-most ones, so each obsolete folder is deleted
+    at once along with everything below it.
+
+    :param obsolete: Obsolete items sorted by path, including the items below obsolete
+        folders, as found by `diff_trees`
+    :return: Top-most obsolete items with the number of files and folders deleted
+        along with them
     """
+    tops: List[TreeEntry] = []
+    counts: List[List[int]] = []
+    # index of the top-most item per obsolete folder, parents are listed before
+    # their children
+    idx_top: Dict[str, int] = {}
+    for entry in obsolete:
+        idx = idx_top.get(os.path.dirname(entry.path))
+        if idx is None:
+            idx = len(tops)
+            tops.append(entry)
+            counts.append([0, 0])
+        counts[idx][entry.is_dir] += 1
+        if entry.is_dir:
+            idx_top[entry.path] = idx
+    return [
+        DeleteItem(entry, num_files, num_dirs)
+        for entry, (num_files, num_dirs) in zip(tops, counts)
+    ]
 
-    list_files = []
-    list_dirs = []
 
-    for cur_file in dir_source.rglob("*"):
-        if cur_file.is_dir():
-            list_dirs.append(cur_file)
+def tree_key(entry: TreeEntry) -> str:
+    """Get the key listings are sorted and compared by, ignoring the case of paths
+    on file systems which do so.
+
+    :param entry: Entry of a listing
+    :return: Key of the entry
+    """
+    return os.path.normcase(entry.path)
+
+
+def list_tree(root: Path, workers: int = 1, use_index: bool = False) -> List[TreeEntry]:
+    """
+    List all files and folders in a directory along with size and modification time.
+
+    Each file is stat'ed once, unless the stat result comes with the directory
+    listing anyway like on Windows. Stat results of the scan index can be outdated,
+    so files are stat'ed with the index as well.
+
+    :param root: Directory to list
+    :param workers: Number of threads listing directories, defaults to 1
+    :param use_index: Use the persistent scan index, defaults to False
+    :return: Entries sorted by `tree_key` of their path relative to the root, empty
+        if the root does not exist
+    """
+    if not root.is_dir():
+        return []
+    len_root = len(os.path.join(str(root), ""))
+    entries: Iterator[ScanEntry] = (
+        ScanIndex().walk(str(root), recursive=True)
+        if use_index
+        else scan_tree(str(root), recursive=True, workers=workers)
+    )
+    tree = []
+    for entry in entries:
+        if entry.is_dir():
+            tree.append(TreeEntry(entry.path[len_root:], True, 0, 0.0))
+            continue
+        try:
+            if isinstance(entry, IndexEntry) and not entry.refresh():
+                continue
+            stat = entry.stat()
+        except OSError:  # broken symbolic link or removed in the meantime
+            continue
+        tree.append(
+            TreeEntry(entry.path[len_root:], False, stat.st_size, stat.st_mtime)
+        )
+    tree.sort(key=tree_key)
+    return tree
+
+
+def diff_trees(tree_source: List[TreeEntry], tree_dest: List[TreeEntry]) -> TreeDiff:
+    """Compare the listings of a source and a destination directory.
+
+    Walks both sorted listings in lockstep, so it takes linear time. Paths are
+    compared by `tree_key`, so renaming an item by case only does not make it
+    obsolete on file systems ignoring case. A file is considered outdated if it was
+    modified more than a second before its source.
+    Items changing between file and folder are considered obsolete in the
+    destination and added from the source.
+
+    :param tree_source: Listing of the source directory as returned by `list_tree`
+    :param tree_dest: Listing of the destination directory as returned by `list_tree`
+    :return: Differences of the directories
+    """
+    diff = TreeDiff([], [], [], [])
+    keys_source = [tree_key(entry) for entry in tree_source]
+    keys_dest = [tree_key(entry) for entry in tree_dest]
+    idx_source = idx_dest = 0
+    num_source, num_dest = len(tree_source), len(tree_dest)
+    while idx_source < num_source or idx_dest < num_dest:
+        if idx_dest == num_dest or (
+            idx_source < num_source and keys_source[idx_source] < keys_dest[idx_dest]
+        ):
+            entry_source = tree_source[idx_source]
+            if not entry_source.is_dir:
+                diff.added.append(entry_source)
+            idx_source += 1
+        elif idx_source == num_source or keys_dest[idx_dest] < keys_source[idx_source]:
+            diff.obsolete.append(tree_dest[idx_dest])
+            idx_dest += 1
         else:
-            list_files.append(cur_file)
+            entry_source = tree_source[idx_source]
+            entry_dest = tree_dest[idx_dest]
+            if entry_source.is_dir != entry_dest.is_dir:
+                diff.obsolete.append(entry_dest)
+                if not entry_source.is_dir:
+                    diff.added.append(entry_source)
+            elif not entry_source.is_dir:
+                if entry_source.mtime - entry_dest.mtime > 1:
+                    diff.updated.append(entry_source)
+                else:
+                    diff.untouched.append(entry_source)
+            idx_source += 1
+            idx_dest += 1
+    return diff
+
+
+def check_dest(diff: TreeDiff, dir_dest: Path) -> TreeDiff:
+    """
+    Check the files to copy according to a diff against a backup manifest on the
+    destination, which might already be up to date, e.g. after an interrupted run.
+
+    :param diff: Differences of the source directory and the backup manifest
+    :param dir_dest: Destination directory
+    :return: Differences with the added and updated files checked on the destination
+    """
+    checked = TreeDiff([], [], list(diff.untouched), diff.obsolete)
+    for entry in chain(diff.added, diff.updated):
+        try:
+            mtime_dest = os.stat(dir_dest / entry.path).st_mtime
+        except OSError:
+            checked.added.append(entry)
+            continue
+        if entry.mtime - mtime_dest > 1:
+            checked.updated.append(entry)
+        else:
+            checked.untouched.append(entry)
+    return checked
+
+
+def merge_trees(tree: List[TreeEntry], tree_other: List[TreeEntry]) -> List[TreeEntry]:
+    """
+    Merge two sorted listings, preferring the entries of the first one.
+
+    :param tree: Sorted listing
+    :param tree_other: Sorted listing, entries with paths in `tree` being dropped
+    :return: Sorted listing
+    """
+    merged: List[TreeEntry] = []
+    for entry in heapq.merge(tree, tree_other, key=tree_key):
+        if not merged or tree_key(merged[-1]) != tree_key(entry):
+            merged.append(entry)
+    return merged
+
+
+def get_latest_snapshot(dir_dest: Path) -> Optional[Path]:
+    """Get the latest snapshot in a destination directory.
+
+    :param dir_dest: Destination directory holding the snapshots
+    :return: Path of the latest snapshot or None if there is none
+    """
+    try:
+        with os.scandir(dir_dest) as entries:
+            names = [
+                entry.name
+                for entry in entries
+                if SNAPSHOT_REGEX.fullmatch(entry.name) and entry.is_dir()
+            ]
+    except OSError:
+        return None
+    if not names:
+        return None
+    # the date format sorts chronologically, suffixes of equal dates by their number
+    return dir_dest / max(names, key=lambda name: (name[:19], len(name), name))
+
+
+def get_new_snapshot(dir_dest: Path) -> Path:
+    """Get the path of a new snapshot in a destination directory named by the time.
+
+    :param dir_dest: Destination directory holding the snapshots
+    :return: Path of the new snapshot, not existing yet
+    """
+    name = time.strftime(SNAPSHOT_FORMAT)
+    path_snapshot = dir_dest / name
+    num = 1
+    while path_snapshot.exists():
+        path_snapshot = dir_dest / f"{name}_{num}"
+        num += 1
+    return path_snapshot
+
+
+def get_manifest_path(dir_source: Path, dir_dest: Path) -> Path:
+    """Get the path of the backup manifest of a directory pair.
+
+    :param dir_source: Source directory
+    :param dir_dest: Destination directory
+    :return: Path to the backup manifest
+    """
+    pair_id = hashlib.sha256(
+        f"{os.path.abspath(dir_source)}\0{os.path.abspath(dir_dest)}".encode()
+    ).hexdigest()[:16]
+    return get_cache_dir() / "backup_manifests" / f"{pair_id}.json.gz"
+
+
+def read_manifest(
+    path_manifest: Path, dir_source: Path, dir_dest: Path
+) -> Optional[List[TreeEntry]]:
+    """Read the backup manifest of a directory pair.
+
+    :param path_manifest: Path to the manifest
+    :param dir_source: Source directory
+    :param dir_dest: Destination directory
+    :return: Listing of the destination directory as of the last backup, or None if
+        the manifest does not exist or belongs to a different directory pair
+    """
+    try:
+        with gzip.open(path_manifest, "rt", encoding="utf-8") as manifest_file:
+            content = json.load(manifest_file)
+        if content["version"] != MANIFEST_VERSION or [
+            content["source"],
+            content["dest"],
+        ] != [os.path.abspath(dir_source), os.path.abspath(dir_dest)]:
+            return None
+        return [TreeEntry(*entry) for entry in content["entries"]]
+    except (OSError, EOFError, ValueError, KeyError, TypeError):
+        return None
+
 
-    return list_files, list_dirs
+def write_manifest(
+    path_manifest: Path, dir_source: Path, dir_dest: Path, tree: List[TreeEntry]
+) -> None:
+    """Write the backup manifest of a directory pair. Failing to do so is not
+    considered an error.
+
+    :param path_manifest: Path to the manifest
+    :param dir_source: Source directory
+    :param dir_dest: Destination directory
+    :param tree: Sorted listing of the destination directory
+    """
+    content = {
+        "version": MANIFEST_VERSION,
+        "source": os.path.abspath(dir_source),
+        "dest": os.path.abspath(dir_dest),
+        "entries": tree,
+    }
+    path_tmp = path_manifest.with_name(f"{path_manifest.name}.{os.getpid()}.tmp")
+    try:
+        path_manifest.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path_tmp, "wt", encoding="utf-8") as manifest_file:
+            json.dump(content, manifest_file, separators=(",", ":"))
+        os.replace(path_tmp, path_manifest)
+    except OSError:
+        path_tmp.unlink(missing_ok=True)
+
+
+def get_device(path: Path) -> int:
+    """Get the device of a path, or of its closest existing parent.
+
+    :param path: Path
+    :return: Device id, -1 if no parent exists
+    """
+    for path_existing in (path, *path.parents):
+        try:
+            return os.stat(path_existing).st_dev
+        except OSError:
+            continue
+    return -1
+
+
+def run_limited(
+    jobs: List[Callable[[], T]],
+    devices: List[Set[int]],
+    workers: int,
+    device_limit: int,
+) -> Iterator[Tuple[int, T]]:
+    """
+    Run jobs on a pool of threads, limiting the number of jobs using a device at a
+    time. Jobs waiting for a device do not block a thread, later jobs using other
+    devices are started first.
+
+    :param jobs: Jobs to run
+    :param devices: Devices used by each job
+    :param workers: Maximal number of jobs running at a time
+    :param device_limit: Maximal number of jobs using the same device at a time
+    :yield: Index and result of the jobs in the order they finish
+    """
+    workers, device_limit = max(workers, 1), max(device_limit, 1)
+    pending = list(range(len(jobs)))
+    usage: Dict[int, int] = {}
+    running: Dict[Future[T], int] = {}
+    with ThreadPoolExecutor(workers) as pool:
+        while pending or running:
+            for idx in list(pending):
+                if len(running) >= workers:
+                    break
+                if all(usage.get(dev, 0) < device_limit for dev in devices[idx]):
+                    pending.remove(idx)
+                    for dev in devices[idx]:
+                        usage[dev] = usage.get(dev, 0) + 1
+                    running[pool.submit(jobs[idx])] = idx
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx = running.pop(future)
+                for dev in devices[idx]:
+                    usage[dev] -= 1
+                yield idx, future.result()
 
 
 class FileSaver(ClifsPlugin):
@@ -88,12 +605,22 @@ class FileSaver(ClifsPlugin):
     """
 
     plugin_description = "Create backups from folders."
+    console: Console
     dir_source: Optional[Path]
     dir_dest: Optional[Path]
     cfg_file: Optional[Path]
     delete: bool
     verbose: bool
     dry_run: bool
+    scan_workers: int
+    use_index: bool
+    workers: int
+    verify_dest: bool
+    snapshot: bool
+    pair_workers: int
+    device_limit: int
+    detect_moves: bool
+    hash_moves: bool
 
     @staticmethod
     def init_parser(parser: ArgumentParser) -> None:
@@ -142,10 +669,91 @@ class FileSaver(ClifsPlugin):
             default=False,
             help="Do not touch anything.",
         )
+        parser.add_argument(
+            "-sw",
+            "--scan_workers",
+            type=int,
+            default=1,
+            help="Number of threads reading directories in parallel. Speeds up the "
+            "scan on file systems with a high latency like network shares.",
+        )
+        parser.add_argument(
+            "-idx",
+            "--use_index",
+            action="store_true",
+            default=False,
+            help="Use the scan index in the clifs cache directory to list the "
+            f"source and destination directories. {INDEX_HELPTEXT}",
+        )
+        parser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of threads copying files in parallel. Speeds up backups of "
+            "many small files, especially to network shares.",
+        )
+        parser.add_argument(
+            "-vd",
+            "--verify_dest",
+            action="store_true",
+            default=False,
+            help="List the whole destination directory instead of trusting the "
+            "manifest of the last backup in the clifs cache directory. Use this if "
+            "the destination was changed by other means than 'clifs backup'.",
+        )
+        parser.add_argument(
+            "-snap",
+            "--snapshot",
+            action="store_true",
+            default=False,
+            help="Back up into a new folder named by the current time in the "
+            "destination directory. Files unchanged since the latest snapshot are "
+            "hard-linked from it instead of being copied, so each snapshot shows the "
+            "complete source while taking space for the changed files only.",
+        )
+        parser.add_argument(
+            "-pw",
+            "--pair_workers",
+            type=int,
+            default=1,
+            help="Number of directory pairs from the config file backed up at the "
+            "same time, showing a combined progress and a summary per pair.",
+        )
+        parser.add_argument(
+            "-dm",
+            "--detect_moves",
+            action="store_true",
+            default=False,
+            help="Detect files moved or renamed in the source, by obsolete files of "
+            "the same size and modification time in the destination, and move them "
+            "within the destination instead of copying them again. Files of the same "
+            "name are preferred among several candidates. Requires '--delete' or "
+            "'--snapshot', moved files being hard-linked from the latest snapshot.",
+        )
+        parser.add_argument(
+            "-hm",
+            "--hash_moves",
+            action="store_true",
+            default=False,
+            help="Like '--detect_moves', but also compare the contents of moved files "
+            "by their hashes. Safer, but reads the candidates in full.",
+        )
+        parser.add_argument(
+            "-dl",
+            "--device_limit",
+            type=int,
+            default=1,
+            help="Maximal number of directory pairs backed up at the same time which "
+            "share a device, as source or destination. Keeps concurrent pairs from "
+            "thrashing a disk.",
+        )
 
     def __init__(self, args: Namespace) -> None:
         super().__init__(args)
-        self.console = CONSOLE
+        self.console = get_rich_console()
+        self.files_failed = 0
+        self.pairs_failed = 0
 
         if self.cfg_file and self.dir_source or self.cfg_file and self.dir_dest:
             self.console.print(
@@ -160,6 +768,19 @@ class FileSaver(ClifsPlugin):
                 "Run 'clifs backup --help' for available options."
             )
             sys.exit(0)
+        if self.snapshot and self.delete:
+            self.console.print(
+                "Snapshots only contain the files present in the source, there is "
+                "nothing to delete. Please choose either '--snapshot' or '--delete'."
+            )
+            sys.exit(0)
+        self.detect_moves = self.detect_moves or self.hash_moves
+        if self.detect_moves and not (self.delete or self.snapshot):
+            self.console.print(
+                "Moved files are only detected along with '--delete' or '--snapshot', "
+                "as otherwise their previous copies are expected to stay."
+            )
+            sys.exit(0)
 
         if self.cfg_file:
             # TODO: check_cfg_format(cfg_file)  # pylint: disable=fixme
@@ -182,10 +803,27 @@ class FileSaver(ClifsPlugin):
         """
         time_start = time.time()
 
-        for dir_pair in self.dir_pairs:
-            self.backup_dir(dir_pair.source, dir_pair.dest)
+        if self.pair_workers > 1 and len(self.dir_pairs) > 1:
+            self.backup_pairs_concurrently()
+        else:
+            for dir_pair in self.dir_pairs:
+                self.backup_dir(dir_pair.source, dir_pair.dest)
         time_end = time.time()
         time_run = (time_end - time_start) / 60
+        problems = []
+        if self.files_failed:
+            problems.append(f"{self.files_failed} files could not be copied")
+        if self.pairs_failed:
+            problems.append(f"{self.pairs_failed} directory pairs failed")
+        if problems:
+            self.console.print(
+                set_style(
+                    f"Backup finished in {time_run:5.2f} minutes, but "
+                    f"{' and '.join(problems)}.",
+                    "error",
+                )
+            )
+            sys.exit(1)
         self.console.print(
             f"Hurray! All files backed up in only {time_run:5.2f} minutes"
         )
@@ -206,9 +844,15 @@ class FileSaver(ClifsPlugin):
             "count_files_updated": progress["counts"].add_task(
                 "Files updated:", total=None
             ),
+            "count_files_moved": progress["counts"].add_task(
+                "Files moved:", total=None
+            ),
             "count_files_untouched": progress["counts"].add_task(
                 "Files untouched:", total=None
             ),
+            "count_files_failed": progress["counts"].add_task(
+                "Files failed:", total=None
+            ),
         }
 
     def get_delete_tasks(
@@ -259,33 +903,303 @@ class FileSaver(ClifsPlugin):
             )
             return
 
-        files_source, dirs_source = list_filedirs(dir_source)
-        self.copy_data(
-            dir_source=dir_source,
-            dir_dest=dir_dest,
-            files_source=files_source,
-        )
+        plan = self.plan_backup(dir_source, dir_dest)
+        if self.snapshot:
+            self.console.print(
+                f"Snapshot: {plan.dir_dest.name}, linking unchanged files from "
+                + (plan.dir_link.name if plan.dir_link else "no previous snapshot")
+            )
+        if plan.moves:
+            self.console.print(f"Found {len(plan.moves)} moved files.")
+        files_failed = self.copy_data(plan)
 
         if self.delete:
             self.console.print("All files stored, checking for files to delete now.")
 
             self.delete_obsolete_data(
-                dir_source=dir_source,
-                dir_dest=dir_dest,
-                files_source=files_source,
-                dirs_source=dirs_source,
+                dir_dest=plan.dir_dest, diff=plan.diff, tree_dest=plan.tree_dest
             )
+        self.write_backup_manifest(plan, files_failed)
         print_line(console=self.console)
 
-    def copy_data(
-        self, dir_source: Path, dir_dest: Path, files_source: List[Path]
+    def plan_backup(self, dir_source: Path, dir_dest: Path) -> BackupPlan:
+        """
+        List the source and compare it with the last backup in the destination.
+
+        :param dir_source: Source directory
+        :param dir_dest: Destination directory
+        :return: Work needed to back up the directory pair
+        """
+        # directory holding the files of the last backup
+        dir_last: Optional[Path] = dir_dest
+        if self.snapshot:
+            dir_last = get_latest_snapshot(dir_dest)
+            dir_dest = get_new_snapshot(dir_dest)
+        tree_source = list_tree(dir_source, self.scan_workers, self.use_index)
+        tree_dest, diff = self.diff_dest(tree_source, dir_source, dir_last)
+        moves: List[Move] = []
+        if self.detect_moves and dir_last is not None:
+            diff, moves = detect_moves(diff, dir_source, dir_last, self.hash_moves)
+        return BackupPlan(
+            dir_source,
+            dir_dest,
+            dir_last if self.snapshot else None,
+            tree_source,
+            tree_dest,
+            diff,
+            moves,
+        )
+
+    def write_backup_manifest(self, plan: BackupPlan, files_failed: Set[str]) -> None:
+        """
+        Store the manifest of the destination after a backup, unless it is a dry run.
+
+        :param plan: Work done to back up the directory pair
+        :param files_failed: Relative paths of the files which could not be copied
+        """
+        if self.dry_run:
+            return
+        # files are copied with their modification time, so the source listing
+        # describes the destination except for failed copies
+        write_manifest(
+            self.get_manifest_path(plan.dir_source, plan.dir_dest),
+            plan.dir_source,
+            plan.dir_dest,
+            merge_trees(
+                [entry for entry in plan.tree_source if entry.path not in files_failed],
+                [] if self.delete or self.snapshot else plan.diff.obsolete,
+            ),
+        )
+
+    def backup_pairs_concurrently(self) -> None:
+        """
+        Back up the directory pairs on a pool of threads, showing a combined progress
+        and a summary per pair at the end.
+        """
+        progress = Progress(
+            "{task.description}",
+            BarColumn(),
+            TaskProgressColumn(),
+            "{task.fields[status]}",
+            console=self.console,
+        )
+        task_pairs = progress.add_task(
+            "Directory pairs", total=len(self.dir_pairs), status=""
+        )
+        tasks = [
+            progress.add_task(str(dir_pair.source), total=None, status="waiting")
+            for dir_pair in self.dir_pairs
+        ]
+        summaries: List[PairSummary] = []
+        with Live(progress, console=self.console):
+            for _, summary in run_limited(
+                [
+                    functools.partial(self.backup_pair, dir_pair, progress, task)
+                    for dir_pair, task in zip(self.dir_pairs, tasks)
+                ],
+                [
+                    {get_device(dir_pair.source), get_device(dir_pair.dest)}
+                    for dir_pair in self.dir_pairs
+                ],
+                self.pair_workers,
+                self.device_limit,
+            ):
+                summaries.append(summary)
+                progress.advance(task_pairs)
+
+        order = {dir_pair: idx for idx, dir_pair in enumerate(self.dir_pairs)}
+        summaries.sort(key=lambda summary: order[summary.dir_pair])
+        self.files_failed += sum(summary.counts["failed"] for summary in summaries)
+        self.pairs_failed += sum(summary.error is not None for summary in summaries)
+        self.print_summary(summaries)
+
+    def backup_pair(
+        self, dir_pair: DirPair, progress: Progress, task: TaskID
+    ) -> PairSummary:
+        """
+        Back up a directory pair reporting to a progress shared with other pairs.
+
+        :param dir_pair: Directory pair
+        :param progress: Progress shared by all pairs
+        :param task: Progress task of the directory pair
+        :return: Summary of the backup
+        """
+        time_start = time.time()
+        counts = dict.fromkeys((*TASKS_ACTIONS, "failed", "deleted"), 0)
+        if not dir_pair.source.is_dir():
+            progress.update(task, status=set_style("source missing", "warning"))
+            return PairSummary(dir_pair, counts, 0.0, "source missing")
+        try:
+            progress.update(task, status="listing")
+            plan = self.plan_backup(dir_pair.source, dir_pair.dest)
+            diff = plan.diff
+            progress.update(
+                task,
+                total=len(diff.added)
+                + len(diff.updated)
+                + len(diff.untouched)
+                + len(plan.moves),
+                status="copying",
+            )
+            if plan.dir_link is None:
+                counts["linking"] = len(diff.untouched)
+                progress.advance(task, len(diff.untouched))
+            files_failed: Set[str] = set()
+            for result in self.iter_copies(plan):
+                self.report_copy(result, counts, files_failed)
+                progress.advance(task)
+            if self.delete:
+                progress.update(task, status="deleting")
+                counts["deleted"] = sum(
+                    (item.num_files + item.num_dirs)
+                    * conditional_delete(plan.dir_dest / item.entry.path, self.dry_run)
+                    for item in plan_deletion(diff.obsolete)
+                )
+            self.write_backup_manifest(plan, files_failed)
+        except OSError as err:
+            progress.update(task, status=set_style("failed", "error"))
+            return PairSummary(
+                dir_pair, counts, time.time() - time_start, "failed", str(err)
+            )
+        progress.update(task, status="done")
+        return PairSummary(dir_pair, counts, time.time() - time_start)
+
+    def report_copy(
+        self, result: CopyResult, counts: Dict[str, int], files_failed: Set[str]
     ) -> None:
+        """
+        Count the result of a copy and report it if it failed or verbose.
+
+        :param result: Result of the copy
+        :param counts: Number of files per action, updated with the result
+        :param files_failed: Relative paths of the files which could not be copied,
+            updated with the result
+        """
+        name = os.path.basename(result.entry.path)
+        if result.error is not None:
+            counts["failed"] += 1
+            files_failed.add(result.entry.path)
+            self.console.print(
+                set_style(
+                    f"  - {result.action} '{name}' failed: "
+                    f"{result.error.strerror or result.error}",
+                    "error",
+                )
+            )
+        else:
+            counts[result.action] += 1
+            if self.verbose and result.action != "linking":
+                self.console.print(f"  - {result.action} [cyan]'{name}'[/]")
+
+    def print_summary(self, summaries: List[PairSummary]) -> None:
+        """
+        Print a table summarizing the backups of the directory pairs.
+
+        :param summaries: Summaries of the backups
+        """
+        table = Table(title="Summary")
+        table.add_column("Source", overflow="fold")
+        table.add_column("Destination", overflow="fold")
+        for column in (
+            "Added",
+            "Updated",
+            "Moved",
+            "Untouched",
+            "Deleted",
+            "Failed",
+            "Time",
+        ):
+            table.add_column(column, justify="right")
+        table.add_column("Status")
+        for summary in summaries:
+            table.add_row(
+                str(summary.dir_pair.source),
+                str(summary.dir_pair.dest),
+                *(
+                    str(summary.counts[action])
+                    for action in (
+                        "adding",
+                        "updating",
+                        "moving",
+                        "linking",
+                        "deleted",
+                        "failed",
+                    )
+                ),
+                f"{summary.duration:.1f} s",
+                set_style(summary.error, "error")
+                if summary.error
+                else summary.status
+                if summary.status == "ok"
+                else set_style(summary.status, "warning"),
+            )
+        print_line(console=self.console)
+        self.console.print(table)
+
+    def get_manifest_path(self, dir_source: Path, dir_dest: Path) -> Path:
+        """
+        Get the path of the backup manifest of a directory pair. Snapshots of a pair
+        share a single manifest describing the latest one, so manifests do not pile
+        up in the cache as snapshots are taken and removed.
+
+        :param dir_source: Source directory
+        :param dir_dest: Destination directory, the snapshot in snapshot mode
+        :return: Path to the backup manifest
+        """
+        return get_manifest_path(
+            dir_source, dir_dest.parent if self.snapshot else dir_dest
+        )
+
+    def diff_dest(
+        self, tree_source: List[TreeEntry], dir_source: Path, dir_dest: Optional[Path]
+    ) -> Tuple[List[TreeEntry], TreeDiff]:
+        """
+        Compare the source with the destination, as recorded in the manifest of the
+        last backup unless the destination is to be verified.
+
+        :param tree_source: Listing of the source directory
+        :param dir_source: Source directory
+        :param dir_dest: Destination directory, None meaning no destination yet
+        :return: Listing of the destination and differences to the source
+        """
+        if dir_dest is None:
+            return [], diff_trees(tree_source, [])
+        tree_dest = (
+            read_manifest(
+                self.get_manifest_path(dir_source, dir_dest), dir_source, dir_dest
+            )
+            if not self.verify_dest and dir_dest.is_dir()
+            else None
+        )
+        if tree_dest is None:
+            tree_dest = list_tree(dir_dest, self.scan_workers, self.use_index)
+            return tree_dest, diff_trees(tree_source, tree_dest)
+        return tree_dest, check_dest(diff_trees(tree_source, tree_dest), dir_dest)
+
+    def copy_data(self, plan: BackupPlan) -> Set[str]:
+        """
+        Copy the added and updated files to the destination and move the moved ones.
+
+        :param plan: Work needed to back up the directory pair
+        :return: Relative paths of the files which could not be copied
+        """
+        diff = plan.diff
         progress: Dict[str, Progress] = {
             "counts": get_count_progress(),
             "overall": get_last_action_progress(),
         }
 
-        tasks = self.get_backup_tasks(progress, len(files_source))
+        tasks = self.get_backup_tasks(
+            progress,
+            len(diff.added) + len(diff.updated) + len(diff.untouched) + len(plan.moves),
+        )
+        if plan.dir_link is None:
+            # files up to date need no work
+            for task in ("count_files_found", "count_files_untouched"):
+                progress["counts"].advance(tasks[task], len(diff.untouched))
+            progress["overall"].advance(tasks["progress_backup"], len(diff.untouched))
+        files_failed: Set[str] = set()
+        counts = dict.fromkeys((*TASKS_ACTIONS, "failed"), 0)
 
         progress_table = Table.grid()
         progress_table.add_row(
@@ -308,43 +1222,101 @@ class FileSaver(ClifsPlugin):
             console=self.console,
             auto_refresh=False,
         ) as live:
-            for cur_file in files_source:
+            for result in self.iter_copies(plan):
+                self.report_copy(result, counts, files_failed)
                 progress["counts"].advance(tasks["count_files_found"])
-                action = conditional_copy(
-                    cur_file,
-                    Path(str(cur_file).replace(str(dir_source), str(dir_dest))),
-                    dry_run=self.dry_run,
-                )
-                if action:
+                if result.error is not None:
+                    progress["counts"].advance(tasks["count_files_failed"])
+                else:
                     progress["overall"].update(
                         tasks["progress_backup"],
-                        last_action=f"{action} {cur_file.name}",
+                        last_action=f"{result.action} "
+                        f"{os.path.basename(result.entry.path)}",
                     )
-                    if action == "adding":
-                        progress["counts"].advance(tasks["count_files_added"])
-                    elif action == "updating":
-                        progress["counts"].advance(tasks["count_files_updated"])
-                    if self.verbose:
-                        live.console.print(f"  - {action} [cyan]'{cur_file.name}'[/]")
-                else:
-                    progress["counts"].advance(tasks["count_files_untouched"])
+                    progress["counts"].advance(tasks[TASKS_ACTIONS[result.action]])
                 progress["overall"].advance(tasks["progress_backup"])
                 live.refresh()
+        self.files_failed += counts["failed"]
+        return files_failed
+
+    def iter_copies(self, plan: BackupPlan) -> Iterator[CopyResult]:
+        """
+        Copy the added and updated files and move the moved ones, on a pool of
+        threads if several workers are requested. In snapshots, untouched and moved
+        files are hard-linked from the latest snapshot instead. Errors copying a file
+        are reported in its result.
+
+        :param plan: Work needed to back up the directory pair
+        :yield: Results of the copies in the order they finish
+        """
+        dirs_created: Set[Path] = set()
+        dir_link = plan.dir_link
+
+        def copy(action: str, entry: TreeEntry, path_last: Optional[str]) -> CopyResult:
+            # path_last: relative path of the identical file of the last backup
+            try:
+                if not self.dry_run:
+                    copy_file(
+                        plan.dir_source / entry.path,
+                        plan.dir_dest / entry.path,
+                        dirs_created,
+                        dir_link / path_last
+                        if path_last is not None and dir_link is not None
+                        else None,
+                        plan.dir_dest / path_last
+                        if path_last is not None and dir_link is None
+                        else None,
+                    )
+            except OSError as err:
+                return CopyResult(action, entry, err)
+            return CopyResult(action, entry, None)
+
+        jobs = chain(
+            (("moving", move.entry, move.path_old) for move in plan.moves),
+            (("adding", entry, None) for entry in plan.diff.added),
+            (("updating", entry, None) for entry in plan.diff.updated),
+            (
+                ("linking", entry, entry.path)
+                for entry in plan.diff.untouched
+                if dir_link is not None
+            ),
+        )
+        if self.workers <= 1 or self.dry_run:
+            for job in jobs:
+                yield copy(*job)
+            return
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            # bound the copies queued, so results are reported while copying
+            pending: Set[Future[CopyResult]] = set()
+            for job in jobs:
+                pending.add(pool.submit(copy, *job))
+                if len(pending) >= 4 * self.workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in as_completed(pending):
+                yield future.result()
 
     def delete_obsolete_data(
-        self,
-        dir_source: Path,
-        dir_dest: Path,
-        files_source: List[Path],
-        dirs_source: List[Path],
+        self, dir_dest: Path, diff: TreeDiff, tree_dest: List[TreeEntry]
     ) -> None:
-        files_dest, dirs_dest = list_filedirs(dir_dest)
+        items_delete = plan_deletion(diff.obsolete)
+        num_dirs_dest = sum(entry.is_dir for entry in tree_dest)
 
         progress: Dict[str, Progress] = {
             "counts": get_count_progress(),
             "overall": get_last_action_progress(),
         }
-        tasks_delete = self.get_delete_tasks(progress, len(files_dest), len(dirs_dest))
+        tasks_delete = self.get_delete_tasks(
+            progress,
+            sum(item.num_files for item in items_delete),
+            sum(item.num_dirs for item in items_delete),
+        )
+        progress["counts"].advance(
+            tasks_delete["count_files_found"], len(tree_dest) - num_dirs_dest
+        )
+        progress["counts"].advance(tasks_delete["count_folders_found"], num_dirs_dest)
 
         progress_table = Table.grid()
         progress_table.add_row(
@@ -367,47 +1339,37 @@ class FileSaver(ClifsPlugin):
             console=self.console,
             auto_refresh=False,
         ) as live:
-            for cur_file_dest in files_dest:
-                progress["counts"].advance(tasks_delete["count_files_found"])
-                action = conditional_delete(
-                    Path(str(cur_file_dest).replace(str(dir_dest), str(dir_source))),
-                    cur_file_dest,
-                    files_source,
-                    dry_run=self.dry_run,
-                )
-                if action:
-                    progress["counts"].advance(tasks_delete["count_files_deleted"])
-                    progress["overall"].update(
-                        tasks_delete["progress_delete_files"],
-                        last_action=cur_file_dest.name,
+            for item in items_delete:
+                path_dest = dir_dest / item.entry.path
+                if conditional_delete(path_dest, dry_run=self.dry_run):
+                    progress["counts"].advance(
+                        tasks_delete["count_files_deleted"], item.num_files
+                    )
+                    progress["counts"].advance(
+                        tasks_delete["count_folders_deleted"], item.num_dirs
                     )
-                    if self.verbose:
-                        live.console.print(
-                            f"  - deleting [magenta]'{cur_file_dest.name}'[/] "
-                            "from dest dir"
-                        )
-
-                progress["overall"].advance(tasks_delete["progress_delete_files"])
-                live.refresh()
-
-            for cur_dir_dest in dirs_dest:
-                progress["counts"].advance(tasks_delete["count_folders_found"])
-                action = conditional_delete(
-                    Path(str(cur_dir_dest).replace(str(dir_dest), str(dir_source))),
-                    cur_dir_dest,
-                    dirs_source,
-                    dry_run=self.dry_run,
-                )
-                if action:
-                    progress["counts"].advance(tasks_delete["count_folders_deleted"])
                     progress["overall"].update(
-                        tasks_delete["progress_delete_folders"],
-                        last_action=cur_dir_dest.name,
+                        tasks_delete[
+                            "progress_delete_folders"
+                            if item.entry.is_dir
+                            else "progress_delete_files"
+                        ],
+                        last_action=path_dest.name,
                     )
                     if self.verbose:
                         live.console.print(
-                            f"  - deleting dir [magenta]'{cur_dir_dest.name}'[/] "
-                            "from dest dir"
+                            f"  - deleting {'dir ' if item.entry.is_dir else ''}"
+                            f"[magenta]'{path_dest.name}'[/] from dest dir"
+                            + (
+                                f" along with {item.num_files} files"
+                                if item.entry.is_dir
+                                else ""
+                            )
                         )
-                progress["overall"].advance(tasks_delete["progress_delete_folders"])
+                progress["overall"].advance(
+                    tasks_delete["progress_delete_files"], item.num_files
+                )
+                progress["overall"].advance(
+                    tasks_delete["progress_delete_folders"], item.num_dirs
+                )
                 live.refresh()
@@ -0,0 +1,165 @@
+"""Clifs plugin to run a batch of clifs commands"""
+
+import json
+import os
+import shlex
+import sys
+import time
+import traceback
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import List, NamedTuple, NoReturn
+
+from clifs import ClifsPlugin
+from clifs.__main__ import get_selected_plugin, run_command
+from clifs.utils_cli import print_line, set_style
+
+
+class JobResult(NamedTuple):
+    """Result of a batch job"""
+
+    command: str
+    exit_code: int
+    duration: float
+
+
+class BatchRunner(ClifsPlugin):
+    """
+    Run a batch of clifs commands
+    """
+
+    plugin_summary = "Run a batch of clifs commands in a single process"
+    plugin_description = (
+        plugin_summary + ". Saves start-up time per command and reuses directory "
+        "listings between commands working on the same directories."
+    )
+    jobs_file: Path
+    stop_on_error: bool
+
+    @staticmethod
+    def init_parser(parser: ArgumentParser) -> None:
+        """
+        Adding arguments to an argparse parser. Needed for all clifs plugins.
+        """
+        parser.add_argument(
+            "jobs_file",
+            type=Path,
+            help="File containing one clifs command per line. Commands are given "
+            "as in the command line with or without the leading 'clifs'. "
+            "For files with suffix '.jsonl' or '.json', each line is expected to be a "
+            "JSON list of command line arguments instead. "
+            "Empty lines and lines starting with '#' are skipped.",
+        )
+        parser.add_argument(
+            "-soe",
+            "--stop_on_error",
+            action="store_true",
+            help="Stop processing the batch after the first failing command.",
+        )
+
+    def __init__(self, args: Namespace) -> None:
+        super().__init__(args)
+        self.jobs = self.read_jobs()
+
+    def read_jobs(self) -> List[List[str]]:
+        jobs = []
+        is_json = self.jobs_file.suffix.lower() in (".jsonl", ".json")
+        with self.jobs_file.open(encoding="utf-8") as jobs_file:
+            for num_line, line in enumerate(jobs_file, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    argv = json.loads(line) if is_json else shlex.split(line)
+                except ValueError as err:
+                    self.exit_invalid_job(num_line, line, str(err))
+                if not isinstance(argv, list) or not all(
+                    isinstance(arg, str) for arg in argv
+                ):
+                    self.exit_invalid_job(num_line, line, "expected list of strings")
+                if argv and argv[0] == "clifs":
+                    argv = argv[1:]
+                if get_selected_plugin(argv) in ("batch", "serve"):
+                    self.exit_invalid_job(
+                        num_line, line, "'batch' and 'serve' can not run in a batch"
+                    )
+                jobs.append(argv)
+        return jobs
+
+    def exit_invalid_job(self, num_line: int, line: str, reason: str) -> NoReturn:
+        self.console.print(
+            set_style(
+                f"Invalid command in line {num_line} of '{self.jobs_file}': "
+                f"{line}\n{reason}",
+                "error",
+            )
+        )
+        sys.exit(1)
+
+    def run(self) -> None:
+        # pylint: disable=import-outside-toplevel
+        from clifs import utils_fs
+
+        results: List[JobResult] = []
+        # share directory listings between jobs unless already done, e.g. by a server
+        cache_set = utils_fs.SCAN_CACHE is None
+        if cache_set:
+            utils_fs.SCAN_CACHE = utils_fs.DirListingCache()
+        try:
+            for num_job, argv in enumerate(self.jobs, 1):
+                result = self.run_job(argv, num_job)
+                results.append(result)
+                if result.exit_code != 0 and self.stop_on_error:
+                    break
+        finally:
+            if cache_set:
+                utils_fs.SCAN_CACHE = None
+
+        self.print_summary(results)
+        if any(result.exit_code != 0 for result in results):
+            sys.exit(1)
+
+    def run_job(self, argv: List[str], num_job: int) -> JobResult:
+        command = " ".join(["clifs", *map(shlex.quote, argv)])
+        print_line(self.console, f"JOB {num_job}/{len(self.jobs)}")
+        self.console.print(set_style(command, "bright_black"))
+
+        cwd = os.getcwd()
+        time_start = time.time()
+        exit_code = 0
+        try:
+            run_command(argv)
+        except SystemExit as exc:
+            exit_code = exc.code if isinstance(exc.code, int) else int(bool(exc.code))
+        except Exception:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+            exit_code = 1
+            traceback.print_exc()
+        finally:
+            os.chdir(cwd)
+        duration = time.time() - time_start
+
+        if exit_code == 0:
+            self.console.print(f"Job {num_job} done in {duration:.2f} seconds.")
+        else:
+            self.console.print(
+                set_style(f"Job {num_job} failed with exit code {exit_code}.", "error")
+            )
+        return JobResult(command, exit_code, duration)
+
+    def print_summary(self, results: List[JobResult]) -> None:
+        print_line(self.console, "SUMMARY")
+        for num_job, result in enumerate(results, 1):
+            status = (
+                set_style("done", "green")
+                if result.exit_code == 0
+                else set_style(f"failed ({result.exit_code})", "error")
+            )
+            self.console.print(
+                f"{num_job:4}  {status}  {result.duration:8.2f} s  {result.command}"
+            )
+        num_failed = sum(result.exit_code != 0 for result in results)
+        num_skipped = len(self.jobs) - len(results)
+        self.console.print(
+            f"{len(results) - num_failed} of {len(self.jobs)} jobs done, "
+            f"{num_failed} failed, {num_skipped} skipped."
+        )
@@ -4,8 +4,9 @@ import shutil
 import sys
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict
 
+from rich.console import Console
 from rich.live import Live
 from rich.panel import Panel
 from rich.progress import Progress, TaskID
@@ -16,10 +17,12 @@ from clifs.utils_cli import (
     cli_bar,
     get_count_progress,
     get_last_action_progress,
+    get_rich_console,
     print_line,
     set_style,
 )
-from clifs.utils_fs import PathGetterMixin, get_unique_path
+from clifs.utils_copy import fast_copy
+from clifs.utils_fs import NameIndex, PathGetterMixin, PathStream, get_unique_path
 
 
 class CoMo(ClifsPlugin, PathGetterMixin):
@@ -28,7 +31,8 @@ class CoMo(ClifsPlugin, PathGetterMixin):
 
     """
 
-    files2process: List[Path]
+    console: Console
+    files2process: PathStream
     dir_dest: Path
     skip_existing: bool
     keep_all: bool
@@ -78,6 +82,7 @@ class CoMo(ClifsPlugin, PathGetterMixin):
 
     def __init__(self, args: Namespace) -> None:
         super().__init__(args)
+        self.console = get_rich_console()
 
         if self.skip_existing and self.keep_all:
             self.console.print(
@@ -86,7 +91,16 @@ class CoMo(ClifsPlugin, PathGetterMixin):
             )
             sys.exit(0)
 
-        self.files2process, _ = self.get_paths()
+        dir_dest = self.dir_dest.resolve()
+        recursive = self.recursive or self.max_depth is not None
+        if recursive and self.dir_source.resolve() in (dir_dest, *dir_dest.parents):
+            # files created in the destination would be found by a running scan
+            self.files2process = self.iter_paths(max_buffered=0)
+            self.files2process.wait()
+        else:
+            self.files2process = self.iter_paths()
+        # names taken in the destination, looked up to keep all versions
+        self.name_index = NameIndex()
 
         # define progress
         self.progress: Dict[str, Progress] = {
@@ -121,7 +135,7 @@ class CoMo(ClifsPlugin, PathGetterMixin):
         # define overall progress task
         tasks = {
             "progress": self.progress["overall"].add_task(
-                f"{self.action} data:  ", total=len(self.files2process), last_action="-"
+                f"{self.action} data:  ", total=None, last_action="-"
             ),
         }
 
@@ -154,11 +168,11 @@ class CoMo(ClifsPlugin, PathGetterMixin):
             file_dest.parent.mkdir(exist_ok=True, parents=True)
         if self.move:
             if not self.dryrun:
-                shutil.move(str(file_src), str(file_dest))
+                shutil.move(str(file_src), str(file_dest), copy_function=fast_copy)
             self.progress["counts"].advance(self.tasks["files_moved"])
         else:
             if not self.dryrun:
-                shutil.copy2(str(file_src), str(file_dest))
+                fast_copy(file_src, file_dest)
             self.progress["counts"].advance(self.tasks["files_copied"])
 
     def como(self) -> None:
@@ -166,9 +180,7 @@ class CoMo(ClifsPlugin, PathGetterMixin):
         if self.dryrun:
             print("Dry run:\n")
         self.console.print(
-            f"{self.action} {len(self.files2process)} files\n"
-            f"from: {self.dir_source}\n"
-            f"to:   {self.dir_dest}"
+            f"{self.action} files\nfrom: {self.dir_source}\nto:   {self.dir_dest}"
         )
 
         with Live(
@@ -189,7 +201,9 @@ class CoMo(ClifsPlugin, PathGetterMixin):
                         skip = True
                         self.progress["counts"].advance(self.tasks["files_skipped"])
                     elif self.keep_all:
-                        filepath_dest_new = get_unique_path(filepath_dest)
+                        filepath_dest_new = get_unique_path(
+                            filepath_dest, name_index=self.name_index
+                        )
                         if filepath_dest_new != filepath_dest:
                             txt_report = set_style(
                                 "Changed name as already present: "
@@ -207,17 +221,21 @@ class CoMo(ClifsPlugin, PathGetterMixin):
 
                 if not skip:
                     self.create_file(file, filepath_dest)
+                    self.name_index.add(filepath_dest)
 
                 last_action = "moved" if self.move else "copied"
+                # the total grows while the scan is running
+                num_files_found = self.files2process.num_found
                 if not self.terse:
                     cli_bar(
                         num_file,
-                        len(self.files2process),
+                        num_files_found,
                         suffix=f"{last_action}. {txt_report}",
                         console=self.console,
                     )
                 self.progress["overall"].update(
                     self.tasks["progress"],
+                    total=num_files_found,
                     last_action=f"{last_action} {file.name}",
                 )
                 self.progress["overall"].advance(self.tasks["progress"])
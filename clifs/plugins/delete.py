@@ -2,10 +2,12 @@
 
 import sys
 from argparse import ArgumentParser, Namespace
+from typing import Union
 
 from clifs import ClifsPlugin
-from clifs.utils_cli import CONSOLE, cli_bar, print_line, user_query
-from clifs.utils_fs import PathGetterMixin
+from clifs.utils_cli import cli_bar, print_line, user_query
+from clifs.utils_fs import PathGetterMixin, PathStream
+from clifs.utils_table import PathTable
 
 
 class FileDeleter(ClifsPlugin, PathGetterMixin):
@@ -16,6 +18,7 @@ class FileDeleter(ClifsPlugin, PathGetterMixin):
     plugin_description = (
         "Delete files. Supports multiple ways to select files for deletion."
     )
+    files2process: Union[PathTable, PathStream]
     skip_preview: bool
 
     @classmethod
@@ -36,8 +39,13 @@ class FileDeleter(ClifsPlugin, PathGetterMixin):
 
     def __init__(self, args: Namespace) -> None:
         super().__init__(args)
-        self.console = CONSOLE
-        self.files2process, _ = self.get_paths()
+        if self.skip_preview:
+            # delete files while the scan is running
+            self.files2process = self.iter_paths()
+        else:
+            # the files deleted are the ones shown in the preview
+            table = self.get_table()
+            self.files2process = table.select(table.mask_files())
 
     def run(self) -> None:
         self.exit_if_nothing_to_process(self.files2process)
@@ -54,11 +62,14 @@ class FileDeleter(ClifsPlugin, PathGetterMixin):
         self.delete_files(dry_run=False)
 
     def delete_files(self, dry_run: bool = False) -> None:
-        num_files2process = len(self.files2process)
-        if dry_run:
-            self.console.print(f"Would delete the following {num_files2process} files:")
+        if isinstance(self.files2process, PathStream):
+            self.console.print("Deleting files:")
+        elif dry_run:
+            self.console.print(
+                f"Would delete the following {len(self.files2process)} files:"
+            )
         else:
-            self.console.print(f"Deleting {num_files2process} files:")
+            self.console.print(f"Deleting {len(self.files2process)} files:")
 
         num_file = 0
         for num_file, path_file in enumerate(self.files2process, 1):
@@ -68,8 +79,17 @@ class FileDeleter(ClifsPlugin, PathGetterMixin):
                 path_file.unlink(missing_ok=True)
                 cli_bar(
                     num_file,
-                    num_files2process,
+                    self.get_num_files_found(),
                     suffix=f"deleted. Last: {path_file.name}",
                 )
         if not dry_run:
             print(f"Hurray, {num_file} files have been deleted.")
+
+    def get_num_files_found(self) -> int:
+        """Get the number of files to delete found so far.
+
+        :return: Number of files found
+        """
+        if isinstance(self.files2process, PathStream):
+            return self.files2process.num_found
+        return len(self.files2process)
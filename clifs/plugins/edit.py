@@ -1,11 +1,13 @@
 """Clifs plugin to edit text files"""
 
+import itertools
 import re
 import sys
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 
+from rich.console import Console
 from rich.live import Live
 from rich.panel import Panel
 from rich.progress import Progress, TaskID
@@ -16,20 +18,24 @@ from clifs.utils_cli import (
     MatchHighlighter,
     get_count_progress,
     get_last_action_progress,
+    get_rich_console,
     print_line,
     set_style,
     user_query,
 )
-from clifs.utils_fs import PathGetterMixin, get_unique_path
+from clifs.utils_fs import NameIndex, PathGetterMixin, PathStream, get_unique_path
 
 IO_ERROR_MESSAGE = set_style(
     "Could not read or modify the following file, check that "
     "it is a text file readable with the chosen encoding "
     "'{encoding}' and you have read/write access:\n{file_path}"
 )
+# files previewed are kept in memory until the edits are confirmed, so the preview
+# stops after this many files even if fewer line changes were shown
+MAX_FILES_PREVIEWED = 100
 
 
-class StreamingEditor(ClifsPlugin, PathGetterMixin):
+class StreamingEditor(ClifsPlugin, PathGetterMixin):  # pylint: disable=too-many-instance-attributes
     """
     Edit text files based on regular expressions.
     """
@@ -39,7 +45,8 @@ class StreamingEditor(ClifsPlugin, PathGetterMixin):
         plugin_summary
         + ". Runs line by line and gives a preview of the changes by default."
     )
-    files2process: List[Path]
+    console: Console
+    files2process: PathStream
     dir_dest: Path
     dryrun: bool
     encoding: str
@@ -109,13 +116,16 @@ class StreamingEditor(ClifsPlugin, PathGetterMixin):
 
     def __init__(self, args: Namespace) -> None:
         super().__init__(args)
+        self.console = get_rich_console()
 
-        self.files2process, _ = self.get_paths()
+        self.files2process = self.iter_paths()
         self.line_nums = self.parse_line_nums()
 
         self.highlight_match = MatchHighlighter(pattern=self.pattern)
 
         self.preview_count = 0
+        # names taken in the directories of the files edited
+        self.name_index = NameIndex()
 
         # define progress
         self.progress: Dict[str, Progress] = {
@@ -142,9 +152,13 @@ class StreamingEditor(ClifsPlugin, PathGetterMixin):
 
     def run(self) -> None:
         self.exit_if_nothing_to_process(self.files2process)
+        files = iter(self.files2process)
+        # files previewed are kept to edit them after the rest of the stream
+        files_previewed: List[Path] = []
         if self.max_previews > 0:
             print_line(self.console, title="PREVIEW")
-            for file in self.files2process:
+            for file in files:
+                files_previewed.append(file)
                 try:
                     self.preview_replace(file)
                 except (IOError, UnicodeDecodeError):
@@ -154,6 +168,14 @@ class StreamingEditor(ClifsPlugin, PathGetterMixin):
                     sys.exit(1)
                 if self.preview_count >= self.max_previews:
                     break
+                if len(files_previewed) >= MAX_FILES_PREVIEWED:
+                    self.console.print(
+                        set_style(
+                            f"Preview stopped after {MAX_FILES_PREVIEWED} files.",
+                            "bright_black",
+                        )
+                    )
+                    break
             print_line(self.console, title="END OF PREVIEW")
             if not user_query(
                 'If you want to apply the edits, give me a "yes" or "y" now!'
@@ -165,11 +187,12 @@ class StreamingEditor(ClifsPlugin, PathGetterMixin):
             console=self.console,
             auto_refresh=False,
         ) as live:
-            for file in self.files2process:
+            for file in itertools.chain(files_previewed, files):
                 try:
                     self.replace(file)
                     self.progress["overall"].update(
                         self.tasks["progress"],
+                        total=self.files2process.num_found,
                         last_action=f"edited '{file.name}'",
                     )
                     self.progress["overall"].advance(self.tasks["progress"])
@@ -222,7 +245,7 @@ class StreamingEditor(ClifsPlugin, PathGetterMixin):
         # define overall progress task
         tasks = {
             "progress": self.progress["overall"].add_task(
-                "Editing files: ", total=len(self.files2process), last_action="-"
+                "Editing files: ", total=None, last_action="-"
             ),
         }
 
@@ -284,7 +307,8 @@ class StreamingEditor(ClifsPlugin, PathGetterMixin):
         """
 
         temp_output_file = get_unique_path(
-            input_file.parent / (input_file.stem + "_edited" + input_file.suffix)
+            input_file.parent / (input_file.stem + "_edited" + input_file.suffix),
+            name_index=self.name_index,
         )
 
         with input_file.open(
@@ -313,3 +337,5 @@ class StreamingEditor(ClifsPlugin, PathGetterMixin):
         if not self.dont_overwrite:
             input_file.unlink()
             temp_output_file.rename(input_file)
+        else:
+            self.name_index.add(temp_output_file)
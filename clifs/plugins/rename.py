@@ -4,13 +4,13 @@ import re
 import sys
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
-from typing import Counter, List, Literal, Set
+from typing import Counter, List, Literal
 
 from rich.text import Text
 
 from clifs import ClifsPlugin
 from clifs.utils_cli import MatchHighlighter, cli_bar, print_line, set_style, user_query
-from clifs.utils_fs import INDENT, PathGetterMixin, get_unique_path
+from clifs.utils_fs import INDENT, NameIndex, PathGetterMixin, get_unique_path
 
 
 class Renamer(ClifsPlugin, PathGetterMixin):
@@ -114,8 +114,8 @@ class Renamer(ClifsPlugin, PathGetterMixin):
         self.counter["paths_total"] = len(paths)
 
         self.console.print(f"Renaming {self.counter['paths_total']} {path_type}.")
-        paths_to_be_added: Set[Path] = set()
-        paths_to_be_deleted: Set[Path] = set()
+        # names taken while renaming, also keeping track of the renaming in preview
+        name_index = NameIndex()
         if preview_mode:
             print_line(self.console, "PREVIEW")
 
@@ -145,13 +145,11 @@ class Renamer(ClifsPlugin, PathGetterMixin):
                 )
                 continue
 
-            # make sure resulting paths are unique
+            # make sure resulting paths are unique, the current name being free
             path_new = path.parent / name_new
-            path_unique = get_unique_path(
-                path_new,
-                set_taken=paths_to_be_added,
-                set_free=paths_to_be_deleted | {path},
-            )
+            name_index.discard(path)
+            path_unique = get_unique_path(path_new, name_index=name_index)
+            name_index.add(path_unique)
 
             if path_new != path_unique:
                 path_new = path_unique
@@ -178,11 +176,6 @@ class Renamer(ClifsPlugin, PathGetterMixin):
             if not preview_mode:
                 path.rename(path_new)
                 self.counter["paths_renamed"] += 1
-            else:
-                paths_to_be_added.add(path_new)
-                if path_new in paths_to_be_deleted:
-                    paths_to_be_deleted.remove(path_new)
-                paths_to_be_deleted.add(path)
 
         if self.counter["bad_results"] > 0:
             noun = "item" if self.counter["name_conflicts"] == 1 else "items"
@@ -0,0 +1,177 @@
+"""Clifs plugin to serve clifs commands from a long-running process"""
+
+import contextlib
+import io
+import os
+import socket
+import sys
+import traceback
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Optional
+
+from clifs import ClifsPlugin
+from clifs.__main__ import run_command
+from clifs.utils_cli import get_rich_console, set_style
+from clifs.utils_serve import (
+    ENV_SOCKET,
+    get_default_socket_path,
+    receive_message,
+    send_message,
+    server_is_running,
+)
+
+
+class ClientWriter(io.TextIOBase):
+    """Text stream forwarding everything written to a client"""
+
+    def __init__(self, stream: io.BufferedIOBase, name: str, isatty: bool) -> None:
+        super().__init__()
+        self._stream = stream
+        self._name = name
+        self._isatty = isatty
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        send_message(self._stream, **{self._name: text})
+        return len(text)
+
+    def isatty(self) -> bool:
+        return self._isatty
+
+
+class ClientReader(io.TextIOBase):
+    """Text stream reading lines from the stdin of a client"""
+
+    def __init__(self, stream: io.BufferedIOBase) -> None:
+        super().__init__()
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readline(  # type: ignore[override]  # pylint: disable=unused-argument
+        self, size: Optional[int] = -1
+    ) -> str:
+        send_message(self._stream, input=True)
+        message = receive_message(self._stream)
+        if message is None:
+            return ""
+        line: str = message["input"]
+        return line
+
+
+class Server(ClifsPlugin):
+    """
+    Serve clifs commands from a long-running process
+    """
+
+    plugin_summary = "Serve clifs commands from a long-running process"
+    plugin_description = (
+        plugin_summary + ". Saves start-up time and keeps directory listings cached "
+        "between commands. Commands are forwarded to the server if the environment "
+        f"variable '{ENV_SOCKET}' is set to the socket the server listens on. "
+        "Commands are processed one after the other. Unix only."
+    )
+    path_socket: Path
+
+    @staticmethod
+    def init_parser(parser: ArgumentParser) -> None:
+        """
+        Adding arguments to an argparse parser. Needed for all clifs plugins.
+        """
+        parser.add_argument(
+            "-s",
+            "--socket",
+            dest="path_socket",
+            type=Path,
+            default=get_default_socket_path(),
+            help="Path of the unix socket to listen on.",
+        )
+
+    def run(self) -> None:
+        from clifs import utils_fs  # pylint: disable=import-outside-toplevel
+
+        if not hasattr(socket, "AF_UNIX"):
+            self.console.print(
+                set_style("Unix sockets are not supported on this platform.", "error")
+            )
+            sys.exit(1)
+        if self.path_socket.exists():
+            if server_is_running(self.path_socket):
+                self.console.print(
+                    set_style(f"Server already running at: {self.path_socket}", "error")
+                )
+                sys.exit(1)
+            self.path_socket.unlink()  # left over from a server that did not shut down
+
+        utils_fs.SCAN_CACHE = utils_fs.DirListingCache()
+        self.path_socket.parent.mkdir(parents=True, exist_ok=True)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(str(self.path_socket))
+            try:
+                # only the user running the server may send commands
+                os.chmod(self.path_socket, 0o600)
+                sock.listen()
+                self.console.print(f"clifs server listening at: {self.path_socket}")
+                while True:
+                    conn, _ = sock.accept()
+                    with conn, conn.makefile("rwb") as stream:
+                        try:
+                            self.handle_request(stream)
+                        except OSError:  # client is gone
+                            continue
+            except KeyboardInterrupt:
+                self.console.print("clifs server shut down.")
+            finally:
+                self.path_socket.unlink(missing_ok=True)
+                utils_fs.SCAN_CACHE = None
+
+    def handle_request(self, stream: io.BufferedIOBase) -> None:
+        """Run a clifs command received from a client.
+
+        :param stream: Stream connected to the client
+        """
+        request = receive_message(stream)
+        if request is None:
+            return
+
+        stdout, stderr, stdin = sys.stdout, sys.stderr, sys.stdin
+        cwd = os.getcwd()
+        columns = os.environ.get("COLUMNS")
+        exit_code = 0
+        try:
+            sys.stdout = ClientWriter(stream, "stdout", request.get("isatty", False))
+            sys.stderr = ClientWriter(stream, "stderr", request.get("isatty", False))
+            sys.stdin = ClientReader(stream)
+            if request.get("columns"):
+                os.environ["COLUMNS"] = str(request["columns"])
+            # rich detects terminal capabilities when creating the console
+            get_rich_console.cache_clear()
+            os.chdir(request["cwd"])
+            if request["argv"] and request["argv"][0] == "serve":
+                print("Cannot run 'serve' within a clifs server.", file=sys.stderr)
+                exit_code = 1
+            else:
+                run_command(request["argv"])
+        except SystemExit as exc:
+            if isinstance(exc.code, int):
+                exit_code = exc.code
+            elif exc.code is not None:
+                print(exc.code, file=sys.stderr)
+                exit_code = 1
+        except Exception:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+            exit_code = 1
+            with contextlib.suppress(OSError):  # client might be gone
+                traceback.print_exc()
+        finally:
+            sys.stdout, sys.stderr, sys.stdin = stdout, stderr, stdin
+            if columns is None:
+                os.environ.pop("COLUMNS", None)
+            else:
+                os.environ["COLUMNS"] = columns
+            get_rich_console.cache_clear()
+            os.chdir(cwd)
+        send_message(stream, exit=exit_code)
@@ -2,13 +2,14 @@
 
 from abc import ABC, abstractmethod
 from argparse import ArgumentParser, Namespace
+from contextlib import closing, nullcontext
 from pathlib import Path
 from typing import Any, List, Optional
 
-from rich.console import Console
-
 from clifs import ClifsPlugin
-from clifs.utils_cli import set_style, size2str
+from clifs.utils_cli import ConsoleType, get_console, set_style, size2str
+from clifs.utils_fs import INDEX_HELPTEXT
+from clifs.utils_index import ScanIndex
 
 PIPE = "│"
 ELBOW = "└──"
@@ -53,9 +54,12 @@ class Entry(ABC):
 class File(Entry):
     """Representing files in a Directory Tree"""
 
-    def __init__(self, **kwargs: Any) -> None:
+    def __init__(self, size: Optional[float] = None, **kwargs: Any) -> None:
         super().__init__(**kwargs)
-        self.size: Optional[float] = self.get_size() if self.plot_size else None
+        if size is not None or not self.plot_size:
+            self.size: Optional[float] = size
+        else:
+            self.size = self.get_size()
 
     def get_size(self) -> Optional[float]:
         try:
@@ -82,14 +86,16 @@ class Folder(Entry):
         self,
         dirs_only: bool = False,
         depth_th: Optional[int] = None,
-        console: Console = Console(),
+        console: Optional[ConsoleType] = None,
+        index: Optional[ScanIndex] = None,
         **kwargs: Any,
     ) -> None:
         super().__init__(**kwargs)
 
         self.dirs_only = dirs_only
         self.depth_th = depth_th
-        self.console = console
+        self.console = console if console is not None else get_console()
+        self.index = index
 
         self.have_access: bool = True
         self.children: List[Entry] = []
@@ -107,6 +113,8 @@ class Folder(Entry):
             child_prefix += SPACE_PREFIX
 
         children: List[Entry] = []
+        if self.index is not None:
+            return self.get_children_from_index(self.index, child_prefix)
         items = list(self.path.iterdir())
         try:
             items = sorted(items, key=lambda item: (not item.is_file(), str(item)))
@@ -133,21 +141,72 @@ class Folder(Entry):
                             depth_th=self.depth_th,
                             dirs_only=self.dirs_only,
                             plot_size=self.plot_size,
+                            console=self.console,
                         )
                     )
             return children
 
         except PermissionError as err:
-            self.console.print(
-                set_style(
-                    f'Error: no permission to access "{self.path}". '
-                    "Size calculations of parent directories could be off.",
-                    "error",
+            self.report_no_access(err)
+            return []
+
+    def get_children_from_index(
+        self, index: ScanIndex, child_prefix: str
+    ) -> List[Entry]:
+        """Get the children from the scan index, taking file sizes from the index.
+
+        :param index: Scan index
+        :param child_prefix: Prefix of the children
+        :return: Children
+        """
+        children: List[Entry] = []
+        try:
+            entries = index.list_dir(str(self.path))
+        except PermissionError as err:
+            self.report_no_access(err)
+            return []
+        entries = sorted(entries, key=lambda entry: (not entry.is_file(), entry.path))
+        for num_entry, entry in enumerate(entries, 1):
+            child_connector = TEE if num_entry < len(entries) else ELBOW
+
+            if entry.is_file() and (not self.dirs_only or self.plot_size):
+                children.append(
+                    File(
+                        path=Path(entry.path),
+                        prefix=child_prefix,
+                        connector=child_connector,
+                        depth=self.depth + 1,
+                        plot_size=self.plot_size,
+                        size=entry.stat().st_size,
+                    )
                 )
+            if entry.is_dir():
+                children.append(
+                    Folder(
+                        path=Path(entry.path),
+                        prefix=child_prefix,
+                        connector=child_connector,
+                        depth=self.depth + 1,
+                        depth_th=self.depth_th,
+                        dirs_only=self.dirs_only,
+                        plot_size=self.plot_size,
+                        console=self.console,
+                        index=index,
+                    )
+                )
+        return children
+
+    def report_no_access(self, err: PermissionError) -> None:
+        """Report a directory which cannot be accessed."""
+        self.console.print(
+            set_style(
+                f'Error: no permission to access "{self.path}". '
+                "Size calculations of parent directories could be off.",
+                "error",
             )
-            self.console.print(set_style(f'Error message: "{err}"', "error"))
-            self.have_access = False
-            return []
+        )
+        self.console.print(set_style(f'Error message: "{err}"', "error"))
+        self.have_access = False
 
     def get_size(self) -> Optional[float]:
         if not self.have_access:
@@ -190,6 +249,7 @@ class DirectoryTree(ClifsPlugin):
     dirs_only: bool
     hide_sizes: bool
     depth: int
+    use_index: bool = False
 
     @staticmethod
     def init_parser(parser: ArgumentParser) -> None:
@@ -226,16 +286,25 @@ class DirectoryTree(ClifsPlugin):
             help="Maximal depth to which the tree is plotted. Relative to 'root_dir'. "
             "If not set, there will be no depth limit.",
         )
+        parser.add_argument(
+            "-idx",
+            "--use_index",
+            action="store_true",
+            default=False,
+            help=f"Use the scan index in the clifs cache directory. {INDEX_HELPTEXT}",
+        )
 
     def __init__(self, args: Namespace) -> None:
         super().__init__(args)
-        self.dir: Folder = Folder(
-            path=self.root_dir.resolve(),
-            plot_size=not self.hide_sizes,
-            depth_th=self.depth,
-            dirs_only=self.dirs_only,
-            console=self.console,
-        )
+        with closing(ScanIndex()) if self.use_index else nullcontext() as index:
+            self.dir: Folder = Folder(
+                path=self.root_dir.resolve(),
+                plot_size=not self.hide_sizes,
+                depth_th=self.depth,
+                dirs_only=self.dirs_only,
+                console=self.console,
+                index=index,
+            )
 
     def __str__(self) -> str:
         return self.dir.__str__()
@@ -0,0 +1,26 @@
+"""Utilities for data cached between clifs runs"""
+
+import os
+import sys
+from pathlib import Path
+
+ENV_CACHE_DIR = "CLIFS_CACHE_DIR"
+
+
+def get_cache_dir() -> Path:
+    """Get the directory to store clifs cache files in.
+
+    Can be set via the environment variable 'CLIFS_CACHE_DIR'. Defaults to the
+    platform specific user cache directory.
+
+    :return: Path to the cache directory
+    """
+    if os.environ.get(ENV_CACHE_DIR):
+        return Path(os.environ[ENV_CACHE_DIR])
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+        return Path(base) / "clifs" / "cache"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "clifs"
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "clifs"
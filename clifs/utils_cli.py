@@ -1,40 +1,140 @@
 """Utilities for the command line interface"""
 
 import argparse
-from typing import Iterable, Optional, Union
-
-from rich.console import Console, RenderableType
-from rich.highlighter import Highlighter
-from rich.progress import BarColumn, Progress, TaskProgressColumn, TimeRemainingColumn
-from rich.rule import Rule
-from rich.text import Text
-from rich.theme import Theme
-
-THEME_RICH = Theme(
-    {
-        "bar.complete": "default",
-        "bar.finished": "green",
-        "bar.back": "bright_black",
-        "progress.percentage": "default",
-        "progress.remaining": "bright_black",
-        "rule.line": "default",
-        "warning": "yellow",
-        "error": "red",
-        "folder": "yellow",
-        "regex_match": "underline bright_cyan",
-    },
-)
-CONSOLE = Console(theme=THEME_RICH, highlight=False)
-
-
-class MatchHighlighter(Highlighter):  # pylint: disable=too-few-public-methods
+import re
+import sys
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.progress import Progress
+    from rich.text import Text
+
+    from clifs.utils_rich import LastActionProgress
+
+# rich components are created on first use to keep the start-up time low
+LAZY_RICH_ATTRIBUTES = {"THEME_RICH", "LastActionProgress"}
+RE_MARKUP_TAG = re.compile(r"(\\*)\[([a-z#/@][^[]*?)]")
+
+
+def __getattr__(name: str) -> Any:
+    if name == "CONSOLE":
+        return get_rich_console()
+    if name in LAZY_RICH_ATTRIBUTES:
+        from clifs import utils_rich  # pylint: disable=import-outside-toplevel
+
+        return getattr(utils_rich, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def strip_markup(markup: str) -> str:
+    """Remove rich markup tags from a string, respecting escaped tags.
+
+    :param markup: String including rich markup
+    :return: Plain string
+    """
+    parts = []
+    position = 0
+    for match in RE_MARKUP_TAG.finditer(markup):
+        parts.append(markup[position : match.start()].replace("\\[", "["))
+        num_backslashes, escaped = divmod(len(match.group(1)), 2)
+        parts.append("\\" * num_backslashes)
+        if escaped:
+            parts.append(f"[{match.group(2)}]")
+        position = match.end()
+    parts.append(markup[position:].replace("\\[", "["))
+    return "".join(parts)
+
+
+class PlainConsole:  # pylint: disable=too-few-public-methods
+    """Console writing plain text, used if stdout is not a terminal.
+
+    Supports the subset of `rich.console.Console.print` used by clifs without the
+    need to import rich. Markup is stripped instead of rendered.
+    """
+
+    def print(  # pylint: disable=unused-argument
+        self, *objects: Any, sep: str = " ", end: str = "\n", **kwargs: Any
+    ) -> None:
+        """Print objects to stdout.
+
+        :param objects: Objects to print
+        :param sep: Separator between objects, defaults to " "
+        :param end: String to write at end of print data, defaults to "\\n"
+        """
+        texts = []
+        for obj in objects:
+            if hasattr(obj, "__rich__"):
+                obj = obj.__rich__()
+            if isinstance(obj, str):
+                texts.append(strip_markup(obj))
+            elif hasattr(obj, "plain"):  # rich.text.Text
+                texts.append(obj.plain)
+            elif hasattr(obj, "__rich_console__"):
+                # other rich renderables need rich to be printed
+                get_rich_console().print(*objects, sep=sep, end=end, **kwargs)
+                return
+            else:
+                texts.append(str(obj))
+        print(sep.join(texts), end=end)
+
+
+ConsoleType = Union["Console", PlainConsole]
+
+
+@lru_cache(maxsize=None)
+def get_rich_console() -> "Console":
+    """Get the rich console shared by all clifs plugins. Created on first use.
+
+    :return: Console
+    """
+    from clifs.utils_rich import create_console  # pylint: disable=import-outside-toplevel
+
+    return create_console()
+
+
+def get_console() -> ConsoleType:
+    """Get the console to print to.
+
+    If stdout is not a terminal, a plain text console is used to avoid the overhead
+    of rich.
+
+    :return: Console
+    """
+    if not sys.stdout.isatty():
+        return PlainConsole()
+    return get_rich_console()
+
+
+class MatchHighlighter:  # pylint: disable=too-few-public-methods
     """Applies highlighting from a list of regular expressions."""
 
     def __init__(self, pattern: str):
         self.pattern = pattern
         self.style = "regex_match"
 
-    def highlight(self, text: Text) -> None:
+    def __call__(self, text: Union[str, "Text"]) -> "Text":
+        """Highlight a str or Text instance.
+
+        Args:
+            text (Union[str, ~Text]): Text to highlight.
+
+        Returns:
+            Text: A Text instance with highlighting applied.
+        """
+        from rich.text import Text  # pylint: disable=import-outside-toplevel
+
+        if isinstance(text, str):
+            highlight_text = Text(text)
+        elif isinstance(text, Text):
+            highlight_text = text.copy()
+        else:
+            raise TypeError(f"str or Text instance required, not {text!r}")
+        self.highlight(highlight_text)
+        return highlight_text
+
+    def highlight(self, text: "Text") -> None:
         """Highlight :class:`rich.text.Text` at match location.
 
         Args:
@@ -59,21 +159,6 @@ def set_style(
     return f"[{style}]{string}[/{style}]"
 
 
-class LastActionProgress(Progress):
-    """Progress showing the last action in a separate line."""
-
-    def get_renderables(self) -> Iterable[RenderableType]:
-        """Get a number of renderables for the progress display."""
-
-        table = self.make_tasks_table(self.tasks)
-        yield table
-        for task in self.tasks:
-            yield (
-                f"{task.fields.get('last_action_desc', 'Last action')}: "
-                f"{task.fields.get('last_action', '-')}"
-            )
-
-
 def size2str(size: float, color: str = "cyan") -> str:
     """Format data size in bites to nicely readable units.
 
@@ -102,10 +187,10 @@ def size2str(size: float, color: str = "cyan") -> str:
 def cli_bar(  # pylint: disable=too-many-arguments, too-many-positional-arguments
     status: int,
     total: int,
-    suffix: Union[str, Text] = "",
+    suffix: Union[str, "Text"] = "",
     print_out: bool = True,
     bar_len: int = 20,
-    console: Optional[Console] = None,
+    console: Optional[ConsoleType] = None,
 ) -> str:
     """Create progress bar and either print directly to console or return as string.
 
@@ -141,31 +226,46 @@ def user_query(message: str) -> bool:
     return choice in yes
 
 
-def print_line(console: Console = CONSOLE, title: str = "") -> None:
+def print_line(console: Optional[ConsoleType] = None, title: str = "") -> None:
     """Print a line to the console.
 
-    :param console: rich.console to print to, defaults to CONSOLE
+    :param console: Console to print to, defaults to the console from `get_console`
     :param title: Title included in the line, defaults to ""
     """
-    console.print(Rule(title=title, align="center"))
+    if console is None:
+        console = get_console()
+    if isinstance(console, PlainConsole):
+        title = f" {title} " if title else ""
+        console.print(f"{title:─^80}")
+    else:
+        from rich.rule import Rule  # pylint: disable=import-outside-toplevel
 
+        console.print(Rule(title=title, align="center"))
 
-def get_count_progress() -> Progress:
+
+def get_count_progress() -> "Progress":
     """Get instance of a count progress.
 
     :return: progress
     """
+    from rich.progress import Progress  # pylint: disable=import-outside-toplevel
+
     return Progress(
         "{task.description}",
         "{task.completed}",
     )
 
 
-def get_last_action_progress() -> LastActionProgress:
+def get_last_action_progress() -> "LastActionProgress":
     """Get instance of a progress bar displaying the last action in a separate line.
 
     :return: Progress
     """
+    # pylint: disable=import-outside-toplevel
+    from rich.progress import BarColumn, TaskProgressColumn, TimeRemainingColumn
+
+    from clifs.utils_rich import LastActionProgress
+
     return LastActionProgress(
         "{task.description}",
         BarColumn(),
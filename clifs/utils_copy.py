@@ -0,0 +1,181 @@
+"""Copying files by the fastest mechanism available for a pair of files"""
+
+import errno
+import os
+import shutil
+import sys
+from typing import Callable, List, NamedTuple, Optional, Set, Tuple, Union
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from linux/fs.h
+CHUNK_SIZE = 2**20  # buffer size of the fallback copy
+# bytes to transfer per system call, staying below the limits of 32 bit systems
+MAX_TRANSFER = 2**30
+
+# errors of a copy mechanism meaning it is not supported for a pair of files
+ERRNOS_UNSUPPORTED = {
+    errno.EBADF,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTSOCK,
+    errno.ENOTSUP,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.ETXTBSY,
+    errno.EXDEV,
+}
+
+
+class CopyEngine(NamedTuple):
+    """Mechanism copying the content of a file to another one"""
+
+    name: str
+    # copies from the source to the destination file descriptor, both at position 0
+    copy: Callable[[int, int], None]
+    # only works within one file system
+    same_device: bool
+
+
+def _copy_reflink(fd_source: int, fd_dest: int) -> None:
+    """Share the data blocks of the source with the destination, e.g. on btrfs/XFS"""
+    import fcntl  # pylint: disable=import-outside-toplevel
+
+    fcntl.ioctl(fd_dest, FICLONE, fd_source)
+
+
+def _copy_file_range(fd_source: int, fd_dest: int) -> None:
+    """Copy in the kernel, possibly offloaded to the file system or storage"""
+    while os.copy_file_range(fd_source, fd_dest, MAX_TRANSFER):
+        pass
+
+
+def _copy_sendfile(fd_source: int, fd_dest: int) -> None:
+    """Copy in the kernel without passing the data through user space"""
+    offset = 0
+    while True:
+        sent = os.sendfile(fd_dest, fd_source, offset, MAX_TRANSFER)
+        if not sent:
+            break
+        offset += sent
+
+
+def _copy_read_write(fd_source: int, fd_dest: int) -> None:
+    """Copy through a buffer in user space, working for all files"""
+    while True:
+        chunk = os.read(fd_source, CHUNK_SIZE)
+        if not chunk:
+            break
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(fd_dest, view) :]
+
+
+ENGINE_REFLINK = CopyEngine("reflink", _copy_reflink, same_device=True)
+ENGINE_COPY_FILE_RANGE = CopyEngine(
+    "copy_file_range", _copy_file_range, same_device=True
+)
+ENGINE_SENDFILE = CopyEngine("sendfile", _copy_sendfile, same_device=False)
+ENGINE_READ_WRITE = CopyEngine("read_write", _copy_read_write, same_device=False)
+
+# engines found not to work for files on a pair of devices
+_unsupported: Set[Tuple[str, int, int]] = set()
+
+
+def get_engines() -> List[CopyEngine]:
+    """Get the copy engines available on this platform, fastest first.
+
+    :return: Copy engines, the last one working for all files
+    """
+    engines = []
+    if sys.platform.startswith("linux"):
+        engines.append(ENGINE_REFLINK)
+        if hasattr(os, "copy_file_range"):
+            engines.append(ENGINE_COPY_FILE_RANGE)
+        engines.append(ENGINE_SENDFILE)
+    engines.append(ENGINE_READ_WRITE)
+    return engines
+
+
+def _copy_content(
+    fd_source: int,
+    fd_dest: int,
+    devices: Tuple[int, int],
+    engines: List[CopyEngine],
+) -> str:
+    """Copy the content of a file by the first engine supporting the pair of files"""
+    for engine in engines:
+        key = (engine.name, *devices)
+        if (engine.same_device and devices[0] != devices[1]) or key in _unsupported:
+            continue
+        try:
+            engine.copy(fd_source, fd_dest)
+        except OSError as err:
+            if err.errno not in ERRNOS_UNSUPPORTED:
+                raise
+            _unsupported.add(key)
+            # start over, the engine might have copied parts of the file
+            os.lseek(fd_source, 0, os.SEEK_SET)
+            os.lseek(fd_dest, 0, os.SEEK_SET)
+            os.ftruncate(fd_dest, 0)
+            continue
+        return engine.name
+    raise OSError(errno.ENOTSUP, "None of the copy engines supports the files")
+
+
+def fast_copy(
+    path_source: PathLike,
+    path_dest: PathLike,
+    engines: Optional[List[CopyEngine]] = None,
+) -> str:
+    """Copy a file along with its metadata like `shutil.copy2`.
+
+    On Linux, the content is copied by the fastest engine supporting the pair of
+    files: a reflink sharing the data blocks on file systems like btrfs or XFS,
+    `os.copy_file_range` within one file system and `os.sendfile` otherwise, before
+    falling back to a buffered copy. Engines failing for a pair of devices are not
+    tried again for it. Elsewhere, `shutil.copyfile` is used, which already makes use
+    of the copy functions of the platform.
+
+    Unlike `shutil.copy2`, the destination is expected to be a file path, copying to
+    a directory fails.
+
+    :param path_source: File to copy
+    :param path_dest: Destination path, existing files being overwritten
+    :param engines: Copy engines to try in order, defaults to `get_engines()`
+    :raises shutil.SameFileError: If source and destination are the same file
+    :raises OSError: If the file cannot be copied
+    :return: Name of the copy engine used
+    """
+    if engines is None:
+        if not sys.platform.startswith("linux"):
+            shutil.copyfile(path_source, path_dest)
+            shutil.copystat(path_source, path_dest)
+            return "copyfile"
+        engines = get_engines()
+
+    flag_binary = getattr(os, "O_BINARY", 0)  # no newline translation on Windows
+    fd_source = os.open(path_source, os.O_RDONLY | flag_binary)
+    try:
+        # truncate only once it is clear the destination is not the source
+        fd_dest = os.open(path_dest, os.O_WRONLY | os.O_CREAT | flag_binary, 0o666)
+        try:
+            stat_source = os.fstat(fd_source)
+            stat_dest = os.fstat(fd_dest)
+            if (stat_source.st_dev, stat_source.st_ino) == (
+                stat_dest.st_dev,
+                stat_dest.st_ino,
+            ):
+                raise shutil.SameFileError(
+                    f"{path_source!r} and {path_dest!r} are the same file"
+                )
+            os.ftruncate(fd_dest, 0)
+            name = _copy_content(
+                fd_source, fd_dest, (stat_source.st_dev, stat_dest.st_dev), engines
+            )
+        finally:
+            os.close(fd_dest)
+    finally:
+        os.close(fd_source)
+    shutil.copystat(path_source, path_dest)
+    return name
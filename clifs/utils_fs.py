@@ -1,16 +1,51 @@
 """Utilities for the file system"""
 
+# pylint: disable=too-many-lines
+
+import contextlib
 import csv
+import fnmatch
+import functools
+import heapq
+import itertools
+import os
+import queue
 import re
 import sys
+import threading
+import time
 from argparse import ArgumentParser
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, List, Literal, Optional, Set, Tuple
-
-from dateutil.relativedelta import relativedelta
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
 
-from clifs.utils_cli import CONSOLE, set_style
+from clifs.utils_cli import get_console, set_style
+from clifs.utils_index import IndexEntry, ScanIndex
+from clifs.utils_match import (
+    MatchRule,
+    PathMatcher,
+    read_ignore_file,
+    translate_glob,
+    translate_regex,
+)
+from clifs.utils_table import PathTable
 
 INDENT = "    "
 TIME_INTERVAL_HELPTEXT = """The time interval can be given in units of:
@@ -22,6 +57,474 @@ CTIME_HELPTEXT = """Be aware that the meaning of 'ctime' depends on the operatin
  system. On some systems (like Unix) it is the time of the last metadata change, while
  on others (like Windows), it is the creation time
  (see https://docs.python.org/3/library/stat.html)."""
+SIZE_HELPTEXT = """The size can be given in bytes or in units of 'kB', 'MB', 'GB' and
+ 'TB' (powers of 1000) or 'KiB', 'MiB', 'GiB' and 'TiB' (powers of 1024), e.g. '1.5GB'.
+ Folders are not selected if set."""
+SIZE_UNITS = {
+    "b": 1,
+    "kb": 1000,
+    "mb": 1000**2,
+    "gb": 1000**3,
+    "tb": 1000**4,
+    "kib": 1024,
+    "mib": 1024**2,
+    "gib": 1024**3,
+    "tib": 1024**4,
+}
+GLOB_HELPTEXT = """Patterns follow the rules of '.gitignore' files:
+ Patterns containing a '/' other than a trailing one match paths relative to the
+ source directory, others match names at any depth. A trailing '/' matches folders only
+ and '**' matches any number of folders."""
+INDEX_HELPTEXT = """The index keeps directory listings and stat results between
+ runs and re-reads only directories modified since, which saves most of the time of
+ repeated scans of large trees. Be aware that changing a file does not modify its
+ directory, so sizes and times in the index can be outdated."""
+
+
+class ListingItem(NamedTuple):
+    """Item of a directory listing"""
+
+    name: str
+    is_dir: bool
+    is_symlink: bool
+
+
+class ScanEntry(Protocol):
+    """Item found while scanning a directory, like `os.DirEntry`"""
+
+    @property
+    def name(self) -> str: ...
+
+    @property
+    def path(self) -> str: ...
+
+    def is_dir(self) -> bool: ...
+
+    def stat(self) -> os.stat_result: ...
+
+
+class CachedEntry:
+    """Item of a cached directory listing, stat'ed on first request only"""
+
+    __slots__ = ("_is_dir", "_is_symlink", "_stat", "name", "path")
+
+    def __init__(self, dir_parent: str, item: ListingItem) -> None:
+        self.name = item.name
+        self.path = os.path.join(dir_parent, item.name)
+        self._is_dir = item.is_dir
+        self._is_symlink = item.is_symlink
+        self._stat: Optional[os.stat_result] = None
+
+    def is_dir(self) -> bool:
+        """Whether the item is a directory or a symbolic link to a directory"""
+        return self._is_dir
+
+    def is_symlink(self) -> bool:
+        """Whether the item is a symbolic link"""
+        return self._is_symlink
+
+    def stat(self) -> os.stat_result:
+        """Get the stat result of the item following symbolic links"""
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+
+class PathEntry(NamedTuple):
+    """Path selected by `PathGetterMixin` together with its scan entry.
+
+    The scan entry caches the file type and the result of `stat()`, so later
+    processing can reuse what was fetched from the file system during selection.
+    """
+
+    path: Path
+    entry: ScanEntry
+
+
+# filter selecting items found while scanning
+EntryFilter = Callable[[ScanEntry], bool]
+
+
+class RelativePathFilter:
+    """Filter selecting items by their path relative to a root directory.
+
+    Each path identifies a single item, so the filter keeps track of the paths not
+    found yet and a scan can stop as soon as all of them were found.
+    """
+
+    def __init__(self, root: str, paths_relative: Set[str]) -> None:
+        self.len_root = len(os.path.join(root, ""))
+        self.paths_missing = {os.path.normpath(path) for path in paths_relative if path}
+
+    def __call__(self, entry: ScanEntry) -> bool:
+        path_relative = entry.path[self.len_root :]
+        if path_relative in self.paths_missing:
+            self.paths_missing.remove(path_relative)
+            return True
+        return False
+
+    @property
+    def done(self) -> bool:
+        """Whether all paths were found"""
+        return not self.paths_missing
+
+
+class TimeFilter:
+    """Filter selecting items by their modification and/or change times.
+
+    All times are checked on the result of a single stat call.
+    """
+
+    def __init__(
+        self, time_bounds: List[Tuple[str, Optional[float], Optional[float]]]
+    ) -> None:
+        """
+        :param time_bounds: Tuples of the stat attribute to check, e.g. 'st_mtime',
+            and its upper and lower threshold as timestamps or None if not set
+        """
+        self.time_bounds = time_bounds
+
+    def __call__(self, entry: ScanEntry) -> bool:
+        try:
+            stat = entry.stat()
+        except OSError:  # broken symbolic link or removed in the meantime
+            return False
+        return all(
+            self.is_in_bounds(getattr(stat, time_stat), th_upper, th_lower)
+            for time_stat, th_upper, th_lower in self.time_bounds
+        )
+
+    @staticmethod
+    def is_in_bounds(
+        path_time: float, th_upper: Optional[float], th_lower: Optional[float]
+    ) -> bool:
+        """Check whether a timestamp is within the given thresholds"""
+        return (not th_upper or path_time <= th_upper) and (
+            not th_lower or path_time >= th_lower
+        )
+
+
+class SizeFilter:  # pylint: disable=too-few-public-methods
+    """Filter selecting files by their size. Folders are never selected."""
+
+    def __init__(self, size_lower: Optional[int], size_upper: Optional[int]) -> None:
+        """
+        :param size_lower: Size in bytes files must be larger than or None if not set
+        :param size_upper: Size in bytes files must be smaller than or None if not set
+        """
+        self.size_lower = size_lower
+        self.size_upper = size_upper
+
+    def __call__(self, entry: ScanEntry) -> bool:
+        if entry.is_dir():
+            return False
+        try:
+            size = entry.stat().st_size
+        except OSError:  # broken symbolic link or removed in the meantime
+            return False
+        return (self.size_lower is None or size > self.size_lower) and (
+            self.size_upper is None or size < self.size_upper
+        )
+
+
+class DirListingCache:
+    """
+    Cache of directory listings, invalidated by the modification time of a directory.
+
+    Creating, deleting or renaming items in a directory changes its modification time,
+    so a directory whose modification time did not change since it was listed can be
+    taken from the cache at the cost of a single stat call.
+    """
+
+    # directories modified more recently are not cached, as changes within the
+    # timestamp granularity of the file system would go unnoticed
+    min_age_ns = 2 * 10**9
+
+    def __init__(self, max_dirs: int = 100_000) -> None:
+        self.max_dirs = max_dirs
+        self.hits = 0
+        self.misses = 0
+        self._listings: "OrderedDict[str, Tuple[int, List[ListingItem]]]" = (
+            OrderedDict()
+        )
+
+    def list_dir(self, path: str) -> List[ListingItem]:
+        """List a directory, taking the listing from the cache if still valid.
+
+        Directories which cannot be listed, e.g. due to missing permissions or as
+        they were removed, are skipped like `scan_tree` does.
+
+        :param path: Directory to list
+        :return: Items in the directory, empty if it cannot be listed
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            cached = self._listings.get(path)
+            if cached is not None and cached[0] == mtime:
+                self._listings.move_to_end(path)
+                self.hits += 1
+                return cached[1]
+
+            self.misses += 1
+            with os.scandir(path) as entries:
+                listing = [
+                    ListingItem(entry.name, entry.is_dir(), entry.is_symlink())
+                    for entry in entries
+                ]
+        except OSError:
+            self._listings.pop(path, None)
+            return []
+        if time.time_ns() - mtime > self.min_age_ns:
+            self._listings[path] = (mtime, listing)
+            self._listings.move_to_end(path)
+            if len(self._listings) > self.max_dirs:
+                self._listings.popitem(last=False)
+        elif cached is not None:
+            del self._listings[path]
+        return listing
+
+    def walk(
+        self,
+        root: str,
+        recursive: bool = False,
+        max_depth: Optional[int] = None,
+        prune: Optional[EntryFilter] = None,
+    ) -> Iterator[CachedEntry]:
+        """Walk a directory tree in the order of `pathlib.Path.rglob`.
+
+        Items of a directory are listed before the items of its sub-directories.
+        Symbolic links to directories are listed but not followed.
+
+        :param root: Root directory
+        :param recursive: Walk recursively, defaults to False
+        :param max_depth: Maximal depth of the items to walk, items in the root
+            directory having a depth of 1. Deeper directories are not listed.
+            Defaults to None, meaning no limit.
+        :param prune: Filter selecting items to skip along with everything below
+            them, defaults to None
+        :yield: Entries of the items found
+        """
+        if max_depth is not None and max_depth < 1:
+            return
+        entries = [CachedEntry(root, item) for item in self.list_dir(root)]
+        if prune is not None:
+            entries = [entry for entry in entries if not prune(entry)]
+        yield from entries
+        if recursive and (max_depth is None or max_depth > 1):
+            for entry in entries:
+                if entry.is_dir() and not entry.is_symlink():
+                    yield from self.walk(
+                        entry.path,
+                        recursive,
+                        None if max_depth is None else max_depth - 1,
+                        prune,
+                    )
+
+
+class _PathProducer:
+    """Put paths into a bounded queue from a background thread"""
+
+    # marks the end of the paths in the queue
+    END = object()
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        max_buffered: int,
+        stopped: Optional[threading.Event] = None,
+    ) -> None:
+        self.paths = paths
+        self.queue: "queue.Queue[object]" = queue.Queue(maxsize=max_buffered)
+        self.num_found = 0
+        self.error: Optional[BaseException] = None
+        self.finished = threading.Event()
+        self.stopped = stopped if stopped is not None else threading.Event()
+
+    def run(self) -> None:
+        """Put all paths into the queue unless stopped"""
+        try:
+            for path in self.paths:
+                if self.stopped.is_set():
+                    return
+                self.num_found += 1
+                self.queue.put(path)
+        except Exception as err:  # noqa: BLE001  # pylint: disable=broad-exception-caught
+            self.error = err
+        finally:
+            self.finished.set()
+            if not self.stopped.is_set():
+                self.queue.put(self.END)
+
+    def stop(self) -> None:
+        """Stop producing paths without waiting for the producer.
+
+        Emptying the queue unblocks a producer waiting for space, which stops before
+        putting a further path.
+        """
+        self.stopped.set()
+        with contextlib.suppress(queue.Empty):
+            while True:
+                self.queue.get_nowait()
+
+
+class PathStream:
+    """
+    Paths found by a scan running in a background thread.
+
+    Iterating yields the paths as soon as they are found while the scan continues.
+    At most `max_buffered` paths are held in memory, the scan pauses if the consumer
+    cannot keep up. The stream can be iterated once only.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        max_buffered: int = 10_000,
+        stopped: Optional[threading.Event] = None,
+    ) -> None:
+        """
+        :param paths: Paths to stream, consumed in the background thread
+        :param max_buffered: Maximal number of paths found but not yet consumed.
+            Zero means no limit. Defaults to 10_000
+        :param stopped: Event set once the stream is stopped, e.g. to end a scan
+            finding no further paths early. Defaults to None
+        """
+        self._producer = _PathProducer(paths, max_buffered, stopped)
+        self._head: List[Path] = []
+        threading.Thread(target=self._producer.run, daemon=True).start()
+
+    def __del__(self) -> None:
+        # the producer does not reference the stream, so an abandoned stream is
+        # collected and its producer thread does not block forever
+        producer = getattr(self, "_producer", None)
+        if producer is not None:
+            producer.stop()
+
+    @property
+    def num_found(self) -> int:
+        """Number of paths found so far"""
+        return self._producer.num_found
+
+    @property
+    def done(self) -> bool:
+        """Whether the scan has finished"""
+        return self._producer.finished.is_set()
+
+    def wait(self) -> None:
+        """Wait for the scan to finish. Use only with unlimited buffer size."""
+        self._producer.finished.wait()
+
+    def __bool__(self) -> bool:
+        """Whether any path is found. Waits for the first path or the end of the scan"""
+        if not self._head:
+            item = self._get()
+            if item is None:
+                return False
+            self._head.append(item)
+        return True
+
+    def __iter__(self) -> Iterator[Path]:
+        try:
+            if self._head:
+                yield self._head.pop()
+            while (item := self._get()) is not None:
+                yield item
+        finally:
+            self._producer.stop()
+
+    def _get(self) -> Optional[Path]:
+        item = self._producer.queue.get()
+        if item is _PathProducer.END:
+            self._producer.queue.put(item)  # keep the end mark for further calls
+            if self._producer.error is not None:
+                raise self._producer.error
+            return None
+        return cast(Path, item)
+
+
+# directory listing cache used by `PathGetterMixin` if set, e.g. by `clifs serve`
+SCAN_CACHE: Optional[DirListingCache] = None
+
+
+def _list_dir(path: str) -> List["os.DirEntry[str]"]:
+    """List a directory, skipping directories which cannot be listed"""
+    try:
+        with os.scandir(path) as scan:
+            return list(scan)
+    except OSError:
+        return []
+
+
+def scan_tree(
+    root: str,
+    recursive: bool = False,
+    max_depth: Optional[int] = None,
+    workers: int = 1,
+    prune: Optional[EntryFilter] = None,
+) -> Iterator["os.DirEntry[str]"]:
+    """Scan a directory tree in the order of `pathlib.Path.rglob`.
+
+    Items of a directory are listed before the items of its sub-directories.
+    Symbolic links to directories are listed but not followed. Directories which
+    cannot be listed, e.g. due to missing permissions, are skipped like `glob` does.
+
+    With multiple workers, the sub-directories of each directory are listed by a
+    thread pool while the items found so far are consumed, which helps on file
+    systems with a high latency like network shares. The order of the items does
+    not depend on the number of workers.
+
+    :param root: Root directory
+    :param recursive: Scan recursively, defaults to False
+    :param max_depth: Maximal depth of the items to scan, items in the root directory
+        having a depth of 1. Deeper directories are not opened. Defaults to None,
+        meaning no limit.
+    :param workers: Number of threads listing directories, defaults to 1
+    :param prune: Filter selecting items to skip along with everything below them,
+        defaults to None
+    :yield: Directory entries, caching the results of `is_dir()` and `stat()`
+    """
+    if not recursive:
+        max_depth = 1 if max_depth is None else min(max_depth, 1)
+    if max_depth is not None and max_depth < 1:
+        return
+
+    pool = ThreadPoolExecutor(workers) if workers > 1 else None
+
+    def request_listing(path: str) -> Callable[[], List["os.DirEntry[str]"]]:
+        if pool is None:
+            return functools.partial(_list_dir, path)
+        return pool.submit(_list_dir, path).result
+
+    # stack of iterators over listings still to be consumed, one per depth level
+    listings_pending: List[Iterator[Callable[[], List["os.DirEntry[str]"]]]] = [
+        iter((request_listing(root),))
+    ]
+    try:
+        while listings_pending:
+            get_listing = next(listings_pending[-1], None)
+            if get_listing is None:
+                listings_pending.pop()
+                continue
+            entries = get_listing()
+            if prune is not None:
+                entries = [entry for entry in entries if not prune(entry)]
+            yield from entries
+            if max_depth is None or len(listings_pending) < max_depth:
+                listings_pending.append(
+                    iter(
+                        [
+                            request_listing(entry.path)
+                            for entry in entries
+                            if entry.is_dir() and not entry.is_symlink()
+                        ]
+                    )
+                )
+    finally:
+        if pool is not None:
+            if sys.version_info >= (3, 9):
+                pool.shutdown(wait=False, cancel_futures=True)
+            else:
+                pool.shutdown(wait=False)
 
 
 class PathGetterMixin:
@@ -31,14 +534,27 @@ class PathGetterMixin:
 
     dir_source: Path
     recursive: bool
+    max_depth: Optional[int] = None
+    min_depth: Optional[int] = None
+    scan_workers: int = 1
+    use_index: bool = False
     filterlist: Path
     filterlistheader: str
     filterlistsep: str
+    filterlistrelative: bool = False
     filterstring: str
+    include: Optional[List[str]] = None
+    include_regex: Optional[List[str]] = None
+    exclude: Optional[List[str]] = None
+    exclude_regex: Optional[List[str]] = None
+    ignore_file: Optional[Path] = None
     mtime_stamp_older: Optional[str] = None
     mtime_stamp_newer: Optional[str] = None
     ctime_stamp_older: Optional[str] = None
     ctime_stamp_newer: Optional[str] = None
+    size_larger: Optional[str] = None
+    size_smaller: Optional[str] = None
+    largest: Optional[int] = None
 
     @staticmethod
     def init_parser_mixin(parser: ArgumentParser) -> None:
@@ -58,6 +574,36 @@ class PathGetterMixin:
             action="store_true",
             help="Search recursively in source directory.",
         )
+        group.add_argument(
+            "-maxd",
+            "--max_depth",
+            type=int,
+            default=None,
+            help="Search recursively down to the given depth only, items in the "
+            "source directory having a depth of 1. Deeper directories are not read.",
+        )
+        group.add_argument(
+            "-mind",
+            "--min_depth",
+            type=int,
+            default=None,
+            help="Select only files/folders at the given depth or deeper, items in "
+            "the source directory having a depth of 1.",
+        )
+        group.add_argument(
+            "-sw",
+            "--scan_workers",
+            type=int,
+            default=1,
+            help="Number of threads reading directories in parallel. Speeds up the "
+            "selection on file systems with a high latency like network shares.",
+        )
+        group.add_argument(
+            "-idx",
+            "--use_index",
+            action="store_true",
+            help=f"Use the scan index in the clifs cache directory. {INDEX_HELPTEXT}",
+        )
         group.add_argument(
             "-fl",
             "--filterlist",
@@ -84,6 +630,15 @@ class PathGetterMixin:
             default=",",
             help="Separator to use for csv provided as filter list.",
         )
+        group.add_argument(
+            "-flr",
+            "--filterlistrelative",
+            action="store_true",
+            help="Match the items of the filter list against the paths relative to "
+            "the source directory instead of the file/folder names, e.g. "
+            "'sub_dir/file.txt'. Allows to select one of several files with the same "
+            "name in different sub-directories.",
+        )
         group.add_argument(
             "-fs",
             "--filterstring",
@@ -91,6 +646,53 @@ class PathGetterMixin:
             help="Substring identifying files/folders to be copied. "
             "Not case sensitive.",
         )
+        group.add_argument(
+            "-inc",
+            "--include",
+            action="append",
+            default=None,
+            help="Select only files/folders matching the given glob pattern. Can be "
+            f"given several times to select items matching any of them. {GLOB_HELPTEXT}",
+        )
+        group.add_argument(
+            "-incr",
+            "--include_regex",
+            action="append",
+            default=None,
+            help="Select only files/folders whose path relative to the source "
+            "directory contains a match of the given regex, using '/' as separator. "
+            "Paths of folders end with a '/'. "
+            "Can be given several times and combined with `--include`.",
+        )
+        group.add_argument(
+            "-exc",
+            "--exclude",
+            action="append",
+            default=None,
+            help="Skip files/folders matching the given glob pattern. Folders "
+            "skipped are not read. Can be given several times. "
+            f"{GLOB_HELPTEXT}",
+        )
+        group.add_argument(
+            "-excr",
+            "--exclude_regex",
+            action="append",
+            default=None,
+            help="Skip files/folders whose path relative to the source directory "
+            "contains a match of the given regex, using '/' as separator. Paths of "
+            "folders end with a '/', so e.g. 'tmp/' skips folders named 'tmp'. "
+            "Folders skipped are not read. Can be given several times.",
+        )
+        group.add_argument(
+            "-ig",
+            "--ignore_file",
+            type=Path,
+            default=None,
+            help="Path to a file listing glob patterns of files/folders to skip, one "
+            "per line, like a '.gitignore' file. Folders skipped are not read. "
+            "Patterns starting with '!' select items skipped by previous patterns "
+            "again.",
+        )
         group.add_argument(
             "-mto",
             "--mtime_stamp_older",
@@ -120,81 +722,285 @@ class PathGetterMixin:
             f"than the given period of time ago. {TIME_INTERVAL_HELPTEXT} "
             f"{CTIME_HELPTEXT}",
         )
+        group.add_argument(
+            "-szl",
+            "--size_larger",
+            default=None,
+            help=f"Select only files larger than the given size. {SIZE_HELPTEXT}",
+        )
+        group.add_argument(
+            "-szs",
+            "--size_smaller",
+            default=None,
+            help=f"Select only files smaller than the given size. {SIZE_HELPTEXT}",
+        )
+        group.add_argument(
+            "-lg",
+            "--largest",
+            type=int,
+            default=None,
+            help="Select only the given number of largest files matching all other "
+            "filters, largest first. Folders are not selected if set.",
+        )
 
     def get_paths(self) -> Tuple[List[Path], List[Path]]:
         """Get file and folder paths depending on set filters
 
         :return: Lists of file paths and folder paths matching the filters respectively
         """
-        # get paths by substring filter
-        files, dirs = self._get_paths_by_filterstring(
-            self.dir_source, filterstring=self.filterstring, recursive=self.recursive
+        files, dirs = self.get_entries()
+        return [file.path for file in files], [folder.path for folder in dirs]
+
+    def get_entries(self) -> Tuple[List[PathEntry], List[PathEntry]]:
+        """Get file and folder paths depending on set filters along with their entries
+
+        Items are stat'ed at most once and only if they pass all filters on the name.
+
+        :return: Lists of file entries and folder entries matching the filters
+            respectively
+        """
+        files = []
+        dirs = []
+        for path_entry in self.iter_entries():
+            if path_entry.entry.is_dir():
+                dirs.append(path_entry)
+            else:
+                files.append(path_entry)
+        return files, dirs
+
+    def get_table(self) -> PathTable:
+        """Get files and folders depending on set filters as a compact table
+
+        Takes a fraction of the memory of `get_paths()` for large selections.
+
+        :return: Table of the files and folders matching the filters
+        """
+        table = PathTable()
+        table.extend(path_entry.entry for path_entry in self.iter_entries())
+        return table
+
+    def iter_paths(
+        self, include_dirs: bool = False, max_buffered: int = 10_000
+    ) -> PathStream:
+        """Stream file paths depending on set filters while the scan is running.
+
+        :param include_dirs: Include folder paths, defaults to False
+        :param max_buffered: Maximal number of paths held in memory, zero meaning no
+            limit. Defaults to 10_000
+        :return: Stream of paths matching the filters
+        """
+        # end the scan as soon as the stream is stopped, not at the next match only
+        stopped = threading.Event()
+        return PathStream(
+            (
+                path_entry.path
+                for path_entry in self.iter_entries(stopped)
+                if include_dirs or not path_entry.entry.is_dir()
+            ),
+            max_buffered=max_buffered,
+            stopped=stopped,
+        )
+
+    def iter_entries(
+        self, stopped: Optional[threading.Event] = None
+    ) -> Iterator[PathEntry]:
+        """Iterate over the items matching the set filters in the order they are found.
+
+        The filters are set up right away, so invalid filter options are reported on
+        call and not on iteration.
+
+        :param stopped: Event ending the scan once set, defaults to None
+        :return: Iterator over the entries of matching items
+        """
+        filters = self.get_entry_filters()
+        recursive = self.recursive or self.max_depth is not None
+        entries = self._scan(
+            self.dir_source,
+            recursive,
+            self.max_depth,
+            self.scan_workers,
+            self.use_index,
+            self.get_exclude_filter(),
+        )
+        if stopped is not None:
+            entries = itertools.takewhile(lambda _: not stopped.is_set(), entries)
+        path_entries = self._filter_entries(entries, filters)
+        if self.largest is not None:
+            return self._get_largest_files(path_entries, self.largest)
+        return path_entries
+
+    @staticmethod
+    def _get_largest_files(
+        path_entries: Iterable[PathEntry], num_files: int
+    ) -> Iterator[PathEntry]:
+        """Get the largest files keeping only as many files in memory as requested.
+
+        :param path_entries: Entries of the items to select from
+        :param num_files: Number of files to select
+        :return: Iterator over the entries of the largest files, largest first
+        """
+
+        def with_sizes() -> Iterator[Tuple[int, PathEntry]]:
+            for path_entry in path_entries:
+                if path_entry.entry.is_dir():
+                    continue
+                try:
+                    yield path_entry.entry.stat().st_size, path_entry
+                except OSError:  # broken symbolic link or removed in the meantime
+                    continue
+
+        return (
+            path_entry
+            for _, path_entry in heapq.nlargest(
+                num_files, with_sizes(), key=itemgetter(0)
+            )
         )
 
+    @staticmethod
+    def _filter_entries(
+        entries: Iterable[ScanEntry], filters: List[EntryFilter]
+    ) -> Iterator[PathEntry]:
+        # stop early once all items of a filter list of relative paths are found
+        filters_relative = [
+            select for select in filters if isinstance(select, RelativePathFilter)
+        ]
+        # stat results from the scan index might be outdated
+        filters_stat = [
+            select for select in filters if isinstance(select, (TimeFilter, SizeFilter))
+        ]
+        for entry in entries:
+            if filters_relative and filters_relative[0].done:
+                break
+            if all(select(entry) for select in filters):
+                if (
+                    filters_stat
+                    and isinstance(entry, IndexEntry)
+                    and not (
+                        entry.refresh()
+                        and all(select(entry) for select in filters_stat)
+                    )
+                ):
+                    continue
+                yield PathEntry(Path(entry.path), entry)
+
+    def get_entry_filters(self) -> List[EntryFilter]:
+        """Get the filters to select items by, cheapest first.
+
+        :return: List of filters
+        """
+        filters = []
+
+        # filter by depth
+        if self.min_depth is not None and self.min_depth > 1:
+            filters.append(
+                self._get_min_depth_filter(
+                    str(self.dir_source.resolve()), self.min_depth
+                )
+            )
+
+        # filter by substring
+        if self.filterstring:
+            filters.append(self._get_name_filter(f"*{self.filterstring}*"))
+
+        # filter by include patterns
+        if self.include or self.include_regex:
+            filters.append(
+                self._get_path_matcher(
+                    [translate_glob(pattern) for pattern in self.include or []]
+                    + [translate_regex(pattern) for pattern in self.include_regex or []]
+                )
+            )
+
         # filter by list
         if self.filterlist:
-            list_filter = self._list_from_csv()
-            files = [i for i in files if i.name in list_filter]
-            dirs = [i for i in dirs if i.name in list_filter]
-
-        # filter by mtime
-        if self.mtime_stamp_older or self.mtime_stamp_newer:
-            files, dirs = self.filter_by_time(
-                files,
-                dirs,
-                "st_mtime",
-                delta_th_upper=self.mtime_stamp_older,
-                delta_th_lower=self.mtime_stamp_newer,
+            set_filter = self._list_from_csv()
+            if self.filterlistrelative:
+                filters.append(
+                    RelativePathFilter(str(self.dir_source.resolve()), set_filter)
+                )
+            else:
+                filters.append(lambda entry: entry.name in set_filter)
+
+        # filter by mtime and ctime using a single stat call
+        time_bounds = [
+            (time_stat, *self._get_time_thresholds(delta_th_upper, delta_th_lower))
+            for time_stat, delta_th_upper, delta_th_lower in (
+                ("st_mtime", self.mtime_stamp_older, self.mtime_stamp_newer),
+                ("st_ctime", self.ctime_stamp_older, self.ctime_stamp_newer),
             )
+            if delta_th_upper or delta_th_lower
+        ]
+        if time_bounds:
+            filters.append(TimeFilter(time_bounds))
 
-        # filter by ctime
-        if self.ctime_stamp_older or self.ctime_stamp_newer:
-            files, dirs = self.filter_by_time(
-                files,
-                dirs,
-                "st_ctime",
-                delta_th_upper=self.ctime_stamp_older,
-                delta_th_lower=self.ctime_stamp_newer,
+        # filter by size using the same stat call
+        if self.size_larger or self.size_smaller:
+            filters.append(
+                SizeFilter(
+                    self._get_size_threshold(self.size_larger)
+                    if self.size_larger
+                    else None,
+                    self._get_size_threshold(self.size_smaller)
+                    if self.size_smaller
+                    else None,
+                )
             )
 
-        return files, dirs
+        return filters
 
-    def filter_by_time(  # pylint: disable=too-many-arguments, too-many-positional-arguments
-        self,
-        files: List[Path],
-        dirs: List[Path],
-        time_stat: Literal["st_ctime", "st_mtime"],
-        delta_th_upper: Optional[str],
-        delta_th_lower: Optional[str],
-    ) -> Tuple[List[Path], List[Path]]:
+    def get_exclude_filter(self) -> Optional[EntryFilter]:
+        """Get the filter selecting items to skip while scanning, along with everything
+        below them.
+
+        Rules of the ignore file come first, so the exclude options take precedence.
+
+        :return: Filter or None if nothing is excluded
+        """
+        rules: List[Optional[MatchRule]] = []
+        if self.ignore_file is not None:
+            try:
+                rules.extend(read_ignore_file(self.ignore_file))
+            except (OSError, UnicodeDecodeError) as err:
+                get_console().print(
+                    set_style(f"Could not read ignore file: {err}", "error")
+                )
+                sys.exit(1)
+        rules.extend(translate_glob(pattern) for pattern in self.exclude or [])
+        rules.extend(translate_regex(pattern) for pattern in self.exclude_regex or [])
+        if not rules:
+            return None
+        return self._get_path_matcher(rules)
+
+    def _get_path_matcher(self, rules: List[Optional[MatchRule]]) -> PathMatcher:
+        try:
+            return PathMatcher(
+                str(self.dir_source.resolve()),
+                [rule for rule in rules if rule is not None],
+            )
+        except re.error as err:
+            get_console().print(
+                set_style(f"Invalid include/exclude pattern: {err}", "error")
+            )
+            sys.exit(1)
+
+    def _get_time_thresholds(
+        self, delta_th_upper: Optional[str], delta_th_lower: Optional[str]
+    ) -> Tuple[Optional[float], Optional[float]]:
         th_upper = (
             None if not delta_th_upper else self._get_time_threshold(delta_th_upper)
         )
         th_lower = (
             None if not delta_th_lower else self._get_time_threshold(delta_th_lower)
         )
-
-        files_filtered = []
-        dirs_filtered = []
-        for file in files:
-            path_time = getattr(file.stat(), time_stat)
-            if (not th_upper or path_time <= th_upper) and (
-                not th_lower or path_time >= th_lower
-            ):
-                files_filtered.append(file)
-        for folder in dirs:
-            path_time = getattr(folder.stat(), time_stat)
-            if (not th_upper or path_time <= th_upper) and (
-                not th_lower or path_time >= th_lower
-            ):
-                dirs_filtered.append(folder)
-        return files_filtered, dirs_filtered
+        return th_upper, th_lower
 
     @staticmethod
-    def exit_if_nothing_to_process(items: List[Any]) -> None:
-        """Exit running process if list of files to process is empty"""
+    def exit_if_nothing_to_process(
+        items: Union[List[Any], PathStream, PathTable],
+    ) -> None:
+        """Exit running process if list or stream of files to process is empty"""
         if not items:
-            CONSOLE.print("Nothing to process.")
+            get_console().print("Nothing to process.")
             sys.exit(0)
 
     @staticmethod
@@ -207,42 +1013,71 @@ class PathGetterMixin:
         return sorted(paths, key=lambda x: (-len(x.parents), str(x)))
 
     @staticmethod
-    def _get_paths_by_filterstring(
-        dir_source: Path, filterstring: Optional[str] = None, recursive: bool = False
-    ) -> Tuple[List[Path], List[Path]]:
-        """Get files by substring filter on the file name.
+    def _scan(  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        dir_source: Path,
+        recursive: bool,
+        max_depth: Optional[int] = None,
+        workers: int = 1,
+        use_index: bool = False,
+        prune: Optional[EntryFilter] = None,
+    ) -> Iterator[ScanEntry]:
+        """Scan the source directory, using the directory listing cache if set.
 
         :param dir_source: directory to search for files in
-        :param filterstring: Substring that must be included in a file name.
-            If set to None, files are not filtered by substring. Defaults to None.
-        :param recursive: Search recursively, defaults to False
-        :return: Lists of file paths and dir paths matching the filter respectively
+        :param recursive: Search recursively
+        :param max_depth: Maximal depth to search to, defaults to None
+        :param workers: Number of threads listing directories, not used with the
+            directory listing cache or the scan index. Defaults to 1
+        :param use_index: Use the persistent scan index, defaults to False
+        :param prune: Filter selecting items to skip along with everything below them,
+            defaults to None
+        :return: Iterator over the items found
         """
-        pattern_search = f"*{filterstring}*" if filterstring else "*"
-        if recursive:
-            pattern_search = "**/" + pattern_search
-        files = []
-        dirs = []
-        for path in dir_source.glob(pattern_search):
-            if path.is_dir():
-                dirs.append(path.resolve())
-            else:
-                files.append(path.resolve())
+        root = str(dir_source.resolve())
+        if use_index:
+            return ScanIndex().walk(root, recursive, max_depth, prune)
+        if SCAN_CACHE is not None:
+            return SCAN_CACHE.walk(root, recursive, max_depth, prune)
+        return scan_tree(root, recursive, max_depth, workers, prune)
 
-        return files, dirs
+    @staticmethod
+    def _get_min_depth_filter(root: str, min_depth: int) -> EntryFilter:
+        """Get a filter selecting items at a minimal depth below a root directory.
+
+        :param root: Root directory
+        :param min_depth: Minimal depth, items in the root directory having a depth
+            of 1
+        :return: Filter
+        """
+        len_root = len(os.path.join(root, ""))
+        return lambda entry: entry.path.count(os.sep, len_root) + 1 >= min_depth
+
+    @staticmethod
+    def _get_name_filter(pattern: str) -> EntryFilter:
+        """Get a filter selecting items by matching their names to a glob pattern.
 
-    def _list_from_csv(self) -> List[str]:
+        :param pattern: Glob pattern
+        :return: Filter
+        """
+        # match like 'pathlib' does, ignoring case on Windows only
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        match_name = re.compile(fnmatch.translate(pattern), flags).fullmatch
+        return lambda entry: match_name(entry.name) is not None
+
+    def _list_from_csv(self) -> Set[str]:
+        res_set = set()
         if not self.filterlistheader:
-            res_list = self.filterlist.open().read().splitlines()
+            with self.filterlist.open() as infile:
+                for line in infile:
+                    res_set.add(line.rstrip("\r\n"))
         else:
             with self.filterlist.open(newline="") as infile:
                 reader = csv.DictReader(infile, delimiter=self.filterlistsep)
-                res_list = []
                 for row in reader:
                     try:
-                        res_list.append(row[self.filterlistheader])
+                        res_set.add(row[self.filterlistheader])
                     except KeyError:
-                        CONSOLE.print(
+                        get_console().print(
                             set_style(
                                 "Provided csv does not contain header "
                                 f"'{self.filterlistheader}'. Found headers:\n"
@@ -251,10 +1086,13 @@ class PathGetterMixin:
                             )
                         )
                         sys.exit(1)
-        return res_list
+        return res_set
 
     @staticmethod
     def _get_time_threshold(time_input: str, now: datetime = datetime.now()) -> float:
+        # pylint: disable=import-outside-toplevel
+        from dateutil.relativedelta import relativedelta
+
         try:
             if "." in time_input:
                 raise ValueError()
@@ -283,7 +1121,7 @@ class PathGetterMixin:
                 threshold = (now - relativedelta(days=quantity)).timestamp()
 
         except ValueError:
-            CONSOLE.print(
+            get_console().print(
                 set_style(
                     f"Input time has invalid format: '{time_input}'.\n"
                     "Expecting an integer optionally followed by one of the "
@@ -296,11 +1134,141 @@ class PathGetterMixin:
             sys.exit(1)
         return threshold
 
+    @staticmethod
+    def _get_size_threshold(size_input: str) -> int:
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*", size_input)
+        if match is None or match.group(2).lower() not in ("", *SIZE_UNITS):
+            get_console().print(
+                set_style(
+                    f"Input size has invalid format: '{size_input}'.\n"
+                    "Expecting a number optionally followed by one of the "
+                    "following unit identifiers:\n"
+                    "'B', 'kB', 'MB', 'GB', 'TB', 'KiB', 'MiB', 'GiB' or 'TiB'.",
+                    "error",
+                )
+            )
+            sys.exit(1)
+        return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower() or "b"])
+
+
+class NameIndex:
+    """
+    Index of the names taken in directories to get unique file names quickly.
+
+    Directories are listed once on first use. Items created, renamed or deleted
+    along the way must be reported via `add()` and `discard()`. Changes by other
+    processes and case-insensitive file systems are accounted for by checking the
+    name found to be free on disk, so each unique name costs a single stat call.
+    """
+
+    def __init__(self) -> None:
+        self._names: Dict[str, Set[str]] = {}
+        self._names_discarded: Dict[str, Set[str]] = {}
+        # number suffixes below the hint are known to be taken for the given
+        # directory, name without number suffix and file extension
+        self._hints: Dict[Tuple[str, str, str], int] = {}
+
+    def _get_names(self, dir_parent: str) -> Set[str]:
+        names = self._names.get(dir_parent)
+        if names is None:
+            try:
+                with os.scandir(dir_parent) as entries:
+                    names = {os.path.normcase(entry.name) for entry in entries}
+            except OSError:  # not existing (yet)
+                names = set()
+            self._names[dir_parent] = names
+            self._names_discarded[dir_parent] = set()
+        return names
+
+    def is_taken(self, path: Path) -> bool:
+        """Check whether a path is taken.
+
+        :param path: Path to check
+        :return: Whether the path is taken
+        """
+        dir_parent = str(path.parent)
+        name = os.path.normcase(path.name)
+        names = self._get_names(dir_parent)
+        if name in names:
+            return True
+        if name not in self._names_discarded[dir_parent] and os.path.lexists(path):
+            names.add(name)  # created by someone else
+            return True
+        return False
+
+    def add(self, path: Path) -> None:
+        """Mark a path as taken, e.g. after creating a file.
+
+        :param path: Path taken
+        """
+        dir_parent = str(path.parent)
+        name = os.path.normcase(path.name)
+        self._get_names(dir_parent).add(name)
+        self._names_discarded[dir_parent].discard(name)
+
+    def discard(self, path: Path) -> None:
+        """Mark a path as free, e.g. after deleting or renaming a file.
+
+        :param path: Path freed
+        """
+        dir_parent = str(path.parent)
+        name = os.path.normcase(path.name)
+        self._get_names(dir_parent).discard(name)
+        self._names_discarded[dir_parent].add(name)
+        name_file, count = _split_count(os.path.normcase(path.stem))
+        key = (dir_parent, name_file, os.path.normcase(path.suffix))
+        if count is not None and count < self._hints.get(key, 2):
+            self._hints[key] = count
+
+    def get_unique_path(self, path_candidate: Path) -> Path:
+        """Given a name candidate get a unique file name in its directory.
+
+        Adds number suffixes in form ' (#)' if file name is already taken, using the
+        lowest free number like `get_unique_path()` does.
+
+        :param path_candidate: Candidate for a file path.
+        :return: Unique file path
+        """
+        if not self.is_taken(path_candidate):
+            return path_candidate
+
+        name_file, count = _split_count(path_candidate.stem)
+        count = 2 if count is None else count + 1
+        key = (
+            str(path_candidate.parent),
+            os.path.normcase(name_file),
+            os.path.normcase(path_candidate.suffix),
+        )
+        # skip the numbers known to be taken if starting below the hint
+        hint = self._hints.get(key, 2)
+        from_hint = count <= hint
+        if from_hint:
+            count = hint
+        while True:
+            path_new = path_candidate.parent / (
+                f"{name_file} ({count}){path_candidate.suffix}"
+            )
+            if not self.is_taken(path_new):
+                break
+            count += 1
+        if from_hint:
+            self._hints[key] = count
+        return path_new
+
+
+def _split_count(name_file: str) -> Tuple[str, Optional[int]]:
+    """Split a number suffix in form ' (#)' from a file name without extension"""
+    count_match = re.match(r".* \((\d+)\)$", name_file)
+    if count_match:
+        return " ".join(name_file.split(" ")[0:-1]), int(count_match.group(1))
+    return name_file, None
+
 
 def get_unique_path(
     path_candidate: Path,
     set_taken: Optional[Set[Path]] = None,
     set_free: Optional[Set[Path]] = None,
+    name_index: Optional[NameIndex] = None,
 ) -> Path:
     """Given a name candidate get a unique file name in a given directory.
 
@@ -311,9 +1279,22 @@ def get_unique_path(
         taken, defaults to None
     :param set_free: Optional sets of paths that are considered as not taken even if
         corresponding files exist, defaults to None
+    :param name_index: Optional index of the names taken to look up instead of
+        probing the file system for each number suffix. Cannot be combined with
+        'set_taken' and 'set_free', report paths taken and freed to the index
+        instead. Defaults to None
     :raises ValueError: If there are common elements in 'set_taken' and 'set_free'
+        or if they are given along with 'name_index'
     :return: Unique file path
     """
+    if name_index is not None:
+        if set_taken or set_free:
+            raise ValueError(
+                "Params 'set_taken' and 'set_free' cannot be combined with "
+                "'name_index'."
+            )
+        return name_index.get_unique_path(path_candidate)
+
     if set_taken is None:
         set_taken = set()
     if set_free is None:
@@ -326,13 +1307,8 @@ def get_unique_path(
 
     path_new = path_candidate
     if (path_new.exists() or path_new in set_taken) and (path_new not in set_free):
-        name_file = path_new.stem
-        count_match = re.match(r".* \((\d+)\)$", name_file)
-        if count_match:
-            count = int(count_match.group(1)) + 1
-            name_file = " ".join(name_file.split(" ")[0:-1])
-        else:
-            count = 2
+        name_file, count = _split_count(path_new.stem)
+        count = 2 if count is None else count + 1
 
         while (path_new.exists() or path_new in set_taken) and (
             path_new not in set_free
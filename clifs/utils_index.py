@@ -0,0 +1,279 @@
+"""Persistent index of scanned directories reusable across clifs runs"""
+
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Tuple
+
+from clifs.utils_cache import get_cache_dir
+
+if TYPE_CHECKING:
+    import sqlite3
+
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entries (
+    parent TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    is_file INTEGER NOT NULL,
+    is_symlink INTEGER NOT NULL,
+    mode INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    ctime REAL NOT NULL,
+    PRIMARY KEY (parent, pos)
+) WITHOUT ROWID;
+"""
+
+# columns of the entries table describing an item
+IndexRow = Tuple[str, int, int, int, int, int, int, float, float]
+
+
+def get_index_path() -> Path:
+    """Get the path of the scan index database.
+
+    :return: Path to the scan index
+    """
+    return get_cache_dir() / "scan_index.sqlite3"
+
+
+class IndexEntry:
+    """Item of a directory listing taken from the scan index, like `os.DirEntry`"""
+
+    __slots__ = ("_is_dir", "_is_file", "_is_symlink", "_stat", "name", "path")
+
+    def __init__(self, dir_parent: str, row: IndexRow) -> None:
+        name, is_dir, is_file, is_symlink, mode, inode, size, mtime, ctime = row
+        self.name = name
+        self.path = os.path.join(dir_parent, name)
+        self._is_dir = bool(is_dir)
+        self._is_file = bool(is_file)
+        self._is_symlink = bool(is_symlink)
+        self._stat = os.stat_result((mode, inode, 0, 0, 0, 0, size, 0, mtime, ctime))
+
+    def is_dir(self) -> bool:
+        """Whether the item is a directory or a symbolic link to a directory"""
+        return self._is_dir
+
+    def is_file(self) -> bool:
+        """Whether the item is a file or a symbolic link to a file"""
+        return self._is_file
+
+    def is_symlink(self) -> bool:
+        """Whether the item is a symbolic link"""
+        return self._is_symlink
+
+    def stat(self) -> os.stat_result:
+        """Get the indexed stat result of the item.
+
+        Changing the content of a file does not change the modification time of its
+        directory, so size and times are as of the last time the directory changed.
+        Use `refresh()` to get the current values.
+        """
+        return self._stat
+
+    def refresh(self) -> bool:
+        """Replace the indexed stat result by the current one.
+
+        :return: Whether the item still exists
+        """
+        try:
+            self._stat = os.stat(self.path)
+        except OSError:
+            return False
+        return True
+
+
+def _stat_row(entry: "os.DirEntry[str]") -> Optional[IndexRow]:
+    """Get the index row of a directory entry following symbolic links if possible"""
+    try:
+        try:
+            stat = entry.stat()
+        except OSError:  # broken symbolic link
+            stat = entry.stat(follow_symlinks=False)
+        return (
+            entry.name,
+            int(entry.is_dir()),
+            int(entry.is_file()),
+            int(entry.is_symlink()),
+            stat.st_mode,
+            stat.st_ino,
+            stat.st_size,
+            stat.st_mtime,
+            stat.st_ctime,
+        )
+    except OSError:  # removed in the meantime
+        return None
+
+
+class ScanIndex:
+    """
+    Index of directory listings and stat results stored in a SQLite database.
+
+    A directory is re-listed only if its modification time changed since it was
+    indexed, so repeated scans of large trees cost a single stat call per directory.
+    The connection is opened on first use in the thread using the index.
+    """
+
+    # directories modified more recently are re-listed on next use, as changes within
+    # the timestamp granularity of the file system would go unnoticed
+    min_age_ns = 2 * 10**9
+
+    def __init__(self, path_db: Optional[Path] = None) -> None:
+        self.path_db = path_db if path_db is not None else get_index_path()
+        self.hits = 0
+        self.misses = 0
+        self._connection: Optional["sqlite3.Connection"] = None
+
+    def close(self) -> None:
+        """Store pending changes and close the connection."""
+        if self._connection is not None:
+            self._connection.commit()
+            self._connection.close()
+            self._connection = None
+
+    def _connect(self) -> "sqlite3.Connection":
+        if self._connection is None:
+            import sqlite3  # pylint: disable=import-outside-toplevel,redefined-outer-name
+
+            self.path_db.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path_db), timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            if connection.execute("PRAGMA user_version").fetchone()[0] != (
+                SCHEMA_VERSION
+            ):
+                connection.executescript(
+                    "DROP TABLE IF EXISTS dirs; DROP TABLE IF EXISTS entries;"
+                )
+                connection.executescript(SCHEMA)
+                connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self._connection = connection
+        return self._connection
+
+    def list_dir(self, path: str) -> List[IndexEntry]:
+        """List a directory, taking the listing from the index if still valid.
+
+        :param path: Directory to list
+        :raises OSError: If the directory cannot be listed
+        :return: Items in the directory
+        """
+        connection = self._connect()
+        mtime_ns = os.stat(path).st_mtime_ns
+        row = connection.execute(
+            "SELECT mtime_ns FROM dirs WHERE path = ?", (path,)
+        ).fetchone()
+        if row is not None and row[0] == mtime_ns:
+            self.hits += 1
+            rows = connection.execute(
+                "SELECT name, is_dir, is_file, is_symlink, mode, inode, size, mtime, "
+                "ctime FROM entries WHERE parent = ? ORDER BY pos",
+                (path,),
+            ).fetchall()
+            return [IndexEntry(path, row) for row in rows]
+
+        self.misses += 1
+        with os.scandir(path) as scan:
+            rows = [row for row in map(_stat_row, scan) if row is not None]
+        self._store_listing(path, mtime_ns, rows)
+        return [IndexEntry(path, row) for row in rows]
+
+    def _store_listing(self, path: str, mtime_ns: int, rows: List[IndexRow]) -> None:
+        connection = self._connect()
+        subdirs_old = {
+            name
+            for (name,) in connection.execute(
+                "SELECT name FROM entries "
+                "WHERE parent = ? AND is_dir = 1 AND is_symlink = 0",
+                (path,),
+            )
+        }
+        subdirs_new = {row[0] for row in rows if row[1] and not row[3]}
+        for name in subdirs_old - subdirs_new:
+            self._remove_tree(os.path.join(path, name))
+
+        connection.execute("DELETE FROM entries WHERE parent = ?", (path,))
+        connection.executemany(
+            "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(path, pos, *row) for pos, row in enumerate(rows)],
+        )
+        if time.time_ns() - mtime_ns <= self.min_age_ns:
+            mtime_ns = -1  # re-list on next use
+        connection.execute(
+            "INSERT OR REPLACE INTO dirs VALUES (?, ?)", (path, mtime_ns)
+        )
+
+    def _remove_tree(self, path: str) -> None:
+        """Remove a directory and everything below it from the index"""
+        connection = self._connect()
+        # all paths starting with 'path + sep' sort in between these bounds
+        lower = path + os.sep
+        upper = path + chr(ord(os.sep) + 1)
+        connection.execute(
+            "DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)",
+            (path, lower, upper),
+        )
+        connection.execute(
+            "DELETE FROM entries WHERE parent = ? OR (parent >= ? AND parent < ?)",
+            (path, lower, upper),
+        )
+
+    def walk(
+        self,
+        root: str,
+        recursive: bool = False,
+        max_depth: Optional[int] = None,
+        prune: Optional[Callable[[IndexEntry], bool]] = None,
+    ) -> Iterator[IndexEntry]:
+        """Walk a directory tree in the order of `pathlib.Path.rglob`.
+
+        Items of a directory are listed before the items of its sub-directories.
+        Symbolic links to directories are listed but not followed. Directories
+        which cannot be listed are skipped. The index is stored once the walk ends.
+
+        :param root: Root directory
+        :param recursive: Walk recursively, defaults to False
+        :param max_depth: Maximal depth of the items to walk, items in the root
+            directory having a depth of 1. Defaults to None, meaning no limit.
+        :param prune: Filter selecting items to skip along with everything below
+            them, defaults to None
+        :yield: Entries of the items found
+        """
+        if not recursive:
+            max_depth = 1 if max_depth is None else min(max_depth, 1)
+        if max_depth is not None and max_depth < 1:
+            return
+        # stack of iterators over directories still to be walked, one per depth level
+        dirs_pending: List[Iterator[str]] = [iter((root,))]
+        try:
+            while dirs_pending:
+                dir_next = next(dirs_pending[-1], None)
+                if dir_next is None:
+                    dirs_pending.pop()
+                    continue
+                try:
+                    entries = self.list_dir(dir_next)
+                except OSError:
+                    continue
+                if prune is not None:
+                    entries = [entry for entry in entries if not prune(entry)]
+                yield from entries
+                if max_depth is None or len(dirs_pending) < max_depth:
+                    dirs_pending.append(
+                        iter(
+                            [
+                                entry.path
+                                for entry in entries
+                                if entry.is_dir() and not entry.is_symlink()
+                            ]
+                        )
+                    )
+        finally:
+            self.close()
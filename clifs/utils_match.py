@@ -0,0 +1,176 @@
+"""Matching of paths against glob patterns with gitignore semantics and regexes"""
+
+import os
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, List, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from clifs.utils_fs import ScanEntry
+
+
+class MatchRule(NamedTuple):
+    """Rule of a path matcher"""
+
+    # regex matched against the path relative to the root directory using '/' as
+    # separator, followed by a line break for folders
+    regex: str
+    negate: bool = False
+    # search the regex on its own instead of combining it with the other rules, so
+    # user regexes may use inline flags and refer to their own groups. It is searched
+    # in the relative path followed by a '/' for folders instead of a line break.
+    search: bool = False
+
+
+def _translate_segments(pattern: str) -> str:
+    """Translate a glob pattern to a regex not matching '/' by wildcards"""
+    regex = ""
+    idx = 0
+    while idx < len(pattern):
+        char = pattern[idx]
+        segment_start = idx == 0 or pattern[idx - 1] == "/"
+        idx += 1
+        if segment_start and pattern.startswith("**/", idx - 1):
+            regex += "(?:.*/)?"  # any number of directories
+            idx += 2
+        elif segment_start and pattern[idx - 1 :] == "**":
+            regex += ".+"  # everything inside a directory
+            idx += 1
+        elif char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "\\" and idx < len(pattern):
+            regex += re.escape(pattern[idx])
+            idx += 1
+        elif char == "[" and "]" in pattern[idx + 1 :]:
+            end = pattern.index("]", idx + 1)
+            content = pattern[idx:end].replace("\\", "\\\\")
+            if content.startswith("!"):
+                content = "^" + content[1:]
+            regex += f"[{content}]"
+            idx = end + 1
+        else:
+            regex += re.escape(char)
+    return regex
+
+
+def translate_glob(pattern: str) -> Optional[MatchRule]:
+    """Translate a glob pattern with gitignore semantics to a match rule.
+
+    Patterns without a '/' except a trailing one match items at any depth, others
+    match paths relative to the root directory. A trailing '/' matches folders only,
+    '**' matches any number of directories and a leading '!' negates the pattern.
+
+    :param pattern: Glob pattern, e.g. a line of an ignore file
+    :return: Match rule or None if the pattern is empty or a comment
+    """
+    pattern = pattern.rstrip("\r\n")
+    if not pattern.endswith("\\ "):
+        pattern = pattern.rstrip(" ")
+    if not pattern or pattern.startswith("#"):
+        return None
+
+    negate = pattern.startswith("!")
+    if negate or pattern.startswith(("\\!", "\\#")):
+        pattern = pattern[1:]
+    dirs_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    regex = (
+        ("" if anchored else "(?:.*/)?")
+        + _translate_segments(pattern)
+        + ("\n" if dirs_only else "\n?")
+        + r"\Z"
+    )
+    return MatchRule(regex, negate)
+
+
+def translate_regex(pattern: str) -> MatchRule:
+    """Get a match rule searching a regex in the relative path of items.
+
+    The path uses '/' as separator and ends with a '/' for folders, so e.g. 'tmp/'
+    matches folders named 'tmp' and everything below them.
+
+    :param pattern: Regex
+    :return: Match rule
+    """
+    return MatchRule(pattern, search=True)
+
+
+def read_ignore_file(path_file: Path) -> List[MatchRule]:
+    """Read the match rules of an ignore file with gitignore semantics.
+
+    :param path_file: Path of the ignore file
+    :return: Match rules in the order of the file
+    """
+    rules = []
+    with path_file.open(encoding="utf-8") as ignore_file:
+        for line in ignore_file:
+            rule = translate_glob(line)
+            if rule is not None:
+                rules.append(rule)
+    return rules
+
+
+class PathMatcher:  # pylint: disable=too-few-public-methods
+    """
+    Match items below a root directory against several rules at once.
+
+    Rules translated from glob patterns are compiled into a single regex evaluated
+    once per item, rules searching a regex are compiled on their own. Later rules
+    take precedence over earlier ones, so a negated rule can exclude items matched by
+    an earlier rule.
+    """
+
+    def __init__(self, root: str, rules: List[MatchRule]) -> None:
+        """
+        :param root: Root directory
+        :param rules: Match rules
+        :raises re.error: If a rule is not a valid regex
+        """
+        self.len_root = len(os.path.join(root, ""))
+        self.rules = rules
+        rules_reversed = list(reversed(list(enumerate(rules))))
+        # the first matching alternative is the last matching rule
+        regex = "|".join(
+            f"(?P<rule{idx}>{rule.regex})"
+            for idx, rule in rules_reversed
+            if not rule.search
+        )
+        if not regex:
+            regex = "(?!)"  # never matching
+        # match like 'pathlib' does, ignoring case on Windows only
+        flags = re.MULTILINE | (re.IGNORECASE if os.name == "nt" else 0)
+        self._match = re.compile(regex, flags).match
+        self._rules_negated = {
+            f"rule{idx}" for idx, rule in enumerate(rules) if rule.negate
+        }
+        # searching rules, last rule first
+        flags_search = flags & ~re.MULTILINE
+        self._searches = [
+            (idx, re.compile(rule.regex, flags_search).search, rule.negate)
+            for idx, rule in rules_reversed
+            if rule.search
+        ]
+
+    def __call__(self, entry: "ScanEntry") -> bool:
+        path = entry.path[self.len_root :]
+        if os.sep != "/":
+            path = path.replace(os.sep, "/")
+        is_dir = entry.is_dir()
+        match = self._match(path + "\n" if is_dir else path)
+        idx_match = -1 if match is None else int(str(match.lastgroup)[len("rule") :])
+        if is_dir:
+            path += "/"
+        # searching rules after the last matching combined rule take precedence
+        for idx, search, negate in self._searches:
+            if idx < idx_match:
+                break
+            if search(path):
+                return not negate
+        return match is not None and match.lastgroup not in self._rules_negated
@@ -0,0 +1,173 @@
+"""Utilities to discover installed clifs plugins"""
+
+import hashlib
+import json
+import os
+import sys
+from importlib.metadata import EntryPoint, entry_points
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Type
+
+from clifs.clifs_plugin import ClifsPlugin
+from clifs.utils_cache import get_cache_dir
+
+PLUGIN_GROUP = "clifs.plugins"
+MANIFEST_VERSION = 1
+
+
+class PluginInfo(NamedTuple):
+    """Plugin information stored in the plugin manifest"""
+
+    value: str
+    summary: Optional[str]
+    description: Optional[str]
+
+
+def get_plugin_entry_points() -> Dict[str, EntryPoint]:
+    """Get entry points of all plugins installed as 'clifs.plugins' without loading them
+
+    :return: Dictionary mapping plugin names to their entry points
+    """
+    # depending on Python version 'entry_points' returns a dict or 'EntryPoints' object
+    if sys.version_info < (3, 10):
+        plugin_entry_points = entry_points().get(PLUGIN_GROUP, [])
+    else:
+        plugin_entry_points = entry_points().select(group=PLUGIN_GROUP)
+    return {entry_point.name: entry_point for entry_point in plugin_entry_points}
+
+
+def get_plugin_info(value: str, plugin: Type[ClifsPlugin]) -> PluginInfo:
+    """Get the help texts of a plugin.
+
+    :param value: Import path of the plugin in form 'module:attribute'
+    :param plugin: Plugin class
+    :return: Plugin info
+    """
+    summary = getattr(plugin, "plugin_summary", None) or plugin.__doc__
+    description = (
+        getattr(plugin, "plugin_description", None)
+        or getattr(plugin, "plugin_summary", None)
+        or plugin.__doc__
+    )
+    return PluginInfo(value=value, summary=summary, description=description)
+
+
+def load_plugin(name: str, info: PluginInfo) -> Type[ClifsPlugin]:
+    """Import a plugin class.
+
+    :param name: Name of the plugin
+    :param info: Plugin info
+    :return: Plugin class
+    """
+    plugin: Type[ClifsPlugin] = EntryPoint(
+        name=name, value=info.value, group=PLUGIN_GROUP
+    ).load()
+    return plugin
+
+
+def get_dist_fingerprint(search_paths: Optional[List[str]] = None) -> str:
+    """Get a fingerprint of the installed distributions.
+
+    The fingerprint changes whenever a distribution is installed, updated or removed
+    in one of the search paths.
+
+    :param search_paths: Paths to search for distributions, defaults to `sys.path`
+    :return: Fingerprint
+    """
+    hasher = hashlib.sha256(sys.version.encode())
+    for search_path in sys.path if search_paths is None else search_paths:
+        try:
+            with os.scandir(search_path or ".") as entries:
+                dist_infos = sorted(
+                    (entry.name, entry.stat().st_mtime_ns)
+                    for entry in entries
+                    if entry.name.endswith((".dist-info", ".egg-info"))
+                )
+        except OSError:  # not existing or not a directory, e.g. zip files
+            continue
+        if dist_infos:
+            hasher.update(f"{search_path}{dist_infos}".encode())
+    return hasher.hexdigest()
+
+
+def get_manifest_path() -> Path:
+    """Get the path of the plugin manifest for the running interpreter.
+
+    :return: Path to the plugin manifest
+    """
+    interpreter_id = hashlib.sha256(sys.executable.encode()).hexdigest()[:16]
+    return get_cache_dir() / f"plugin_manifest_{interpreter_id}.json"
+
+
+def build_plugin_manifest() -> Dict[str, PluginInfo]:
+    """Build the plugin manifest from entry point metadata loading all plugins.
+
+    :return: Dictionary mapping plugin names to plugin infos
+    """
+    return {
+        name: get_plugin_info(entry_point.value, entry_point.load())
+        for name, entry_point in get_plugin_entry_points().items()
+    }
+
+
+def read_plugin_manifest(
+    path_manifest: Path, fingerprint: str
+) -> Optional[Dict[str, PluginInfo]]:
+    """Read a plugin manifest from disk.
+
+    :param path_manifest: Path to the manifest
+    :param fingerprint: Fingerprint of the installed distributions
+    :return: Plugin manifest or None if it does not exist or is outdated
+    """
+    try:
+        with path_manifest.open(encoding="utf-8") as manifest_file:
+            content = json.load(manifest_file)
+        if (
+            content["version"] != MANIFEST_VERSION
+            or content["fingerprint"] != fingerprint
+        ):
+            return None
+        return {name: PluginInfo(**info) for name, info in content["plugins"].items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def write_plugin_manifest(
+    path_manifest: Path, fingerprint: str, manifest: Dict[str, PluginInfo]
+) -> None:
+    """Write a plugin manifest to disk. Failing to do so is not considered an error.
+
+    :param path_manifest: Path to the manifest
+    :param fingerprint: Fingerprint of the installed distributions
+    :param manifest: Plugin manifest
+    """
+    content = {
+        "version": MANIFEST_VERSION,
+        "fingerprint": fingerprint,
+        "plugins": {name: info._asdict() for name, info in manifest.items()},
+    }
+    path_tmp = path_manifest.with_name(f"{path_manifest.name}.{os.getpid()}.tmp")
+    try:
+        path_manifest.parent.mkdir(parents=True, exist_ok=True)
+        with path_tmp.open("w", encoding="utf-8") as manifest_file:
+            json.dump(content, manifest_file)
+        os.replace(path_tmp, path_manifest)
+    except OSError:
+        path_tmp.unlink(missing_ok=True)
+
+
+def get_plugin_manifest() -> Dict[str, PluginInfo]:
+    """Get the manifest of installed plugins.
+
+    The manifest is read from the cache directory if it is still up to date,
+    otherwise it is rebuilt from the entry point metadata and cached.
+
+    :return: Dictionary mapping plugin names to plugin infos
+    """
+    fingerprint = get_dist_fingerprint()
+    path_manifest = get_manifest_path()
+    manifest = read_plugin_manifest(path_manifest, fingerprint)
+    if manifest is None:
+        manifest = build_plugin_manifest()
+        write_plugin_manifest(path_manifest, fingerprint, manifest)
+    return manifest
@@ -0,0 +1,49 @@
+"""Rich based components of the command line interface.
+
+Importing rich is comparably slow, so this module is only imported by
+`clifs.utils_cli` once one of its components is used.
+"""
+
+from typing import Iterable
+
+from rich.console import Console, RenderableType
+from rich.progress import Progress
+from rich.theme import Theme
+
+THEME_RICH = Theme(
+    {
+        "bar.complete": "default",
+        "bar.finished": "green",
+        "bar.back": "bright_black",
+        "progress.percentage": "default",
+        "progress.remaining": "bright_black",
+        "rule.line": "default",
+        "warning": "yellow",
+        "error": "red",
+        "folder": "yellow",
+        "regex_match": "underline bright_cyan",
+    },
+)
+
+
+def create_console() -> Console:
+    """Create a rich console using the clifs theme.
+
+    :return: Console
+    """
+    return Console(theme=THEME_RICH, highlight=False)
+
+
+class LastActionProgress(Progress):
+    """Progress showing the last action in a separate line."""
+
+    def get_renderables(self) -> Iterable[RenderableType]:
+        """Get a number of renderables for the progress display."""
+
+        table = self.make_tasks_table(self.tasks)
+        yield table
+        for task in self.tasks:
+            yield (
+                f"{task.fields.get('last_action_desc', 'Last action')}: "
+                f"{task.fields.get('last_action', '-')}"
+            )
@@ -0,0 +1,100 @@
+"""Utilities to communicate with a `clifs serve` process"""
+
+import io
+import json
+import os
+import shutil
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from clifs.utils_cache import get_cache_dir
+
+ENV_SOCKET = "CLIFS_SOCKET"
+
+
+def get_default_socket_path() -> Path:
+    """Get the default path of the socket `clifs serve` listens on.
+
+    :return: Socket path
+    """
+    return get_cache_dir() / "clifs.sock"
+
+
+def send_message(stream: io.BufferedIOBase, **message: Any) -> None:
+    """Send a message encoded as a line of JSON.
+
+    :param stream: Stream to write to
+    :param message: Message content
+    """
+    stream.write(json.dumps(message).encode("utf-8") + b"\n")
+    stream.flush()
+
+
+def receive_message(stream: io.BufferedIOBase) -> Optional[Dict[str, Any]]:
+    """Receive a message encoded as a line of JSON.
+
+    :param stream: Stream to read from
+    :return: Message content or None if the connection was closed
+    """
+    line = stream.readline()
+    if not line:
+        return None
+    message: Dict[str, Any] = json.loads(line)
+    return message
+
+
+def server_is_running(path_socket: Path) -> bool:
+    """Check if a server accepts connections at a socket.
+
+    :param path_socket: Socket the server listens on
+    :return: True if a server is running
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path_socket))
+        except OSError:
+            return False
+        return True
+
+
+def forward_to_server(path_socket: Path, argv: List[str]) -> Optional[int]:
+    """Run a clifs command in a `clifs serve` process.
+
+    Output of the command is written to stdout and stderr, input requested by the
+    command is read from stdin.
+
+    :param path_socket: Socket the server listens on
+    :param argv: Command line arguments without the program name
+    :return: Exit code of the command or None if the server is not reachable
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path_socket))
+        except OSError:
+            return None
+        stream = sock.makefile("rwb")
+        send_message(
+            stream,
+            argv=argv,
+            cwd=os.getcwd(),
+            isatty=sys.stdout.isatty(),
+            columns=shutil.get_terminal_size().columns if sys.stdout.isatty() else None,
+        )
+        while (message := receive_message(stream)) is not None:
+            if "stdout" in message:
+                sys.stdout.write(message["stdout"])
+                sys.stdout.flush()
+            elif "stderr" in message:
+                sys.stderr.write(message["stderr"])
+                sys.stderr.flush()
+            elif "input" in message:
+                send_message(stream, input=sys.stdin.readline())
+            elif "exit" in message:
+                exit_code: int = message["exit"]
+                return exit_code
+    print("Connection to clifs server lost.", file=sys.stderr)
+    return 1
@@ -0,0 +1,117 @@
+"""Column-oriented table of selected paths"""
+
+import os
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    from clifs.utils_fs import ScanEntry
+
+
+class PathTable:
+    """
+    Table of files and folders stored column by column.
+
+    Each parent directory is stored once and referenced by its id, names repeating
+    across directories are stored once as well. Parent ids and types are kept in
+    typed arrays, so a row takes a fraction of the memory of a `pathlib.Path`.
+    Masks over whole columns select rows, `select()` applies a mask to all columns
+    at once.
+    """
+
+    def __init__(self) -> None:
+        self.parents: List[str] = []
+        self._ids_parent: Dict[str, int] = {}
+        self._names: Dict[str, str] = {}
+
+        self.id_parent = array("L")
+        self.name: List[str] = []
+        self.is_dir = array("b")
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    def __iter__(self) -> Iterator[Path]:
+        return self.paths()
+
+    def append(self, entry: "ScanEntry") -> None:
+        """Add an item found while scanning.
+
+        :param entry: Scan entry of the item
+        """
+        path = entry.path
+        dir_parent = os.path.dirname(path)
+        id_parent = self._ids_parent.get(dir_parent)
+        if id_parent is None:
+            id_parent = self._ids_parent[dir_parent] = len(self.parents)
+            self.parents.append(dir_parent)
+
+        self.id_parent.append(id_parent)
+        self.name.append(self._names.setdefault(entry.name, entry.name))
+        self.is_dir.append(entry.is_dir())
+
+    def extend(self, entries: Iterable["ScanEntry"]) -> None:
+        """Add several items found while scanning.
+
+        :param entries: Scan entries of the items
+        """
+        for entry in entries:
+            self.append(entry)
+
+    def path_str(self, row: int) -> str:
+        """Get the path of an item as string.
+
+        :param row: Row of the item
+        :return: Path of the item
+        """
+        return os.path.join(self.parents[self.id_parent[row]], self.name[row])
+
+    def paths(self, rows: Optional[Iterable[int]] = None) -> Iterator[Path]:
+        """Iterate over the paths of the items.
+
+        :param rows: Rows of the items in the order to iterate over, defaults to all
+            rows in the order they were added
+        :return: Iterator over the paths
+        """
+        for row in range(len(self)) if rows is None else rows:
+            yield Path(self.path_str(row))
+
+    def mask_files(self) -> List[bool]:
+        """Get a mask selecting files only.
+
+        :return: Mask with one boolean per row
+        """
+        return [not is_dir for is_dir in self.is_dir]
+
+    def mask_dirs(self) -> List[bool]:
+        """Get a mask selecting folders only.
+
+        :return: Mask with one boolean per row
+        """
+        return [bool(is_dir) for is_dir in self.is_dir]
+
+    def select(self, mask: Iterable[bool]) -> "PathTable":
+        """Get a table of the items selected by a mask.
+
+        :param mask: Mask with one boolean per row, e.g. combined from several masks
+            by `map(operator.and_, mask_a, mask_b)`
+        :return: Table of the selected items, sharing the parent directories with
+            this table
+        """
+        return self.take([row for row, selected in enumerate(mask) if selected])
+
+    def take(self, rows: List[int]) -> "PathTable":
+        """Get a table of the items in the given rows.
+
+        :param rows: Rows of the items in the order of the new table
+        :return: Table of the items, sharing the parent directories with this table
+        """
+        table = PathTable()
+        table.parents = self.parents
+        table._ids_parent = self._ids_parent  # pylint: disable=protected-access
+        table._names = self._names  # pylint: disable=protected-access
+        table.name = [self.name[row] for row in rows]
+        table.id_parent = array("L", [self.id_parent[row] for row in rows])
+        table.is_dir = array("b", [self.is_dir[row] for row in rows])
+        return table
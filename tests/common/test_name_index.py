@@ -0,0 +1,78 @@
+"""Test getting unique file names with and without the name index"""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from clifs.utils_fs import NameIndex, get_unique_path
+from tests.common.utils_testing import parametrize_default_ids
+
+
+@parametrize_default_ids(
+    ["names_present", "name_candidate"],
+    [
+        ([], "a.txt"),
+        (["a.txt"], "a.txt"),
+        (["a.txt", "a (2).txt", "a (3).txt"], "a.txt"),
+        (["a.txt", "a (3).txt"], "a.txt"),
+        (["a (2).txt", "a (3).txt", "a (5).txt"], "a (2).txt"),
+        (["a.txt", "a (2).tar.gz"], "a.txt"),
+        (["a b (7)", "a b (8)"], "a b (7)"),
+    ],
+)
+def test_name_index(dir_testrun, names_present, name_candidate):
+    for name in names_present:
+        (dir_testrun / name).touch()
+    path_exp = get_unique_path(dir_testrun / name_candidate)
+    assert (
+        get_unique_path(dir_testrun / name_candidate, name_index=NameIndex())
+        == path_exp
+    )
+
+
+def test_name_index_updates(dir_testrun):
+    num_files = 50
+    (dir_testrun / "a.txt").touch()
+    name_index = NameIndex()
+    calls_lexists = []
+    lexists_orig = os.path.lexists
+
+    def lexists_counting(path):
+        calls_lexists.append(path)
+        return lexists_orig(path)
+
+    with patch("clifs.utils_fs.os.path.lexists", lexists_counting):
+        for _ in range(num_files):
+            path_new = get_unique_path(dir_testrun / "a.txt", name_index=name_index)
+            assert path_new == get_unique_path(dir_testrun / "a.txt")
+            path_new.touch()
+            name_index.add(path_new)
+    # a single check on disk per name found
+    assert len(calls_lexists) == num_files
+
+    # names freed are used again
+    name_index.discard(dir_testrun / "a (7).txt")
+    (dir_testrun / "a (7).txt").unlink()
+    assert name_index.get_unique_path(dir_testrun / "a.txt") == (
+        dir_testrun / "a (7).txt"
+    )
+
+    name_index.add(dir_testrun / "a (7).txt")
+
+    # names taken by others are not used
+    (dir_testrun / f"a ({num_files + 2}).txt").touch()
+    assert name_index.get_unique_path(dir_testrun / "a.txt") == (
+        dir_testrun / f"a ({num_files + 3}).txt"
+    )
+
+    # names discarded are free even if present on disk
+    name_index.discard(dir_testrun / "a (3).txt")
+    assert name_index.get_unique_path(dir_testrun / "a.txt") == (
+        dir_testrun / "a (3).txt"
+    )
+
+    with pytest.raises(ValueError):
+        get_unique_path(
+            dir_testrun / "a.txt", set_taken={dir_testrun}, name_index=name_index
+        )
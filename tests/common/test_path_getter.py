@@ -1,14 +1,19 @@
 """Test the path getter mixin class"""
 
+import gc
 import os
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
 from unittest.mock import patch
 
+import pytest
 from dateutil.relativedelta import relativedelta
 
-from clifs.utils_fs import PathGetterMixin
+from clifs import utils_fs
+from clifs.utils_fs import PathGetterMixin, PathStream, scan_tree
+from clifs.utils_index import ScanIndex
 from tests.common.utils_testing import parametrize_default_ids
 
 
@@ -164,3 +169,509 @@ def test_time_filters(
             assert set(dirs_found) == set(
                 x.resolve() for x in dir.rglob("*") if x.is_dir()
             )
+
+
+@pytest.mark.skipif(os.name == "nt", reason="symlinks require privileges on Windows")
+def test_scan_tree_symlinks(tmp_path):
+    (tmp_path / "dir").mkdir()
+    (tmp_path / "dir" / "file.txt").touch()
+    (tmp_path / "link_dir").symlink_to(tmp_path / "dir")
+    (tmp_path / "link_file.txt").symlink_to(tmp_path / "dir" / "file.txt")
+
+    # symlinks are listed with their own path but linked directories are not followed
+    assert sorted(entry.path for entry in scan_tree(str(tmp_path), True)) == [
+        str(tmp_path / "dir"),
+        str(tmp_path / "dir" / "file.txt"),
+        str(tmp_path / "link_dir"),
+        str(tmp_path / "link_file.txt"),
+    ]
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = tmp_path
+    path_getter.recursive = True
+    path_getter.filterlist = None
+    path_getter.filterstring = "link"
+    files, dirs = path_getter.get_paths()
+    assert files == [tmp_path / "link_file.txt"]
+    assert dirs == [tmp_path / "link_dir"]
+
+
+def test_scan_tree_missing_dir(tmp_path):
+    assert list(scan_tree(str(tmp_path / "not_existing"), True)) == []
+
+
+@pytest.mark.skipif(
+    os.name == "nt" or os.geteuid() == 0,
+    reason="permissions are not enforced on Windows or for root",
+)
+@parametrize_default_ids("walker", ["scan_tree", "cache", "index"])
+def test_scan_unreadable_dir(tmp_path, walker):
+    (tmp_path / "locked").mkdir()
+    (tmp_path / "locked" / "file.txt").touch()
+    (tmp_path / "open").mkdir()
+    (tmp_path / "open" / "file.txt").touch()
+    os.chmod(tmp_path / "locked", 0o000)
+    try:
+        if walker == "scan_tree":
+            entries = scan_tree(str(tmp_path), True)
+        elif walker == "cache":
+            entries = utils_fs.DirListingCache().walk(str(tmp_path), recursive=True)
+        else:
+            entries = ScanIndex(tmp_path / "index.sqlite3").walk(str(tmp_path), True)
+        # directories which cannot be listed are skipped
+        assert sorted(entry.path for entry in entries) == [
+            str(tmp_path / "locked"),
+            str(tmp_path / "open"),
+            str(tmp_path / "open" / "file.txt"),
+        ]
+    finally:
+        os.chmod(tmp_path / "locked", 0o755)
+
+
+def test_dir_listing_cache_missing_dir(tmp_path):
+    (tmp_path / "sub").mkdir()
+    os.utime(tmp_path / "sub", (1e9, 1e9))
+    cache = utils_fs.DirListingCache()
+    assert cache.list_dir(str(tmp_path / "sub")) == []
+    assert cache.hits == 0 and cache.misses == 1
+    (tmp_path / "sub").rmdir()
+    # the listing of a removed directory is dropped from the cache
+    assert cache.list_dir(str(tmp_path / "sub")) == []
+    os.mkdir(tmp_path / "sub")
+    os.utime(tmp_path / "sub", (1e9, 1e9))
+    assert cache.list_dir(str(tmp_path / "sub")) == []
+    assert cache.hits == 0 and cache.misses == 2
+    assert list(cache.walk(str(tmp_path / "sub"), recursive=True)) == []
+
+    # directories removed while scanning are skipped
+    def scandir_removed(path):
+        raise FileNotFoundError(path)
+
+    with patch("os.scandir", scandir_removed):
+        assert list(cache.walk(str(tmp_path), recursive=True)) == []
+
+
+class CountingEntry:
+    def __init__(self, entry, stat_calls):
+        self._entry = entry
+        self._stat_calls = stat_calls
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self):
+        return self._entry.is_dir()
+
+    def stat(self):
+        self._stat_calls.append(self.name)
+        return self._entry.stat()
+
+
+@parametrize_default_ids("use_cache", [False, True])
+def test_single_stat_per_entry(dirs_source, use_cache):
+    stat_calls = []
+    scan_orig = PathGetterMixin._scan
+
+    def scan_counting(*args):
+        for entry in scan_orig(*args):
+            yield CountingEntry(entry, stat_calls)
+
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dirs_source[0]
+    path_getter.recursive = True
+    path_getter.filterlist = None
+    path_getter.filterstring = ".txt"
+    path_getter.mtime_stamp_newer = "1d"
+    path_getter.ctime_stamp_newer = "1d"
+
+    with patch.object(
+        utils_fs, "SCAN_CACHE", utils_fs.DirListingCache() if use_cache else None
+    ), patch.object(PathGetterMixin, "_scan", staticmethod(scan_counting)):
+        files, dirs = path_getter.get_entries()
+
+    # only items matching the name filter are stat'ed, each one once
+    assert files
+    assert sorted(stat_calls) == sorted(x.name for x in dirs_source[0].rglob("*.txt"))
+    assert all(file.path.name.endswith(".txt") for file in files)
+
+
+def test_filterlist_relative(dir_testrun):
+    dir_source = dir_testrun / "source"
+    for path_rel in ["a/file.txt", "b/file.txt", "b/c/file.txt", "d/file.txt"]:
+        (dir_source / path_rel).parent.mkdir(parents=True, exist_ok=True)
+        (dir_source / path_rel).touch()
+    path_filterlist = dir_testrun / "list_relative.txt"
+    path_filterlist.write_text("b/file.txt\n./b/c\nnot/existing.txt\n")
+
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dir_source
+    path_getter.recursive = True
+    path_getter.filterlist = path_filterlist
+    path_getter.filterlistheader = None
+    path_getter.filterstring = None
+
+    # names only
+    files, dirs = path_getter.get_paths()
+    assert files == []
+    assert dirs == []
+
+    # relative paths
+    path_getter.filterlistrelative = True
+    files, dirs = path_getter.get_paths()
+    assert files == [dir_source.resolve() / "b" / "file.txt"]
+    assert dirs == [dir_source.resolve() / "b" / "c"]
+
+
+def test_filterlist_relative_stops_early(dir_testrun):
+    dir_source = dir_testrun / "source"
+    for idx in range(10):
+        (dir_source / f"dir_{idx}").mkdir(parents=True)
+        for idx_file in range(5):
+            (dir_source / f"dir_{idx}" / f"file_{idx_file}.txt").touch()
+    path_filterlist = dir_testrun / "list_relative.txt"
+    path_filterlist.write_text("dir_0\n")
+
+    scanned = []
+    scan_orig = PathGetterMixin._scan
+
+    def scan_tracked(*args):
+        for entry in scan_orig(*args):
+            scanned.append(entry.name)
+            yield entry
+
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dir_source
+    path_getter.recursive = True
+    path_getter.filterlist = path_filterlist
+    path_getter.filterlistheader = None
+    path_getter.filterlistrelative = True
+    path_getter.filterstring = None
+    with patch.object(PathGetterMixin, "_scan", staticmethod(scan_tracked)):
+        files, dirs = path_getter.get_paths()
+    assert files == []
+    assert dirs == [dir_source.resolve() / "dir_0"]
+    # sub-directories are not scanned once the listed directory is found
+    assert "dir_0" in scanned
+    assert len(scanned) <= 10 + 1
+
+
+@parametrize_default_ids("use_cache", [False, True])
+@parametrize_default_ids(
+    ["recursive", "max_depth", "min_depth"],
+    [
+        (False, None, None),
+        (True, None, None),
+        (False, 2, None),
+        (True, 1, None),
+        (False, None, 2),
+        (True, None, 3),
+        (False, 2, 2),
+        (False, 0, None),
+    ],
+)
+def test_depth_limits(dirs_source, recursive, max_depth, min_depth, use_cache):
+    dir = dirs_source[0]
+    opened = []
+    scandir_orig = os.scandir
+
+    def scandir_tracked(path):
+        opened.append(len(Path(path).relative_to(dir).parts) + 1)
+        return scandir_orig(path)
+
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dir
+    path_getter.recursive = recursive
+    path_getter.max_depth = max_depth
+    path_getter.min_depth = min_depth
+    path_getter.filterlist = None
+    path_getter.filterstring = None
+
+    with patch.object(
+        utils_fs, "SCAN_CACHE", utils_fs.DirListingCache() if use_cache else None
+    ), patch("os.scandir", scandir_tracked):
+        files, dirs = path_getter.get_paths()
+
+    max_depth_exp = max_depth if max_depth is not None else (None if recursive else 1)
+    exp = [
+        path
+        for path in dir.rglob("*")
+        if (max_depth_exp is None or len(path.relative_to(dir).parts) <= max_depth_exp)
+        and (min_depth is None or len(path.relative_to(dir).parts) >= min_depth)
+    ]
+    assert files == [path for path in exp if not path.is_dir()]
+    assert dirs == [path for path in exp if path.is_dir()]
+    # directories beyond the depth limit are never opened
+    if max_depth_exp is not None:
+        assert all(depth <= max_depth_exp for depth in opened)
+
+
+def test_iter_paths(dirs_source):
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dirs_source[0]
+    path_getter.recursive = True
+    path_getter.filterlist = None
+    path_getter.filterstring = None
+
+    files_exp, dirs_exp = path_getter.get_paths()
+    stream = path_getter.iter_paths()
+    assert stream
+    assert list(stream) == files_exp
+    assert stream.done
+    assert stream.num_found == len(files_exp)
+    assert list(path_getter.iter_paths(include_dirs=True)) == list(
+        dirs_source[0].rglob("*")
+    )
+    assert sorted(files_exp + dirs_exp) == sorted(dirs_source[0].rglob("*"))
+
+    path_getter.filterstring = "does_not_exist"
+    stream = path_getter.iter_paths()
+    assert not stream
+    assert list(stream) == []
+
+
+def test_path_stream_bounded():
+    def paths():
+        for idx in range(100):
+            yield Path(f"file_{idx}")
+
+    stream = PathStream(paths(), max_buffered=5)
+    iterator = iter(stream)
+    assert next(iterator) == Path("file_0")
+    time.sleep(0.1)
+    # the scan pauses as long as the buffer is full
+    assert stream.num_found <= 1 + 5 + 1
+    assert not stream.done
+    assert list(iterator) == [Path(f"file_{idx}") for idx in range(1, 100)]
+    assert stream.done
+    assert stream.num_found == 100
+
+
+def test_path_stream_abandoned():
+    stopped = threading.Event()
+
+    def paths():
+        try:
+            for idx in range(100):
+                yield Path(f"file_{idx}")
+        finally:
+            stopped.set()
+
+    stream = PathStream(paths(), max_buffered=1)
+    assert stream
+    del stream
+    gc.collect()
+    assert stopped.wait(timeout=5)
+
+
+def test_path_stream_stopped_without_matches(dir_testrun):
+    dir_source = dir_testrun / "many_dirs"
+    for idx in range(200):
+        (dir_source / f"dir_{idx}").mkdir(parents=True)
+        (dir_source / f"dir_{idx}" / "file.txt").touch()
+    listings = []
+    scandir = os.scandir
+
+    def scandir_slow(path):
+        listings.append(path)
+        time.sleep(0.01)
+        return scandir(path)
+
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dir_source
+    path_getter.recursive = True
+    path_getter.filterlist = None
+    path_getter.filterstring = "does_not_exist"
+    with patch("os.scandir", scandir_slow):
+        stream = path_getter.iter_paths()
+        time.sleep(0.1)
+        time_start = time.perf_counter()
+        del stream
+        gc.collect()
+        # stopping does not wait for the scan to find a match or to finish
+        assert time.perf_counter() - time_start < 0.5
+        time.sleep(0.1)
+        num_listings = len(listings)
+        time.sleep(0.1)
+    assert len(listings) == num_listings < 200
+
+
+def test_path_stream_error():
+    def paths():
+        yield Path("file")
+        raise OSError("scan failed")
+
+    stream = PathStream(paths())
+    iterator = iter(stream)
+    assert next(iterator) == Path("file")
+    with pytest.raises(OSError, match="scan failed"):
+        next(iterator)
+
+
+@parametrize_default_ids("max_depth", [None, 2])
+def test_scan_tree_workers(dirs_source, max_depth):
+    for dir in dirs_source:
+        entries_exp = [
+            entry.path for entry in scan_tree(str(dir), True, max_depth=max_depth)
+        ]
+        entries = [
+            entry.path
+            for entry in scan_tree(str(dir), True, max_depth=max_depth, workers=4)
+        ]
+        assert entries == entries_exp
+
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dirs_source[0]
+    path_getter.recursive = True
+    path_getter.filterlist = None
+    path_getter.filterstring = None
+    paths_exp = path_getter.get_paths()
+    path_getter.scan_workers = 4
+    assert path_getter.get_paths() == paths_exp
+
+
+@parametrize_default_ids(
+    ["size_larger", "size_smaller", "names_exp"],
+    [
+        ("1kB", None, ["file_2000.txt", "file_5000.txt"]),
+        (None, "2KiB", ["file_0.txt", "file_2000.txt", "file_500.txt"]),
+        ("0.2 kb", "2.5kB", ["file_2000.txt", "file_500.txt"]),
+        ("5000", None, []),
+    ],
+)
+def test_size_filter(dir_testrun, size_larger, size_smaller, names_exp):
+    dir_source = dir_testrun / "source"
+    (dir_source / "sub_dir").mkdir(parents=True)
+    for size in [0, 500, 2000, 5000]:
+        (dir_source / f"file_{size}.txt").write_bytes(b"x" * size)
+
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dir_source
+    path_getter.recursive = True
+    path_getter.filterlist = None
+    path_getter.filterstring = None
+    path_getter.size_larger = size_larger
+    path_getter.size_smaller = size_smaller
+
+    files, dirs = path_getter.get_paths()
+    assert sorted(file.name for file in files) == names_exp
+    assert not dirs
+
+
+def test_size_threshold_invalid():
+    assert PathGetterMixin._get_size_threshold("1.5MiB") == int(1.5 * 1024**2)
+    with pytest.raises(SystemExit):
+        PathGetterMixin._get_size_threshold("1.5 megabytes")
+
+
+def test_largest(dir_testrun):
+    dir_source = dir_testrun / "source"
+    sizes = [300, 100, 500, 200, 400, 0]
+    for idx, size in enumerate(sizes):
+        dir_sub = dir_source / f"sub_dir_{idx % 2}"
+        dir_sub.mkdir(parents=True, exist_ok=True)
+        (dir_sub / f"file_{size}.txt").write_bytes(b"x" * size)
+
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dir_source
+    path_getter.recursive = True
+    path_getter.filterlist = None
+    path_getter.filterstring = None
+    path_getter.largest = 3
+
+    files, dirs = path_getter.get_paths()
+    assert [file.name for file in files] == [
+        "file_500.txt",
+        "file_400.txt",
+        "file_300.txt",
+    ]
+    assert not dirs
+    assert list(path_getter.iter_paths()) == files
+
+    path_getter.largest = 10
+    assert len(path_getter.get_paths()[0]) == len(sizes)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="symlinks require privileges on Windows")
+@parametrize_default_ids(
+    ["option", "value"],
+    [("size_larger", "1"), ("largest", 2), ("mtime_stamp_newer", "1")],
+)
+def test_stat_filters_broken_symlink(dir_testrun, option, value):
+    dir_source = dir_testrun / "source"
+    dir_source.mkdir()
+    (dir_source / "file.txt").write_text("content")
+    (dir_source / "broken").symlink_to(dir_source / "does_not_exist")
+
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dir_source
+    path_getter.recursive = True
+    path_getter.filterlist = None
+    path_getter.filterstring = None
+    setattr(path_getter, option, value)
+
+    # items which cannot be stat'ed are not selected
+    files, _ = path_getter.get_paths()
+    assert [file.name for file in files] == ["file.txt"]
+
+
+def test_include_exclude(dir_testrun):
+    dir_source = dir_testrun / "source"
+    for path_rel in [
+        "a.log",
+        "b.gz",
+        "c.txt",
+        "sub/d.log",
+        "sub/tmp/e.log",
+        "tmp/f.gz",
+        "keep/g.log",
+    ]:
+        (dir_source / path_rel).parent.mkdir(parents=True, exist_ok=True)
+        (dir_source / path_rel).touch()
+    path_ignore = dir_testrun / "ignore"
+    path_ignore.write_text("keep/\n")
+
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dir_source
+    path_getter.recursive = True
+    path_getter.filterlist = None
+    path_getter.filterstring = None
+    path_getter.include = ["*.log"]
+    path_getter.include_regex = [r"\.gz$"]
+    path_getter.exclude = ["tmp/"]
+    path_getter.ignore_file = path_ignore
+
+    dirs_listed = []
+    list_dir_orig = utils_fs._list_dir
+
+    def list_dir_counting(path):
+        dirs_listed.append(Path(path).name)
+        return list_dir_orig(path)
+
+    with patch.object(utils_fs, "_list_dir", list_dir_counting):
+        files, dirs = path_getter.get_paths()
+
+    assert sorted(file.relative_to(dir_source).as_posix() for file in files) == [
+        "a.log",
+        "b.gz",
+        "sub/d.log",
+    ]
+    assert not dirs
+    # excluded directories are not read
+    assert sorted(dirs_listed) == ["source", "sub"]
+
+    # same selection from the directory listing cache and the scan index
+    with patch.object(utils_fs, "SCAN_CACHE", utils_fs.DirListingCache()):
+        assert path_getter.get_paths() == (files, dirs)
+    path_getter.use_index = True
+    assert path_getter.get_paths() == (files, dirs)
+
+    # excluding folders by regex skips them along with everything below them
+    path_getter.use_index = False
+    path_getter.exclude = None
+    path_getter.exclude_regex = ["(^|/)tmp/"]
+    dirs_listed.clear()
+    with patch.object(utils_fs, "_list_dir", list_dir_counting):
+        assert path_getter.get_paths() == (files, dirs)
+    assert sorted(dirs_listed) == ["source", "sub"]
+
+    path_getter.exclude_regex = ["["]
+    with pytest.raises(SystemExit):
+        path_getter.get_paths()
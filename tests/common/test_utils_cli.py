@@ -0,0 +1,66 @@
+"""Test the command line interface utilities"""
+
+import subprocess
+import sys
+
+from rich.text import Text
+
+from clifs.utils_cli import MatchHighlighter, PlainConsole, print_line, strip_markup
+from clifs.utils_plugins import get_plugin_manifest
+from tests.common.utils_testing import parametrize_default_ids
+
+CODE_LIST_MODULES = """
+import sys
+from clifs.__main__ import main
+try:
+    main()
+finally:
+    heavy = [m for m in sys.modules if m.split(".")[0] in ("rich", "dateutil")]
+    print("HEAVY_MODULES:", ",".join(sorted(heavy)), file=sys.stderr)
+"""
+
+
+@parametrize_default_ids(
+    ["markup", "exp_plain"],
+    [
+        ("[red]error[/red]", "error"),
+        ("[bold red]a[/] b", "a b"),
+        ("list\\[1]", "list[1]"),
+        ("[link=https://x.y]link[/link]", "link"),
+        ("no [1] tag", "no [1] tag"),
+        ("\\[red]escaped", "[red]escaped"),
+        ("\\\\[red]backslash[/red]", "\\backslash"),
+        ("C:\\some\\dir\\", "C:\\some\\dir\\"),
+    ],
+)
+def test_strip_markup(markup, exp_plain):
+    assert strip_markup(markup) == exp_plain
+
+
+def test_plain_console(capsys):
+    console = PlainConsole()
+    console.print("[cyan]text[/cyan]", Text("rich text"), 1)
+    print_line(console, "TITLE")
+    console.print(MatchHighlighter("a")("abc"), end="")
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == "text rich text 1"
+    assert "TITLE" in out[1]
+    assert len(out[1]) == 80
+    assert out[2] == "abc"
+
+
+@parametrize_default_ids(
+    "argv",
+    [["--version"], ["du", "."], ["del", ".", "-fs", "does_not_exist", "-sp"]],
+)
+def test_startup_budget(argv, tmp_path):
+    """Non-interactive runs must not import rich or other heavy modules"""
+    get_plugin_manifest()  # make sure the manifest is cached
+    res = subprocess.run(
+        [sys.executable, "-c", CODE_LIST_MODULES, *argv],
+        capture_output=True,
+        text=True,
+        cwd=tmp_path,
+        check=False,
+    )
+    assert "HEAVY_MODULES: \n" in res.stderr, res.stderr
@@ -0,0 +1,89 @@
+"""Test copying files by the copy engines"""
+
+import errno
+import os
+import shutil
+
+import pytest
+
+from clifs.utils_copy import ENGINE_READ_WRITE, CopyEngine, fast_copy, get_engines
+from tests.common.utils_testing import parametrize_default_ids
+
+
+@pytest.fixture(scope="function")
+def file_source(tmp_path):
+    path = tmp_path / "source.bin"
+    path.write_bytes(os.urandom(3 * 2**20 + 7))
+    os.chmod(path, 0o640)
+    os.utime(path, (1e9, 1e9))
+    return path
+
+
+def assert_copied(path_source, path_dest):
+    assert path_dest.read_bytes() == path_source.read_bytes()
+    stat_source, stat_dest = path_source.stat(), path_dest.stat()
+    assert stat_dest.st_mtime == stat_source.st_mtime
+    assert stat_dest.st_mode == stat_source.st_mode
+
+
+def test_fast_copy(file_source):
+    path_dest = file_source.with_name("dest.bin")
+    path_dest.write_bytes(b"previous content longer than nothing")
+    fast_copy(file_source, path_dest)
+    assert_copied(file_source, path_dest)
+
+    path_empty = file_source.with_name("empty.bin")
+    path_empty.write_bytes(b"")
+    fast_copy(path_empty, path_dest)
+    assert path_dest.read_bytes() == b""
+
+
+@parametrize_default_ids("engine", get_engines())
+def test_fast_copy_engines(file_source, engine):
+    path_dest = file_source.with_name("dest.bin")
+    # engines not supported for the files fall back to the buffered copy
+    name = fast_copy(file_source, path_dest, [engine, ENGINE_READ_WRITE])
+    assert name in (engine.name, ENGINE_READ_WRITE.name)
+    assert_copied(file_source, path_dest)
+
+
+def test_fast_copy_fallback(file_source):
+    calls = []
+
+    def copy_partially(fd_source, fd_dest):
+        calls.append(fd_source)
+        os.write(fd_dest, os.read(fd_source, 100))
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    def copy_failing(fd_source, fd_dest):
+        raise OSError(errno.EIO, "Input/output error")
+
+    path_dest = file_source.with_name("dest.bin")
+    engine_partial = CopyEngine("test_partial", copy_partially, same_device=False)
+    assert fast_copy(file_source, path_dest, [engine_partial, ENGINE_READ_WRITE]) == (
+        ENGINE_READ_WRITE.name
+    )
+    assert_copied(file_source, path_dest)
+
+    # engines known not to work are skipped
+    with pytest.raises(OSError) as exc_info:
+        fast_copy(file_source, path_dest, [engine_partial])
+    assert exc_info.value.errno == errno.ENOTSUP
+    assert len(calls) == 1
+
+    engine_failing = CopyEngine("test_failing", copy_failing, same_device=False)
+    with pytest.raises(OSError) as exc_info:
+        fast_copy(file_source, path_dest, [engine_failing, ENGINE_READ_WRITE])
+    assert exc_info.value.errno == errno.EIO
+
+
+def test_fast_copy_errors(file_source):
+    content = file_source.read_bytes()
+    with pytest.raises(shutil.SameFileError):
+        fast_copy(file_source, file_source)
+    assert file_source.read_bytes() == content
+
+    with pytest.raises(OSError):
+        fast_copy(file_source, file_source.parent)
+    with pytest.raises(FileNotFoundError):
+        fast_copy(file_source.with_name("missing.bin"), file_source)
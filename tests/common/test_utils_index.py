@@ -0,0 +1,107 @@
+"""Test the persistent scan index"""
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from clifs.utils_fs import PathGetterMixin, scan_tree
+from clifs.utils_index import ScanIndex, get_index_path
+
+
+def set_old_mtimes(dir):
+    for path in [dir, *dir.rglob("*")]:
+        os.utime(path, (1e9, 1e9))
+
+
+def walk_paths(index, root):
+    return [entry.path for entry in index.walk(str(root), recursive=True)]
+
+
+def test_index_walk(dirs_source):
+    dir = dirs_source[0]
+    set_old_mtimes(dir)
+    paths_exp = [entry.path for entry in scan_tree(str(dir), recursive=True)]
+
+    index = ScanIndex()
+    assert walk_paths(index, dir) == paths_exp
+    assert index.hits == 0
+    assert index.misses > 0
+    assert get_index_path().exists()
+
+    # second walk is served from the index, also by a new instance
+    index = ScanIndex()
+    assert walk_paths(index, dir) == paths_exp
+    assert index.misses == 0
+    assert index.hits > 0
+
+    # stat results are taken from the index
+    entries = {entry.path: entry for entry in index.walk(str(dir), recursive=True)}
+    for path in dir.rglob("*"):
+        assert entries[str(path)].is_dir() == path.is_dir()
+        assert entries[str(path)].is_file() == path.is_file()
+        if path.is_file():
+            assert entries[str(path)].stat().st_size == path.stat().st_size
+            assert entries[str(path)].stat().st_mtime == 1e9
+
+
+def test_index_incremental(dirs_source):
+    dir = dirs_source[0]
+    set_old_mtimes(dir)
+    walk_paths(ScanIndex(), dir)
+
+    # changed directories are re-listed only
+    (dir / "subdir_1" / "new_file.txt").touch()
+    subdir_removed = dir / "subdir_2"
+    for path in subdir_removed.iterdir():
+        path.unlink()
+    subdir_removed.rmdir()
+
+    index = ScanIndex()
+    paths = walk_paths(index, dir)
+    assert paths == [entry.path for entry in scan_tree(str(dir), recursive=True)]
+    assert str(dir / "subdir_1" / "new_file.txt") in paths
+    assert index.misses == 2
+    assert index.hits > 0
+
+    # directories modified within the last seconds are re-listed
+    index = ScanIndex()
+    walk_paths(index, dir)
+    assert index.misses == 2
+
+
+@pytest.mark.parametrize("recursive", [False, True])
+def test_get_paths_from_index(dirs_source, recursive):
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dirs_source[0]
+    path_getter.recursive = recursive
+    path_getter.filterlist = None
+    path_getter.filterstring = "file"
+    paths_exp = path_getter.get_paths()
+
+    path_getter.use_index = True
+    assert path_getter.get_paths() == paths_exp
+    assert path_getter.get_paths() == paths_exp
+
+
+def test_time_filter_verified_on_disk(dirs_source):
+    dir = dirs_source[0]
+    set_old_mtimes(dir)
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dir
+    path_getter.recursive = True
+    path_getter.filterlist = None
+    path_getter.filterstring = None
+    path_getter.mtime_stamp_older = "1d"
+    path_getter.use_index = True
+    files, _ = path_getter.get_paths()
+    assert files
+
+    # modifying a file does not change its directory, so the index is outdated
+    path_modified = files[0]
+    now = time.time()
+    os.utime(path_modified, (now, now))
+    files_new, _ = path_getter.get_paths()
+    assert files_new == [path for path in files if path != path_modified]
+    assert isinstance(files_new[0], Path)
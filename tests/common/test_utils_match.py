@@ -0,0 +1,127 @@
+"""Test matching paths against glob patterns and regexes"""
+
+import os
+
+import pytest
+
+from clifs.utils_match import (
+    PathMatcher,
+    read_ignore_file,
+    translate_glob,
+    translate_regex,
+)
+from tests.common.utils_testing import parametrize_default_ids
+
+
+class Entry:
+    def __init__(self, path, is_dir=False):
+        self.path = os.path.join(os.sep, "root", *path.split("/"))
+        self.name = path.split("/")[-1]
+        self._is_dir = is_dir
+
+    def is_dir(self):
+        return self._is_dir
+
+
+@parametrize_default_ids(
+    ["pattern", "path", "is_dir", "match_exp"],
+    [
+        ("*.log", "a.log", False, True),
+        ("*.log", "sub/dir/a.log", False, True),
+        ("*.log", "a.log.gz", False, False),
+        ("tmp/", "sub/tmp", True, True),
+        ("tmp/", "sub/tmp", False, False),
+        ("tmp", "sub/tmp", False, True),
+        ("/tmp", "sub/tmp", True, False),
+        ("/tmp", "tmp", True, True),
+        ("sub/*.txt", "sub/a.txt", False, True),
+        ("sub/*.txt", "sub/dir/a.txt", False, False),
+        ("sub/*.txt", "other/sub/a.txt", False, False),
+        ("sub/**/a.txt", "sub/a.txt", False, True),
+        ("sub/**/a.txt", "sub/x/y/a.txt", False, True),
+        ("**/sub", "x/y/sub", True, True),
+        ("sub/**", "sub/x/y", False, True),
+        ("sub/**", "sub", True, False),
+        ("file_?.[tc]sv", "file_1.csv", False, True),
+        ("file_?.[!tc]sv", "file_1.csv", False, False),
+        ("\\#file", "#file", False, True),
+    ],
+)
+def test_translate_glob(pattern, path, is_dir, match_exp):
+    matcher = PathMatcher(os.path.join(os.sep, "root"), [translate_glob(pattern)])
+    assert matcher(Entry(path, is_dir)) == match_exp
+
+
+@pytest.mark.parametrize("pattern", ["", "  ", "# comment", "/"])
+def test_translate_glob_empty(pattern):
+    assert translate_glob(pattern) is None
+
+
+def test_matcher_combined():
+    rules = [
+        translate_glob("*.log"),
+        translate_glob("*.gz"),
+        translate_glob("!keep*"),
+        translate_regex(r"^build/.*\.o$"),
+    ]
+    matcher = PathMatcher(os.path.join(os.sep, "root"), rules)
+    assert matcher(Entry("x/a.log"))
+    assert matcher(Entry("a.gz"))
+    assert not matcher(Entry("x/keep.log"))
+    assert matcher(Entry("build/x/main.o"))
+    assert not matcher(Entry("src/build/main.o"))
+    assert not matcher(Entry("a.txt"))
+    assert not PathMatcher(os.path.join(os.sep, "root"), [])(Entry("a.txt"))
+
+
+@parametrize_default_ids(
+    ["pattern", "path", "match_exp"],
+    [
+        ("(?i)tmp", "sub/TMP/a.txt", True),
+        ("(?i)tmp", "sub/other/a.txt", False),
+        (r"(l)o\1", "lol.txt", True),
+        (r"(l)o\1", "lot.txt", False),
+        (r"^sub/.*\.txt$", "sub/a.txt", True),
+    ],
+)
+def test_translate_regex(pattern, path, match_exp):
+    rules = [
+        translate_glob("*.txt"),
+        translate_glob("!*.txt"),
+        translate_regex(pattern),
+    ]
+    matcher = PathMatcher(os.path.join(os.sep, "root"), rules)
+    assert matcher(Entry(path)) == match_exp
+    # rules after a searching rule take precedence
+    matcher = PathMatcher(
+        os.path.join(os.sep, "root"), [*rules, translate_glob("!*.txt")]
+    )
+    assert not matcher(Entry(path))
+
+
+@parametrize_default_ids(
+    ["pattern", "path", "is_dir", "match_exp"],
+    [
+        ("tmp/", "sub/tmp", True, True),
+        ("tmp/", "sub/tmp", False, False),
+        ("tmp/", "sub/tmp/a.txt", False, True),
+        ("^tmp$", "tmp", True, False),
+        ("^tmp/$", "tmp", True, True),
+        ("^tmp$", "tmp", False, True),
+    ],
+)
+def test_translate_regex_dirs(pattern, path, is_dir, match_exp):
+    # paths of folders end with a '/'
+    matcher = PathMatcher(os.path.join(os.sep, "root"), [translate_regex(pattern)])
+    assert matcher(Entry(path, is_dir)) == match_exp
+
+
+def test_read_ignore_file(dir_testrun):
+    path_ignore = dir_testrun / ".clifsignore"
+    path_ignore.write_text("# logs\n*.log\n\n!important.log\ncache/\n")
+    rules = read_ignore_file(path_ignore)
+    assert len(rules) == 3
+    matcher = PathMatcher(os.path.join(os.sep, "root"), rules)
+    assert matcher(Entry("a.log"))
+    assert not matcher(Entry("important.log"))
+    assert matcher(Entry("x/cache", is_dir=True))
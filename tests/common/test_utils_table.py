@@ -0,0 +1,53 @@
+"""Test the column-oriented path table"""
+
+from pathlib import Path
+
+from clifs.utils_fs import PathGetterMixin, scan_tree
+from clifs.utils_table import PathTable
+
+
+def get_table(root):
+    table = PathTable()
+    table.extend(scan_tree(str(root), recursive=True))
+    return table
+
+
+def test_table_paths(dirs_source):
+    root = dirs_source[0]
+    paths_exp = [Path(entry.path) for entry in scan_tree(str(root), recursive=True)]
+    table = get_table(root)
+
+    assert len(table) == len(paths_exp)
+    assert list(table) == paths_exp
+    assert list(table.paths([2, 0])) == [paths_exp[2], paths_exp[0]]
+    # each parent directory is stored once
+    assert len(table.parents) == len({path.parent for path in paths_exp})
+    for row, path in enumerate(paths_exp):
+        assert bool(table.is_dir[row]) == path.is_dir()
+
+
+def test_table_masks(dirs_source):
+    root = dirs_source[0]
+    paths = [Path(entry.path) for entry in scan_tree(str(root), recursive=True)]
+    table = get_table(root)
+
+    files = table.select(table.mask_files())
+    assert list(files) == [path for path in paths if path.is_file()]
+    dirs = table.select(table.mask_dirs())
+    assert list(dirs) == [path for path in paths if path.is_dir()]
+
+    # selected tables keep all columns
+    assert list(files.is_dir) == [False] * len(files)
+
+
+def test_get_table(dirs_source):
+    path_getter = PathGetterMixin()
+    path_getter.dir_source = dirs_source[0]
+    path_getter.recursive = True
+    path_getter.filterlist = None
+    path_getter.filterstring = ".txt"
+
+    files, dirs = path_getter.get_paths()
+    table = path_getter.get_table()
+    assert list(table.select(table.mask_files())) == files
+    assert list(table.select(table.mask_dirs())) == dirs
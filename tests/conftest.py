@@ -6,9 +6,18 @@ from typing import List
 
 import pytest
 
+from clifs.utils_cache import ENV_CACHE_DIR
 from tests.common.utils_testing import get_files, update_mtime
 
 
+@pytest.fixture(autouse=True)
+def dir_cache(tmp_path_factory, monkeypatch) -> Path:
+    # keep cache files of test runs out of the user cache directory
+    dir_res = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv(ENV_CACHE_DIR, str(dir_res))
+    return dir_res
+
+
 @pytest.fixture(scope="function")
 def dir_testrun(tmp_path: Path) -> Path:
     # create source dest structure for update test
@@ -7,6 +7,7 @@ import pytest
 
 from clifs.__main__ import main
 from clifs.plugins.edit import StreamingEditor
+from clifs.utils_fs import NameIndex
 from tests.common.utils_testing import parametrize_default_ids
 
 
@@ -59,7 +60,11 @@ def test_parse_line_numbers():
 @parametrize_default_ids("line_nums", [None, [1], [2, 3], [5], range(1, 2)])
 def test_replace(pattern, replacement, line_nums):
     sed_mock = MagicMock(
-        encoding="utf-8", line_nums=line_nums, pattern=pattern, replacement=replacement
+        encoding="utf-8",
+        line_nums=line_nums,
+        pattern=pattern,
+        replacement=replacement,
+        name_index=NameIndex(),
     )
 
     file_content = [
@@ -114,7 +119,7 @@ def test_preview_replace(capsys, pattern, replacement, line_nums, max_previews):
         "pathlib.Path.open",
         unittest.mock.mock_open(read_data="".join(file_content)),
     ) as m, patch.object(
-        StreamingEditor, "get_paths", return_value=["bla", "blub"]
+        StreamingEditor, "iter_paths", return_value=["bla", "blub"]
     ), patch.object(StreamingEditor, "parse_line_nums", return_value=line_nums):
         sed = StreamingEditor(mock_args)
         StreamingEditor.preview_replace(sed, Path("some_file.txt"))
@@ -213,3 +218,23 @@ def test_streaming_editor(
                 assert file_content_modified == re.sub(
                     pattern, replacement, file_contents_initial[file.name]
                 )
+
+
+def test_streaming_editor_preview_bounded(dir_testrun, capsys):
+    dir_files = dir_testrun / "preview_bounded"
+    dir_files.mkdir()
+    for idx in range(5):
+        (dir_files / f"file_{idx}.txt").write_text("nothing to see\n")
+    patch_args = ["clifs", "sed", str(dir_files), "--pattern", "see", "-rp", "do"]
+
+    with patch("sys.argv", patch_args), patch(
+        "builtins.input", return_value="yes"
+    ), patch("clifs.plugins.edit.MAX_FILES_PREVIEWED", 2):
+        main()
+
+    out = capsys.readouterr().out
+    assert out.count("Changes in file") == 2
+    assert "Preview stopped after 2 files." in out
+    # files not previewed are edited nevertheless
+    for idx in range(5):
+        assert (dir_files / f"file_{idx}.txt").read_text() == "nothing to do\n"
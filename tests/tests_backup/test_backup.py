@@ -1,11 +1,33 @@
 """Test the backup plugin"""
 
+import os
+import threading
+import time
 from pathlib import Path
 from unittest.mock import patch
 
 import pytest
 
 from clifs.__main__ import main
+from clifs.plugins.backup import (
+    DeleteItem,
+    Move,
+    TreeDiff,
+    TreeEntry,
+    check_dest,
+    conditional_delete,
+    detect_moves,
+    diff_trees,
+    get_latest_snapshot,
+    get_manifest_path,
+    list_tree,
+    merge_trees,
+    plan_deletion,
+    read_manifest,
+    run_limited,
+    write_manifest,
+)
+from clifs.utils_cache import get_cache_dir
 from tests.common.utils_testing import (
     assert_files_present,
     parametrize_default_ids,
@@ -38,6 +60,10 @@ def cfg_testrun(dir_testrun):
 @parametrize_default_ids("from_cfg", [False, True])
 @parametrize_default_ids("delete", [False, True])
 @parametrize_default_ids("dry_run", [False, True])
+@parametrize_default_ids(
+    ["scan_workers", "use_index", "workers", "pair_workers"],
+    [(1, False, 1, 1), (4, False, 4, 2), (1, True, 1, 2)],
+)
 def test_backup(
     cfg_testrun,
     dirs_source,
@@ -47,6 +73,10 @@ def test_backup(
     from_cfg,
     delete,
     dry_run,
+    scan_workers,
+    use_index,
+    workers,
+    pair_workers,
 ):
     # run the actual function to test
     if from_cfg:
@@ -55,6 +85,12 @@ def test_backup(
             patch_args.append("--delete")
         if dry_run:
             patch_args.append("--dry_run")
+        patch_args.extend(
+            ["--scan_workers", str(scan_workers), "--workers", str(workers)]
+        )
+        if use_index:
+            patch_args.append("--use_index")
+        patch_args.extend(["--pair_workers", str(pair_workers), "--device_limit", "2"])
 
         with patch("sys.argv", patch_args):
             main()
@@ -73,6 +109,11 @@ def test_backup(
                 patch_args.append("--delete")
             if dry_run:
                 patch_args.append("--dry_run")
+            patch_args.extend(
+                ["--scan_workers", str(scan_workers), "--workers", str(workers)]
+            )
+            if use_index:
+                patch_args.append("--use_index")
 
             with patch("sys.argv", patch_args):
                 main()
@@ -99,3 +140,412 @@ def test_backup(
     # check for source dir integrity
     for idx_dir in range(len(dirs_source)):
         assert_files_present(dirs_source[idx_dir], dirs_source_ref[idx_dir])
+
+
+@parametrize_default_ids("workers", [1, 4])
+def test_backup_failed_file(dir_testrun, workers):
+    dir_source = dir_testrun / "failing_source"
+    dir_dest = dir_testrun / "failing_dest"
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (dir_source / "sub").mkdir(parents=True, exist_ok=True)
+        (dir_source / "sub" / name).write_text(name)
+    # a folder in place of a file cannot be overwritten
+    (dir_dest / "sub" / "b.txt").mkdir(parents=True)
+
+    patch_args = ["clifs", "backup", "-s", str(dir_source), "-d", str(dir_dest)]
+    patch_args.extend(["--workers", str(workers)])
+    with patch("sys.argv", patch_args), pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 1
+    assert (dir_dest / "sub" / "a.txt").read_text() == "a.txt"
+    assert (dir_dest / "sub" / "b.txt").is_dir()
+    assert (dir_dest / "sub" / "c.txt").read_text() == "c.txt"
+
+
+def file(path, mtime=0.0):
+    return TreeEntry(path, False, 1, mtime)
+
+
+def folder(path):
+    return TreeEntry(path, True, 0, 0.0)
+
+
+@parametrize_default_ids(
+    ["tree_source", "tree_dest", "added", "updated", "untouched", "obsolete"],
+    [
+        ([], [], [], [], [], []),
+        ([], [file("a"), folder("b")], [], [], [], [file("a"), folder("b")]),
+        ([file("a"), folder("b")], [], [file("a")], [], [], []),
+        (
+            [file("a", 10.0), file("b", 10.0), file("c", 10.0)],
+            [file("a", 10.0), file("b", 8.0), file("c", 12.0)],
+            [],
+            [file("b", 10.0)],
+            [file("a", 10.0), file("c", 10.0)],
+            [],
+        ),
+        (
+            [folder("a"), file("a/b"), file("ab")],
+            [file("a"), folder("aa"), file("aa/b"), file("ab")],
+            [file("a/b")],
+            [],
+            [file("ab")],
+            [file("a"), folder("aa"), file("aa/b")],
+        ),
+        (
+            [file("a"), file("c")],
+            [folder("a"), file("a/b"), file("b"), file("c")],
+            [file("a")],
+            [],
+            [file("c")],
+            [folder("a"), file("a/b"), file("b")],
+        ),
+    ],
+)
+def test_diff_trees(tree_source, tree_dest, added, updated, untouched, obsolete):
+    diff = diff_trees(tree_source, tree_dest)
+    assert diff.added == added
+    assert diff.updated == updated
+    assert diff.untouched == untouched
+    assert diff.obsolete == obsolete
+
+
+def test_diff_trees_ignoring_case(monkeypatch):
+    # file systems ignoring case, like on Windows
+    monkeypatch.setattr(os.path, "normcase", str.lower)
+    tree_source = [file("A.txt", 5.0), folder("b"), file("B/c.txt"), file("d.txt")]
+    tree_dest = [file("a.txt", 5.0), folder("B"), file("b/C.txt"), file("D.txt", 9.0)]
+    diff = diff_trees(tree_source, tree_dest)
+    # items renamed by case only are neither added nor obsolete
+    assert diff.added == []
+    assert diff.updated == []
+    assert diff.untouched == [file("A.txt", 5.0), file("B/c.txt"), file("d.txt")]
+    assert diff.obsolete == []
+    assert merge_trees(tree_source, tree_dest) == tree_source
+
+
+@pytest.mark.parametrize("use_index", [False, True])
+def test_list_tree(dir_testrun, use_index):
+    root = dir_testrun / "tree"
+    (root / "b").mkdir(parents=True)
+    (root / "b" / "c.txt").write_text("content")
+    (root / "a.txt").write_text("")
+
+    tree = list_tree(root, use_index=use_index)
+    stat = (root / "b" / "c.txt").stat()
+    assert tree == [
+        TreeEntry("a.txt", False, 0, (root / "a.txt").stat().st_mtime),
+        folder("b"),
+        TreeEntry(str(Path("b", "c.txt")), False, 7, stat.st_mtime),
+    ]
+    assert not list_tree(root / "missing")
+
+
+def test_backup_manifest(dir_testrun):
+    dir_source = dir_testrun / "manifest_source"
+    dir_dest = dir_testrun / "manifest_dest"
+    (dir_source / "sub").mkdir(parents=True)
+    (dir_source / "sub" / "a.txt").write_text("a")
+    (dir_source / "b.txt").write_text("b")
+    patch_args = ["clifs", "backup", "-s", str(dir_source), "-d", str(dir_dest)]
+    with patch("sys.argv", patch_args):
+        main()
+    assert read_manifest(
+        get_manifest_path(dir_source, dir_dest), dir_source, dir_dest
+    ) == list_tree(dir_source)
+
+    # changes to the destination go unnoticed, changes to the source do not
+    (dir_dest / "sub" / "a.txt").unlink()
+    (dir_source / "b.txt").write_text("b updated")
+    mtime = (dir_source / "b.txt").stat().st_mtime
+    os.utime(dir_source / "b.txt", (mtime + 10, mtime + 10))
+    with patch("sys.argv", patch_args):
+        main()
+    assert not (dir_dest / "sub" / "a.txt").exists()
+    assert (dir_dest / "b.txt").read_text() == "b updated"
+
+    with patch("sys.argv", [*patch_args, "--verify_dest"]):
+        main()
+    assert (dir_dest / "sub" / "a.txt").read_text() == "a"
+
+
+def test_read_write_manifest(dir_testrun):
+    dir_source, dir_dest = dir_testrun / "source", dir_testrun / "dest"
+    path_manifest = get_manifest_path(dir_source, dir_dest)
+    assert path_manifest != get_manifest_path(dir_dest, dir_source)
+    assert read_manifest(path_manifest, dir_source, dir_dest) is None
+
+    tree = [folder("a"), file("a/b", 1.5), file("c", 2.0)]
+    write_manifest(path_manifest, dir_source, dir_dest, tree)
+    assert read_manifest(path_manifest, dir_source, dir_dest) == tree
+    assert read_manifest(path_manifest, dir_source, dir_testrun) is None
+
+
+def test_check_dest(dir_testrun):
+    (dir_testrun / "present.txt").write_text("")
+    os.utime(dir_testrun / "present.txt", (100.0, 100.0))
+    diff = TreeDiff(
+        [file("missing.txt", 100.0), file("present.txt", 100.0)],
+        [file("present.txt", 200.0)],
+        [file("untouched.txt")],
+        [file("obsolete.txt")],
+    )
+    assert check_dest(diff, dir_testrun) == TreeDiff(
+        [file("missing.txt", 100.0)],
+        [file("present.txt", 200.0)],
+        [file("untouched.txt"), file("present.txt", 100.0)],
+        [file("obsolete.txt")],
+    )
+
+
+def test_backup_snapshot(dir_testrun):
+    dir_source = dir_testrun / "snapshot_source"
+    dir_dest = dir_testrun / "snapshots"
+    (dir_source / "sub").mkdir(parents=True)
+    (dir_source / "a.txt").write_text("a")
+    (dir_source / "sub" / "b.txt").write_text("b")
+    patch_args = ["clifs", "backup", "-s", str(dir_source), "-d", str(dir_dest)]
+    patch_args.append("--snapshot")
+    with patch("sys.argv", patch_args):
+        main()
+    snapshot_first = get_latest_snapshot(dir_dest)
+    assert snapshot_first is not None
+    assert_files_present(dir_source, snapshot_first)
+
+    (dir_source / "sub" / "b.txt").write_text("b updated")
+    mtime = (dir_source / "sub" / "b.txt").stat().st_mtime
+    os.utime(dir_source / "sub" / "b.txt", (mtime + 10, mtime + 10))
+    for args_extra in ([], ["--verify_dest", "--workers", "2"]):
+        snapshot_last = get_latest_snapshot(dir_dest)
+        with patch("sys.argv", [*patch_args, *args_extra]):
+            main()
+        snapshot_new = get_latest_snapshot(dir_dest)
+        assert snapshot_new not in (None, snapshot_last)
+        assert_files_present(dir_source, snapshot_new)
+        # unchanged files are shared with the previous snapshot
+        assert (snapshot_new / "a.txt").samefile(snapshot_last / "a.txt")
+
+    assert len(list(dir_dest.iterdir())) == 3
+    # a single manifest per directory pair describes the latest snapshot
+    assert [path.name for path in (get_cache_dir() / "backup_manifests").iterdir()] == [
+        get_manifest_path(dir_source, dir_dest).name
+    ]
+    assert read_manifest(
+        get_manifest_path(dir_source, dir_dest), dir_source, snapshot_new
+    ) == list_tree(dir_source)
+    assert (snapshot_first / "sub" / "b.txt").read_text() == "b"
+    assert (snapshot_new / "sub" / "b.txt").read_text() == "b updated"
+    assert (snapshot_new / "a.txt").stat().st_nlink == 3
+
+
+def test_backup_snapshot_delete(dir_testrun):
+    patch_args = ["clifs", "backup", "-s", str(dir_testrun), "-d", str(dir_testrun)]
+    with patch("sys.argv", [*patch_args, "--snapshot", "--delete"]):
+        with pytest.raises(SystemExit):
+            main()
+
+
+def test_get_latest_snapshot(dir_testrun):
+    dir_dest = dir_testrun / "snapshots"
+    assert get_latest_snapshot(dir_dest) is None
+    for name in (
+        "2023-12-31_23-59-59",
+        "2024-01-01_00-00-00",
+        "2024-01-01_00-00-00_2",
+        "2024-01-01_00-00-00_10",
+        "2024-01-01_00-00-00_x",
+        "other",
+    ):
+        (dir_dest / name).mkdir(parents=True)
+    (dir_dest / "2099-01-01_00-00-00").write_text("not a snapshot")
+    assert get_latest_snapshot(dir_dest) == dir_dest / "2024-01-01_00-00-00_10"
+
+
+def test_backup_pairs_failed(dir_testrun, dirs_source, dirs_dest):
+    path_cfg = dir_testrun / "cfg_failing.csv"
+    # a file in place of the destination lets all copies of its pair fail
+    (dir_testrun / "dest_file").write_text("")
+    path_cfg.write_text(
+        "source_dir,dest_dir\n"
+        f"{dir_testrun / 'missing'},{dir_testrun / 'missing_dest'}\n"
+        f"{dirs_source[1]},{dir_testrun / 'dest_file'}\n"
+        f"{dirs_source[0]},{dirs_dest[0]}\n"
+    )
+    patch_args = ["clifs", "backup", "--cfg_file", str(path_cfg), "-pw", "2"]
+    with patch("sys.argv", patch_args), pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 1
+    assert_files_present(dirs_source[0], dirs_dest[0])
+    assert not (dir_testrun / "missing_dest").exists()
+
+
+@parametrize_default_ids("device_limit", [1, 2])
+def test_run_limited(device_limit):
+    devices = [{1}, {1}, {2}, {1, 2}, {2}, {3}, {1}]
+    usage = {dev: 0 for dev in (1, 2, 3)}
+    usage_max = dict(usage)
+    lock = threading.Lock()
+
+    def job(idx):
+        with lock:
+            for dev in devices[idx]:
+                usage[dev] += 1
+                usage_max[dev] = max(usage_max[dev], usage[dev])
+        time.sleep(0.01)
+        with lock:
+            for dev in devices[idx]:
+                usage[dev] -= 1
+        return idx * 10
+
+    results = list(
+        run_limited(
+            [lambda idx=idx: job(idx) for idx in range(len(devices))],
+            devices,
+            workers=3,
+            device_limit=device_limit,
+        )
+    )
+    assert sorted(results) == [(idx, idx * 10) for idx in range(len(devices))]
+    assert max(usage_max.values()) <= device_limit
+
+
+def test_plan_deletion():
+    obsolete = [
+        file("a"),
+        folder("b"),
+        # sorts in between a folder and its content
+        folder("b x"),
+        file(os.path.join("b", "c")),
+        folder(os.path.join("b", "d")),
+        file(os.path.join("b", "d", "e")),
+        file(os.path.join("c", "f")),
+    ]
+    assert plan_deletion(obsolete) == [
+        DeleteItem(file("a"), 1, 0),
+        DeleteItem(folder("b"), 2, 2),
+        DeleteItem(folder("b x"), 0, 1),
+        DeleteItem(file(os.path.join("c", "f")), 1, 0),
+    ]
+    assert not plan_deletion([])
+
+
+def test_conditional_delete(dir_testrun):
+    dir_target = dir_testrun / "target"
+    (dir_target / "sub").mkdir(parents=True)
+    (dir_target / "sub" / "file.txt").write_text("")
+    (dir_testrun / "link").symlink_to(dir_target, target_is_directory=True)
+
+    assert conditional_delete(dir_testrun / "link", dry_run=True) == 1
+    assert conditional_delete(dir_testrun / "link") == 1
+    assert not os.path.lexists(dir_testrun / "link")
+    assert (dir_target / "sub" / "file.txt").exists()
+
+    assert conditional_delete(dir_target) == 1
+    assert not dir_target.exists()
+    assert conditional_delete(dir_target) == 0
+
+
+@parametrize_default_ids("compare_hash", [False, True])
+def test_detect_moves(dir_testrun, compare_hash):
+    dir_source, dir_dest = dir_testrun / "moves_source", dir_testrun / "moves_dest"
+    for path, content in (
+        (dir_source / "new" / "a.txt", "a"),
+        (dir_source / "new" / "b.txt", "b"),
+        (dir_source / "c.txt", "c"),
+        (dir_dest / "old" / "a.txt", "a"),
+        (dir_dest / "old" / "x.txt", "b"),
+        (dir_dest / "old" / "b.txt", "x"),
+        (dir_dest / "old" / "c.txt", "c"),
+    ):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    diff = TreeDiff(
+        [
+            file("c.txt", 100.0),
+            file("d.txt", 100.0),
+            file(os.path.join("new", "a.txt"), 10.0),
+            file(os.path.join("new", "b.txt"), 10.0),
+        ],
+        [],
+        [],
+        [
+            folder("old"),
+            file(os.path.join("old", "a.txt"), 10.5),
+            file(os.path.join("old", "b.txt"), 10.0),
+            file(os.path.join("old", "c.txt"), 98.0),
+            file(os.path.join("old", "x.txt"), 10.0),
+        ],
+    )
+    diff_moves, moves = detect_moves(diff, dir_source, dir_dest, compare_hash)
+
+    # files of the same name are preferred unless their contents differ
+    path_old_b = os.path.join("old", "x.txt" if compare_hash else "b.txt")
+    assert moves == [
+        Move(file(os.path.join("new", "a.txt"), 10.0), os.path.join("old", "a.txt")),
+        Move(file(os.path.join("new", "b.txt"), 10.0), path_old_b),
+    ]
+    # modification times differing by more than a second do not match
+    assert diff_moves.added == [file("c.txt", 100.0), file("d.txt", 100.0)]
+    assert [entry.path for entry in diff_moves.obsolete] == [
+        entry.path
+        for entry in diff.obsolete
+        if entry.path not in (os.path.join("old", "a.txt"), path_old_b)
+    ]
+
+
+@parametrize_default_ids("hash_moves", [False, True])
+@parametrize_default_ids("workers", [1, 4])
+def test_backup_moves(dir_testrun, hash_moves, workers):
+    dir_source, dir_dest = dir_testrun / "moves_source", dir_testrun / "moves_dest"
+    (dir_source / "old" / "sub").mkdir(parents=True)
+    for name in ("a.txt", "b.txt", os.path.join("sub", "c.txt")):
+        (dir_source / "old" / name).write_text(name)
+    patch_args = ["clifs", "backup", "-s", str(dir_source), "-d", str(dir_dest)]
+    patch_args += ["--delete", "--workers", str(workers)]
+    with patch("sys.argv", patch_args):
+        main()
+    inodes = {
+        path.relative_to(dir_dest / "old"): path.stat().st_ino
+        for path in (dir_dest / "old").rglob("*")
+        if path.is_file()
+    }
+
+    (dir_source / "old").rename(dir_source / "new")
+    with patch(
+        "sys.argv",
+        [*patch_args, "--hash_moves" if hash_moves else "--detect_moves"],
+    ):
+        main()
+    assert_files_present(dir_source, dir_dest)
+    assert not (dir_dest / "old").exists()
+    # the files were moved within the destination instead of being copied
+    for path, inode in inodes.items():
+        assert (dir_dest / "new" / path).stat().st_ino == inode
+
+
+def test_backup_moves_snapshot(dir_testrun):
+    dir_source, dir_dest = dir_testrun / "moves_source", dir_testrun / "snapshots"
+    dir_source.mkdir()
+    (dir_source / "a.txt").write_text("a")
+    patch_args = ["clifs", "backup", "-s", str(dir_source), "-d", str(dir_dest)]
+    patch_args += ["--snapshot", "--detect_moves"]
+    with patch("sys.argv", patch_args):
+        main()
+    snapshot_first = get_latest_snapshot(dir_dest)
+    assert snapshot_first is not None
+
+    (dir_source / "a.txt").rename(dir_source / "b.txt")
+    with patch("sys.argv", patch_args):
+        main()
+    snapshot_new = get_latest_snapshot(dir_dest)
+    assert snapshot_new not in (None, snapshot_first)
+    assert_files_present(dir_source, snapshot_new)
+    # moved files are linked from the previous snapshot
+    assert (snapshot_new / "b.txt").samefile(snapshot_first / "a.txt")
+
+
+def test_backup_moves_without_delete(dir_testrun):
+    patch_args = ["clifs", "backup", "-s", str(dir_testrun), "-d", str(dir_testrun)]
+    with patch("sys.argv", [*patch_args, "--detect_moves"]):
+        with pytest.raises(SystemExit):
+            main()
@@ -0,0 +1,135 @@
+"""Test the batch plugin"""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from clifs import utils_fs
+from clifs.__main__ import main
+from clifs.plugins import batch
+from tests.common.utils_testing import (
+    assert_files_present,
+    parametrize_default_ids,
+    substr_in_dir_names,
+)
+
+
+def write_jobs(path_jobs, jobs, as_json):
+    with path_jobs.open("w", encoding="utf-8") as jobs_file:
+        jobs_file.write("# some comment\n\n")
+        for job in jobs:
+            jobs_file.write((json.dumps(job) if as_json else " ".join(job)) + "\n")
+
+
+@parametrize_default_ids("as_json", [False, True])
+def test_batch(dir_testrun, dirs_source, dirs_empty, dirs_dest, as_json):
+    jobs = []
+    for dir_source, dir_empty, dir_dest in zip(dirs_source, dirs_empty, dirs_dest):
+        jobs.append(["cp", str(dir_source), str(dir_empty), "-r"])
+        jobs.append(["clifs", "del", str(dir_dest), "-fs", "DELME", "-r", "-sp"])
+    path_jobs = dir_testrun / ("jobs.jsonl" if as_json else "jobs.txt")
+    write_jobs(path_jobs, jobs, as_json)
+
+    with patch("sys.argv", ["clifs", "batch", str(path_jobs)]):
+        main()
+
+    for dir_source, dir_empty, dir_dest in zip(dirs_source, dirs_empty, dirs_dest):
+        assert_files_present(dir_source, dir_empty)
+        assert not substr_in_dir_names(dir_dest, files_only=True)
+    assert utils_fs.SCAN_CACHE is None
+
+
+@parametrize_default_ids("stop_on_error", [False, True])
+def test_batch_failing_job(dir_testrun, dirs_dest, stop_on_error, capfd):
+    jobs = [
+        ["del", str(dirs_dest[0]), "--no_such_option"],
+        ["del", str(dirs_dest[0]), "-fs", "DELME", "-r", "-sp"],
+    ]
+    path_jobs = dir_testrun / "jobs.txt"
+    write_jobs(path_jobs, jobs, as_json=False)
+
+    argv = ["clifs", "batch", str(path_jobs)]
+    if stop_on_error:
+        argv.append("--stop_on_error")
+    with patch("sys.argv", argv), pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 1
+
+    out, _ = capfd.readouterr()
+    assert "Job 1 failed with exit code 2" in out
+    if stop_on_error:
+        assert substr_in_dir_names(dirs_dest[0], files_only=True)
+        assert "0 of 2 jobs done, 1 failed, 1 skipped." in out
+    else:
+        assert not substr_in_dir_names(dirs_dest[0], files_only=True)
+        assert "1 of 2 jobs done, 1 failed, 0 skipped." in out
+
+
+@parametrize_default_ids("stop_on_error", [False, True])
+def test_batch_job_raising(dir_testrun, dirs_dest, stop_on_error, capfd):
+    jobs = [["del", str(dirs_dest[0]), "-fs", "DELME", "-r", "-sp"]] * 2
+    path_jobs = dir_testrun / "jobs.txt"
+    write_jobs(path_jobs, jobs, as_json=False)
+    run_command = batch.run_command
+
+    def run_failing(argv):
+        if run_failing.calls == 0:
+            run_failing.calls += 1
+            raise OSError("Permission denied")
+        run_command(argv)
+
+    run_failing.calls = 0
+    argv = ["clifs", "batch", str(path_jobs)]
+    if stop_on_error:
+        argv.append("--stop_on_error")
+    with patch("sys.argv", argv), patch.object(
+        batch, "run_command", run_failing
+    ), pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 1
+
+    out, err = capfd.readouterr()
+    assert "OSError: Permission denied" in err
+    assert "Job 1 failed with exit code 1" in out
+    if stop_on_error:
+        assert substr_in_dir_names(dirs_dest[0], files_only=True)
+        assert "0 of 2 jobs done, 1 failed, 1 skipped." in out
+    else:
+        assert not substr_in_dir_names(dirs_dest[0], files_only=True)
+        assert "1 of 2 jobs done, 1 failed, 0 skipped." in out
+
+
+def test_batch_reuses_listings(dir_testrun, dirs_source):
+    # make sure directories are old enough to be cached
+    for path in [dirs_source[0], *dirs_source[0].rglob("*")]:
+        os.utime(path, (1e9, 1e9))
+    jobs = [["del", str(dirs_source[0]), "-fs", "does_not_exist", "-r", "-sp"]] * 2
+    path_jobs = dir_testrun / "jobs.txt"
+    write_jobs(path_jobs, jobs, as_json=False)
+
+    caches = []
+    cache_class = utils_fs.DirListingCache
+
+    def create_cache():
+        caches.append(cache_class())
+        return caches[-1]
+
+    with patch("sys.argv", ["clifs", "batch", str(path_jobs)]), patch.object(
+        utils_fs, "DirListingCache", create_cache
+    ):
+        main()
+    assert len(caches) == 1
+    assert caches[0].hits == caches[0].misses > 0
+
+
+@parametrize_default_ids("line", ["batch other_jobs.txt", '"unclosed quote', "serve"])
+def test_batch_invalid_jobs(dir_testrun, line):
+    path_jobs = dir_testrun / "jobs.txt"
+    path_jobs.write_text(line + "\n", encoding="utf-8")
+    with patch("sys.argv", ["clifs", "batch", str(path_jobs)]), pytest.raises(
+        SystemExit
+    ) as exc_info:
+        main()
+    assert exc_info.value.code == 1
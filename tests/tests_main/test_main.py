@@ -0,0 +1,93 @@
+"""Test the main entry point"""
+
+import json
+from importlib.metadata import EntryPoint
+from unittest.mock import patch
+
+import pytest
+
+from clifs.__main__ import get_selected_plugin, main
+from clifs.utils_plugins import (
+    get_dist_fingerprint,
+    get_manifest_path,
+    get_plugin_entry_points,
+    get_plugin_manifest,
+)
+from tests.common.utils_testing import parametrize_default_ids
+
+
+@parametrize_default_ids(
+    ["argv", "exp_plugin"],
+    [
+        ([], None),
+        (["-v"], None),
+        (["du", "."], "du"),
+        (["-v", "tree", "-d", "1"], "tree"),
+    ],
+)
+def test_get_selected_plugin(argv, exp_plugin):
+    assert get_selected_plugin(argv) == exp_plugin
+
+
+@pytest.fixture()
+def track_loads():
+    loaded = []
+    load_orig = EntryPoint.load
+
+    def load_tracked(self):
+        loaded.append(self.name)
+        return load_orig(self)
+
+    with patch.object(EntryPoint, "load", load_tracked):
+        yield loaded
+
+
+def test_load_selected_plugin_only(dirs_empty, track_loads):
+    get_plugin_manifest()
+    track_loads.clear()
+    with patch("sys.argv", ["clifs", "du", str(dirs_empty[0])]):
+        main()
+    assert track_loads == ["du"]
+
+
+def test_help_lists_all_plugins(capfd, track_loads):
+    get_plugin_manifest()
+    track_loads.clear()
+    with patch("sys.argv", ["clifs", "--help"]), pytest.raises(SystemExit):
+        main()
+    out, _ = capfd.readouterr()
+    assert track_loads == []
+    for name in get_plugin_entry_points():
+        assert name in out, f"Plugin '{name}' not listed in the help text."
+
+
+def test_manifest_cache(track_loads):
+    manifest = get_plugin_manifest()
+    assert set(manifest) == set(get_plugin_entry_points())
+    assert get_manifest_path().exists()
+    assert set(track_loads) == set(manifest)
+
+    # fresh manifest is read from disk without loading plugins
+    track_loads.clear()
+    with patch("clifs.utils_plugins.entry_points") as mock_entry_points:
+        assert get_plugin_manifest() == manifest
+    mock_entry_points.assert_not_called()
+    assert track_loads == []
+
+    # outdated manifest is rebuilt
+    content = json.loads(get_manifest_path().read_text(encoding="utf-8"))
+    content["fingerprint"] = "outdated"
+    get_manifest_path().write_text(json.dumps(content), encoding="utf-8")
+    assert get_plugin_manifest() == manifest
+    assert set(track_loads) == set(manifest)
+
+    # corrupt manifest is rebuilt
+    get_manifest_path().write_text("no json", encoding="utf-8")
+    assert get_plugin_manifest() == manifest
+
+
+def test_dist_fingerprint(tmp_path):
+    fingerprint = get_dist_fingerprint([str(tmp_path)])
+    assert get_dist_fingerprint([str(tmp_path)]) == fingerprint
+    (tmp_path / "some_dist-1.0.dist-info").mkdir()
+    assert get_dist_fingerprint([str(tmp_path)]) != fingerprint
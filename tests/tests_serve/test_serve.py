@@ -0,0 +1,114 @@
+"""Test the serve plugin"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from clifs import utils_fs
+from clifs.utils_fs import DirListingCache, PathGetterMixin
+from clifs.utils_serve import ENV_SOCKET, server_is_running
+from tests.common.utils_testing import parametrize_default_ids, substr_in_dir_names
+
+
+def test_dir_listing_cache(dirs_source):
+    cache = DirListingCache()
+    cache.min_age_ns = 0
+    dir_source = str(dirs_source[0])
+
+    listing = cache.list_dir(dir_source)
+    assert sorted(item.name for item in listing) == sorted(os.listdir(dir_source))
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    assert cache.list_dir(dir_source) == listing
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # adding a file changes the modification time of the directory
+    (dirs_source[0] / "new_file.txt").touch()
+    os.utime(dir_source, ns=(0, os.stat(dir_source).st_mtime_ns + 10**9))
+    assert "new_file.txt" in [item.name for item in cache.list_dir(dir_source)]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+@parametrize_default_ids("filter_str", [".txt", "2", None])
+@parametrize_default_ids("recursive", [True, False])
+def test_path_getter_cached(dirs_source, filter_str, recursive, monkeypatch):
+    for dir in dirs_source:
+        path_getter = PathGetterMixin()
+        path_getter.dir_source = dir
+        path_getter.recursive = recursive
+        path_getter.filterlist = None
+        path_getter.filterstring = filter_str
+        exp_files, exp_dirs = path_getter.get_paths()
+
+        cache = DirListingCache()
+        cache.min_age_ns = 0
+        monkeypatch.setattr(utils_fs, "SCAN_CACHE", cache)
+        for _ in range(2):
+            files, dirs = path_getter.get_paths()
+            assert files == exp_files
+            assert dirs == exp_dirs
+        assert cache.hits == cache.misses
+        monkeypatch.setattr(utils_fs, "SCAN_CACHE", None)
+
+
+@pytest.fixture()
+def server(tmp_path):
+    path_socket = tmp_path / "clifs.sock"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "clifs", "serve", "--socket", str(path_socket)],
+        stdout=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        if server_is_running(path_socket):
+            break
+        time.sleep(0.1)
+    yield path_socket
+    process.send_signal(signal.SIGINT)
+    process.wait(timeout=10)
+    assert not path_socket.exists(), "Socket not removed on shut down."
+
+
+def run_client(path_socket, argv, input=None):
+    return subprocess.run(
+        [sys.executable, "-m", "clifs", *argv],
+        env={**os.environ, ENV_SOCKET: str(path_socket)},
+        capture_output=True,
+        text=True,
+        input=input,
+        check=False,
+    )
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs unix sockets")
+def test_serve(server, dirs_dest):
+    res = run_client(server, ["du", str(dirs_dest[0])])
+    assert res.returncode == 0
+    assert dirs_dest[0].name in res.stdout
+
+    # user input is forwarded to the server
+    res = run_client(server, ["del", str(dirs_dest[0]), "-fs", "DELME", "-r"], "no\n")
+    assert res.returncode == 0
+    assert "Will not delete" in res.stdout
+    assert substr_in_dir_names(dirs_dest[0], files_only=True)
+
+    res = run_client(server, ["del", str(dirs_dest[0]), "-fs", "DELME", "-r", "-sp"])
+    assert res.returncode == 0
+    assert not substr_in_dir_names(dirs_dest[0], files_only=True)
+
+    # errors are reported with exit code
+    res = run_client(server, ["del", "--unknown_option"])
+    assert res.returncode == 2
+    assert "unrecognized arguments" in res.stderr or "required" in res.stderr
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs unix sockets")
+def test_serve_unreachable(tmp_path, dirs_dest):
+    # commands are run locally if no server is running
+    res = run_client(tmp_path / "no_server.sock", ["du", str(dirs_dest[0])])
+    assert res.returncode == 0
+    assert dirs_dest[0].name in res.stdout
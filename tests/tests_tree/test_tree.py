@@ -47,7 +47,8 @@ def trees_source_dir():
 @parametrize_default_ids("dirs_only", [False, True])
 @parametrize_default_ids("hide_sizes", [False, True])
 @parametrize_default_ids("depth", [None, 1, 2])
-def test_tree(dirs_source, trees_source_dir, dirs_only, hide_sizes, depth):
+@parametrize_default_ids("use_index", [False, True])
+def test_tree(dirs_source, trees_source_dir, dirs_only, hide_sizes, depth, use_index):
     for idx, folder in enumerate(dirs_source):
         with patch("os.stat_result.st_size", 1024):
             tree = DirectoryTree(
@@ -56,6 +57,7 @@ def test_tree(dirs_source, trees_source_dir, dirs_only, hide_sizes, depth):
                     dirs_only=dirs_only,
                     hide_sizes=hide_sizes,
                     depth=depth,
+                    use_index=use_index,
                 )
             )
         tree.run()